@@ -26,8 +26,12 @@
 # ------------------------------------------------------------------------------
 
 import hashlib
+import heapq
+
+import chj.util.graphutil as UG
 
 from chj.util.DotGraph import DotGraph
+from chj.util.LayeredLayout import LayeredLayout
 
 class BBlock():
     '''Basic block in a method control flow graph.'''
@@ -72,6 +76,7 @@ class Cfg():
         self.xnode = xnode
         self.blocks = {}            # firstpc -> BBlock
         self.edges = {}             # firstpc -> list of firstpcs
+        self.graph = None           # DirectedGraph, computed on demand
         self._initialize_blocks()
         self._initialize_edges()
 
@@ -101,51 +106,180 @@ class Cfg():
     def cfg_hash(self):
         s = 'cfg'
         for src in sorted(self.edges):
-            s += str(src)
-            for tgt in sorted(self.edges[src]):
-                s += str(tgt)
-        h = hashlib.md5(s).hexdigest()
+            s += ';' + str(src) + ':' + ','.join([ str(tgt) for tgt in sorted(self.edges[src]) ])
+        h = hashlib.md5(s.encode('utf-8')).hexdigest()
         return h
         
 
     def enumerate_paths(self,startpc,endpc):
-        def multiplicity(l,e):
-            count = 0
-            for x in l:
-                if x == e: count += 1
-            return count
-        result = []
+        return list(self.iter_paths(startpc,endpc))
+
+    def iter_paths(self,startpc,endpc,maxpaths=None,maxlength=None,maxunroll=1):
+        """Generate the paths from startpc to endpc, at most maxpaths paths of at
+        most maxlength blocks (no bound if None). A successor of a block inside a
+        loop may occur maxunroll + 1 times on a path, other blocks only once.
+        Paths with the same set of blocks and the same length are generated
+        only once. Use count_paths to estimate the number of paths first."""
+        if maxpaths == 0: return
+        def allowance(pc):
+            return maxunroll if self.get_block(pc).get_loop_level_count() > 0 else 0
+        seen = set([])
+        count = 0
         prefix = [ startpc ]
-        def enumpaths(p):
-            prefix = p[:]
-            lastpc = prefix[-1]
-            succs = self.get_successors(lastpc)
-            depth = 0
-            if self.get_block(lastpc).get_loop_level_count() > 0:
-                depth = 1
-            for s in succs:
-                if multiplicity(prefix,s) > depth: continue
-                if s == endpc:
-                    prefix.append(s)
-                    result.append(prefix)
-                    prefix = prefix[:-1]
-                    break
+        counts = { startpc: 1 }      # pc -> number of occurrences in prefix
+        stack = []                   # (successor iterator, allowance) per prefix node
+        def push(pc):
+            depth = allowance(pc)
+            succs = self.get_successors(pc)
+            found = (endpc in succs) and counts.get(endpc,0) <= depth
+            stack.append((iter(succs),depth))
+            return found
+        found = push(startpc)
+        while True:
+            if found and (maxlength is None or len(prefix) < maxlength):
+                path = prefix + [ endpc ]
+                key = (frozenset(path),len(path))
+                if not key in seen:
+                    seen.add(key)
+                    yield path
+                    count += 1
+                    if (not maxpaths is None) and count >= maxpaths: return
+            found = False
+            if len(stack) == 0: return
+            (succs,depth) = stack[-1]
             for s in succs:
-                if (multiplicity(prefix,s) > depth) or s == endpc:
-                    continue
+                if s == endpc or counts.get(s,0) > depth: continue
+                if (not maxlength is None) and len(prefix) + 1 >= maxlength: continue
                 prefix.append(s)
-                enumpaths(prefix)
-                prefix = prefix[:-1]
-
-        enumpaths(prefix)
-
-        pathsets = []
-        uniquepaths = []
-        for p in result:
-            if (set(p),len(p)) in pathsets: continue
-            pathsets.append((set(p),len(p)))
-            uniquepaths.append(p)
-        return uniquepaths
+                counts[s] = counts.get(s,0) + 1
+                found = push(s)
+                break
+            else:
+                stack.pop()
+                pc = prefix.pop()
+                counts[pc] -= 1
+                if len(prefix) == 0: return
+
+    def get_graph(self):
+        if self.graph is None:
+            self.graph = UG.DirectedGraph(sorted(self.blocks),self.edges)
+        return self.graph
+
+    def _get_region(self,startpc,endpc):
+        """Return the subgraph of the blocks on paths from startpc to endpc that
+        do not pass through endpc before the end."""
+        edges = {}
+        for (src,tgts) in self.edges.items():
+            if src != endpc: edges[src] = tgts
+        g = UG.DirectedGraph(sorted(self.blocks),edges)
+        nodes = g.get_reachable([startpc]) & g.get_coreachable([endpc])
+        regionedges = {}
+        for n in nodes:
+            regionedges[n] = [ d for d in edges.get(n,[]) if d in nodes ]
+        return UG.DirectedGraph(sorted(nodes),regionedges)
+
+    def _get_condensed_region(self,startpc,endpc):
+        """Return the region between startpc and endpc with its strongly
+        connected components (loops) in topological order."""
+        g = self._get_region(startpc,endpc)
+        sccs = list(reversed(g.get_sccs()))
+        return (g,sccs,g.get_scc_map(sccs))
+
+    def count_paths(self,startpc,endpc):
+        """Return an estimate of the number of paths from startpc to endpc: the
+        number of paths in the region with every loop condensed into a single
+        node. Computed in time linear in the size of the cfg."""
+        (g,sccs,sccmap) = self._get_condensed_region(startpc,endpc)
+        if not endpc in sccmap: return 0
+        counts = [ 0 ] * len(sccs)
+        counts[sccmap[startpc]] = 1
+        for (i,scc) in enumerate(sccs):
+            for n in scc:
+                for d in g.edges.get(n,[]):
+                    if sccmap[d] != i: counts[sccmap[d]] += counts[i]
+        return counts[sccmap[endpc]]
+
+    def get_path_cost_bounds(self,startpc,endpc,lbcosts,ubcosts):
+        """Return ((mincost,minpath),(maxcost,maxpath)): the minimum over all paths
+        from startpc to endpc of the sum of the lower-bound block costs and the
+        maximum of the sum of the upper-bound block costs, each with a witness
+        path. lbcosts and ubcosts map block pcs to numbers.
+
+        Computed by dynamic programming over the cfg with loops condensed into
+        single nodes, in time linear in the size of the cfg (plus a shortest-path
+        search within each loop). A path through a loop is charged the cheapest
+        route from its entry to its exit block for the minimum, and the cost of
+        all blocks in the loop (one full iteration) for the maximum; in the
+        witness paths a loop is traversed along its shortest route. Returns None
+        if endpc is not reachable from startpc."""
+        (g,sccs,sccmap) = self._get_condensed_region(startpc,endpc)
+        if not endpc in sccmap: return None
+        inmin = { startpc: (0,None) }       # pc -> (cost before pc, pred pc)
+        inmax = { startpc: (0,None) }
+        atmin = {}                          # pc -> (cost up to pc, intra-loop path)
+        atmax = {}
+        for (i,scc) in enumerate(sccs):
+            isloop = len(scc) > 1 or scc[0] in g.edges.get(scc[0],[])
+            entries = [ n for n in scc if n in inmin ]
+            if isloop:
+                loopcost = sum([ ubcosts[n] for n in scc ])
+            for v in entries:
+                if isloop:
+                    routes = self._get_loop_routes(g,sccmap,i,v,lbcosts)
+                else:
+                    routes = { v: (lbcosts[v],[ v ]) }
+                for (u,(c,route)) in routes.items():
+                    cmin = inmin[v][0] + c
+                    if (not u in atmin) or cmin < atmin[u][0]:
+                        atmin[u] = (cmin,route)
+                    cmax = inmax[v][0] + (loopcost if isloop else ubcosts[v])
+                    if (not u in atmax) or cmax > atmax[u][0]:
+                        atmax[u] = (cmax,route)
+            for u in scc:
+                if not u in atmin: continue
+                for d in g.edges.get(u,[]):
+                    if sccmap[d] == i: continue
+                    if (not d in inmin) or atmin[u][0] < inmin[d][0]:
+                        inmin[d] = (atmin[u][0],u)
+                    if (not d in inmax) or atmax[u][0] > inmax[d][0]:
+                        inmax[d] = (atmax[u][0],u)
+        def witness(at,inv):
+            path = []
+            u = endpc
+            while not u is None:
+                route = at[u][1]
+                path = route + path
+                u = inv[route[0]][1]
+            return path
+        return ((atmin[endpc][0],witness(atmin,inmin)),
+                    (atmax[endpc][0],witness(atmax,inmax)))
+
+    def _get_loop_routes(self,g,sccmap,i,v,costs):
+        """Return the cheapest routes from v to all blocks in component i:
+        u -> (cost,path), with the costs of both v and u included."""
+        dist = { v: costs[v] }
+        pred = { v: None }
+        heap = [ (costs[v],v) ]
+        done = set([])
+        while len(heap) > 0:
+            (c,n) = heapq.heappop(heap)
+            if n in done: continue
+            done.add(n)
+            for d in g.edges.get(n,[]):
+                if sccmap[d] != i or d in done: continue
+                if (not d in dist) or c + costs[d] < dist[d]:
+                    dist[d] = c + costs[d]
+                    pred[d] = n
+                    heapq.heappush(heap,(dist[d],d))
+        result = {}
+        for u in done:
+            path = []
+            n = u
+            while not n is None:
+                path.append(n)
+                n = pred[n]
+            result[u] = (dist[u],list(reversed(path)))
+        return result
 
     def _initialize_blocks(self):
         for b in self.xnode.find('blocks').findall('bblock'):
@@ -209,3 +343,16 @@ class Cfg():
 
         return (nodes, dotgraph)
 
+    def as_svg(self, methodcost=None, simplecost=False):
+        """Returns an svg ElementTree of the cfg, laid out in process.
+
+        The nodes carry the pc and loop depth (ldepth) of their block as
+        attributes, so no graphviz run or svg post-processing is needed.
+        """
+        (nodes, dotgraph) = self.as_dot(methodcost=methodcost, simplecost=simplecost)
+        loop_levels = self.get_loop_level_counts()
+        nodeattrs = {}
+        for name in nodes:
+            pc = nodes[name]
+            nodeattrs[name] = { 'pc': pc, 'ldepth': loop_levels.get(pc, 0) }
+        return LayeredLayout(dotgraph).to_svg(nodeattrs)
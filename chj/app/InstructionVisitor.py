@@ -0,0 +1,128 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Henny Sipma
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Single-pass visits of the instructions of all application methods.
+
+Visitors register the categories of instructions they are interested in; the
+engine walks the instructions of every method once and dispatches each
+instruction to the visitors registered for its category. The classes can be
+divided over multiple (forked) processes; in that case the visitors in each
+process start from empty results, which are merged in the main process, so
+visitors record their results as picklable data (indices and strings) in
+self.results.
+"""
+
+import multiprocessing
+
+from typing import List
+
+# instruction categories
+CALL = 'call'
+LOAD_STRING = 'load-string'
+PUT_FIELD = 'put-field'
+GET_FIELD = 'get-field'
+PUT_STATIC = 'put-static'
+GET_STATIC = 'get-static'
+OBJECT_CREATED = 'object-created'
+
+categories = [
+    (CALL, lambda i:i.is_call()),
+    (LOAD_STRING, lambda i:i.is_load_string()),
+    (PUT_FIELD, lambda i:i.is_put_field()),
+    (GET_FIELD, lambda i:i.is_get_field()),
+    (PUT_STATIC, lambda i:i.is_put_static()),
+    (GET_STATIC, lambda i:i.is_get_static()),
+    (OBJECT_CREATED, lambda i:i.is_object_created()) ]
+
+def get_category(instr):
+    for (c,p) in categories:
+        if p(instr): return c
+
+class InstructionVisitor(object):
+    """Base class of instruction visitors."""
+
+    categories: List[str] = []    # categories of instructions visited
+
+    def __init__(self):
+        self.results = []
+
+    def visit(self,cmsix,pc,instr): pass
+
+    def merge(self,results): self.results.extend(results)
+
+
+# engine used by the worker processes (inherited by fork)
+_engine = None
+
+def _visit_classes(cnixs):
+    _engine.reset()
+    _engine._visit_classes(cnixs)
+    return [ v.results for v in _engine.visitors ]
+
+class InstructionVisitorEngine(object):
+
+    def __init__(self,app):
+        self.app = app                # AppAccess
+        self.visitors = []            # InstructionVisitor list
+        self.dispatch = {}            # category -> InstructionVisitor list
+
+    def register(self,visitor):
+        self.visitors.append(visitor)
+        for c in visitor.categories:
+            self.dispatch.setdefault(c,[]).append(visitor)
+        return visitor
+
+    def reset(self):
+        for v in self.visitors: v.results = []
+
+    def _visit_classes(self,cnixs):
+        dispatch = self.dispatch
+        def visit_method(cmsix,m):
+            def f(pc,instr):
+                c = get_category(instr)
+                if c in dispatch:
+                    for v in dispatch[c]: v.visit(cmsix,pc,instr)
+            m.iter_instructions(f)
+        for cnix in cnixs:
+            jclass = self.app.get_class(cnix)
+            if not jclass is None: jclass.iter_methods(visit_method)
+
+    def run(self,jobs=1):
+        """Visit all instructions of all application methods once."""
+        global _engine
+        cnixs = sorted(self.app.jd.appclassindices.values())
+        if jobs <= 1 or len(cnixs) < 2:
+            self._visit_classes(cnixs)
+            return
+        chunks = [ cnixs[i::jobs * 4] for i in range(min(len(cnixs),jobs * 4)) ]
+        _engine = self
+        try:
+            context = multiprocessing.get_context('fork')
+            with context.Pool(processes=jobs) as pool:
+                for results in pool.imap_unordered(_visit_classes,chunks):
+                    for (v,r) in zip(self.visitors,results): v.merge(r)
+        finally:
+            _engine = None
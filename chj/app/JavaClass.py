@@ -28,7 +28,6 @@
 from chj.app.BcDictionary import BcDictionary
 from chj.app.Field import Field
 from chj.app.JavaMethod import JavaMethod
-from chj.app.ObjectSize import ObjectSize
 from chj.userdata.UserDataClass import UserDataClass
 
 class JavaClass():
@@ -42,6 +41,7 @@ class JavaClass():
         self.cnix = int(xnode.get('ix'))
         self.package = self.jd.get_cn(self.cnix).get_package_name()
         self.superix = None
+        self.interfaces = None              # [ cnix ] (None if not in the class file)
         self.bcd = None                     # BcDictionary
         self._initialize(xnode)
 
@@ -114,17 +114,7 @@ class JavaClass():
         self.iter_methods(f)
         return results
 
-    def get_object_size(self):
-        objsize = ObjectSize(self)
-        for cfsix in self.fields:
-            if self.fields[cfsix].isstatic: continue
-            objsize.add_field(self.fields[cfsix].get_signature())
-        if self.has_super_class():
-            if self.jd.is_application_class(self.superix):
-                sclass = self.app.get_class(self.superix)
-                if not sclass is None:
-                    objsize.add_object_size(sclass.get_object_size())
-        return objsize
+    def get_object_size(self): return self.app.get_object_size(self.cnix)
 
     def as_dictionary(self):
         result = {}
@@ -151,5 +141,8 @@ class JavaClass():
             self.methods[int(m.get('cmsix'))] = JavaMethod(self,m)
         if 'super-ix' in xnode.attrib:
             self.superix = int(xnode.get('super-ix'))
+        xinterfaces = xnode.find('interfaces')
+        if not xinterfaces is None:
+            self.interfaces = [ int(x.get('ix')) for x in xinterfaces.findall('interface') ]
 
 
@@ -111,6 +111,16 @@ class JavaMethod(object):
         self._read_method_bytecode()
         return self.cfg
 
+    def get_cfg_hash(self):
+        '''returns the hash of the cfg edges, without loading the instructions'''
+        if not self.cfg is None: return self.cfg.cfg_hash()
+        if self.is_abstract(): return None
+        (path,package,classname,methodname,id) = self._get_file_details()
+        bcxnode = UF.get_app_methodsbc_xnode(path,package,classname,methodname,id)
+        if bcxnode is None: return None
+        cfgnode = bcxnode.find('cfg')
+        if not cfgnode is None: return Cfg(self,cfgnode).cfg_hash()
+
     def get_conditions(self):
         if self.is_abstract(): return []
         self._read_method_bytecode()
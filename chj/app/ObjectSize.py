@@ -25,20 +25,27 @@
 # SOFTWARE.
 # ------------------------------------------------------------------------------
 
+import json
+import os
+
+import chj.util.fileutil as UF
+
+# version of the layout of the object size index file
+indexversion = 1
+
 class ObjectSize(object):
 
-    def __init__(self,jclass):
-        self.jclass = jclass      # JavaClass
-        self.jd = jclass.jd       # DataDictionary
+    def __init__(self,jd):
+        self.jd = jd        # DataDictionary
         self.scalar = 0
-        self.objects = []   # [ cnix ]
+        self.objects = []   # [ ObjectType ]
         self.arrays = []    # [ FieldSignature ]
 
     def add_scalar(self,s):
         self.scalar += s
 
-    def add_object(self,cnix):
-        self.objects.append(cnix)
+    def add_object(self,objtype):
+        self.objects.append(objtype)
 
     def add_array(self,arr):
         self.arrays.append(arr)
@@ -46,19 +53,139 @@ class ObjectSize(object):
     def add_field(self,fsig):
         self.add_scalar(fsig.get_scalar_size())
         if fsig.is_object(): self.add_object(fsig.get_object_type())
-        if fsig.is_array(): self.add_array(fsig.get_array())
+        if fsig.is_array(): self.add_array(fsig)
 
     def add_object_size(self,other):
         self.scalar += other.scalar
         self.objects.extend(other.objects)
         self.arrays.extend(other.arrays)
 
+    def as_list(self):
+        return [ self.scalar, [ o.index for o in self.objects ], [ a.index for a in self.arrays ] ]
+
     def to_string(self):
         lines = []
         lines.append('  scalar size: ' + str(self.scalar))
         if len(self.objects) > 0:
-            pObjs = '. '.join([self.jd.get_cn(cnix) for cnix in self.objects])
+            pObjs = ', '.join([ str(x) for x in self.objects ])
             lines.append('  objects    : ' + pObjs)
         if len(self.arrays) > 0:
             lines.append('  arrays     : ' + str(len(self.arrays)))
         return '\n'.join(lines)
+
+def mk_object_size(jd,data):
+    """Return the ObjectSize of a list produced by ObjectSize.as_list."""
+    (scalar,objects,arrays) = data
+    result = ObjectSize(jd)
+    result.scalar = scalar
+    result.objects = [ jd.tpd.get_object_type(ix) for ix in objects ]
+    result.arrays = [ jd.get_fs(ix) for ix in arrays ]
+    return result
+
+
+class ObjectSizeTable(object):
+    """Object sizes of all application classes, including the fields inherited
+    from application superclasses.
+
+    The sizes are computed once, in topological order of the superclass
+    relation, and saved in the index directory; they are recomputed only when
+    a class file or the data dictionary has changed.
+    """
+
+    def __init__(self,app):
+        self.app = app
+        self.jd = app.jd
+        self.index = None          # cnix (string) -> ObjectSize.as_list
+        self.sizes = {}            # cnix -> ObjectSize
+
+    def get_object_size(self,cnix):
+        """Return the ObjectSize of an application class, or None."""
+        if not cnix in self.sizes:
+            data = self._get_index().get(str(cnix))
+            if data is None: return None
+            self.sizes[cnix] = mk_object_size(self.jd,data)
+        return self.sizes[cnix]
+
+    def get_object_sizes(self):
+        """Return [ (cnix,ObjectSize) ] for all application classes."""
+        return [ (int(cnix),self.get_object_size(int(cnix))) for cnix in self._get_index() ]
+
+    def _get_class_files(self):
+        result = {}
+        for cnix in self.jd.appclassindices.values():
+            cn = self.jd.get_cn(cnix)
+            result[str(cnix)] = UF.get_app_class_filename(
+                self.app.path,cn.get_package_name(),cn.get_simple_name())
+        return result
+
+    def _get_index_fingerprints(self):
+        result = {}
+        for (cnix,filename) in self._get_class_files().items():
+            result[cnix] = UF.get_file_fingerprint(filename)
+        result['dictionary'] = UF.get_file_fingerprint(UF.get_datadictionary_filename(self.app.path))
+        return dict((k,(None if v is None else list(v))) for (k,v) in result.items())
+
+    def _get_index(self):
+        if self.index is None:
+            fingerprints = self._get_index_fingerprints()
+            filename = UF.get_object_size_index_filename(self.app.path)
+            if os.path.isfile(filename):
+                try:
+                    with open(filename) as fp:
+                        index = json.load(fp)
+                    if (index.get('version') == indexversion
+                            and index.get('fingerprints') == fingerprints):
+                        self.index = index['classes']
+                except ValueError as e:
+                    print('Ignoring object size index ' + filename + ': ' + str(e))
+            if self.index is None:
+                self.index = self._build_index()
+                tmpfilename = filename + '.tmp'
+                with open(tmpfilename,'w') as fp:
+                    json.dump({ 'version': indexversion, 'fingerprints': fingerprints,
+                                    'classes': self.index },fp)
+                os.replace(tmpfilename,filename)
+        return self.index
+
+    def _get_class_data(self,cnix):
+        """Return the signatures of the instance fields and the superclass index
+        of a class, from the loaded class if available, or else from its class
+        file (without loading methods); None if the class file is missing."""
+        if cnix in self.app.classes:
+            jclass = self.app.classes[cnix]
+            fields = [ f.get_signature() for f in jclass.fields.values() if not f.isstatic ]
+            return (fields,jclass.superix)
+        cn = self.jd.get_cn(cnix)
+        xnode = UF.get_app_class_xnode(self.app.path,cn.get_package_name(),cn.get_simple_name())
+        if xnode is None: return None
+        fields = []
+        for f in xnode.find('fields').findall('field'):
+            if f.get('static') == 'yes': continue
+            fields.append(self.jd.get_cfs(int(f.get('cfsix'))).get_signature())
+        superix = int(xnode.get('super-ix')) if 'super-ix' in xnode.attrib else None
+        return (fields,superix)
+
+    def _build_index(self):
+        """Compute the object sizes of all classes, each class exactly once, with
+        superclasses before their subclasses."""
+        own = {}          # cnix -> (ObjectSize of own fields, superix)
+        for cnix in self.jd.appclassindices.values():
+            data = self._get_class_data(cnix)
+            if data is None: continue
+            (fields,superix) = data
+            objsize = ObjectSize(self.jd)
+            for fsig in fields: objsize.add_field(fsig)
+            own[cnix] = (objsize,superix)
+        result = {}       # cnix -> ObjectSize
+        for cnix in own:
+            chain = []
+            c = cnix
+            while c in own and not c in result and not c in chain:
+                chain.append(c)
+                c = own[c][1]
+            for c in reversed(chain):
+                (objsize,superix) = own[c]
+                if superix in result: objsize.add_object_size(result[superix])
+                result[c] = objsize
+        self.sizes = result
+        return dict((str(cnix),result[cnix].as_list()) for cnix in result)
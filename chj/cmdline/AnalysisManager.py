@@ -31,12 +31,18 @@ import subprocess
 import sys
 
 import chj.util.fileutil as UF
+import chj.util.resultstore as US
+import chj.util.runmetrics as UT
 
 from chj.util.Config import Config
 
+# phase names in the analyzer metrics of the result store modes
+phases = { 'analyze': 'analyze', 'costmodel': 'cost', 'taint': 'taint' }
+
 class AnalysisManager():
 
-    def __init__(self,path,jars,platform=None,excludes=[],dependencies=[],verbose=False,dbg=False):
+    def __init__(self,path,jars,platform=None,excludes=[],dependencies=[],verbose=False,dbg=False,
+                     progress=None):
         """Initialize analyzer location and target jar locations
 
         Arguments:
@@ -47,6 +53,8 @@ class AnalysisManager():
         excludes -- list of package prefixes; classnames that start with one of 
                     these are not loaded
         dependencies -- list of library jars used by the application
+        progress -- function called with every progress event of the analyzer
+                    (see runmetrics.parse_progress)
         """
 
         self.config = Config()
@@ -61,25 +69,33 @@ class AnalysisManager():
         self.excludes = excludes
         self.dependencies = dependencies
         self.missinglibraries =  []
+        self.dependencyjars = None      # [ (dependency, summary jar or None) ]
+        self.progress = progress
 
     def _makedir(self,name):
         if os.path.isdir(name): return
         os.mkdir(name)
 
     def get_dependency_summary_jar(self,dep):
+        # jars given by a relative path are relative to the application
+        if self.platform is None and os.path.isfile(os.path.join(self.apppath,dep)):
+            return os.path.join(self.apppath,dep)
         try:
             return UF.get_lib_summary_jarfile_name(dep,self.platform)
         except UF.CHJLibraryJarNotFoundError as e:
             print('Dependency jar ' + e.libjar + ' not found')
             self.missinglibraries.append(dep)
             return None
-        except UF.CHJError as e:
-            print(str(e.wrap()))
-            exit(1)
+
+    def get_dependency_jars(self):
+        """Return [ (dependency, summary jar or None if not found) ], resolved once."""
+        if self.dependencyjars is None:
+            self.dependencyjars = [ (d,self.get_dependency_summary_jar(d))
+                                        for d in self.dependencies ]
+        return self.dependencyjars
 
     def add_dependencies(self,cmd):
-        for d in self.dependencies:
-            dfile = self.get_dependency_summary_jar(d)
+        for (_,dfile) in self.get_dependency_jars():
             if dfile is None: continue
             cmd.extend(['-summaries',dfile])
 
@@ -92,46 +108,107 @@ class AnalysisManager():
         for jar in self.jars:
             cmd.append(jar)
 
-    def analyze(self,intervalsonly=False):
-        os.chdir(self.apppath)
+    def get_analyze_cmd(self):
         cmd = [ self.config.analyzer, '-summaries', self.jdksummaries ]
         self.add_dependencies(cmd)
         self.add_excludes(cmd)
         if self.verbose: cmd.append('-verbose')
         self.add_jars(cmd)
+        return cmd
+
+    def get_inputs(self,mode):
+        """Return a description of the inputs of an analyzer run in mode (analyze,
+        costmodel, or taint), with content hashes of all files read, or None if
+        the inputs cannot be determined."""
+        inputs = {}
+        inputs['mode'] = mode
+        inputs['analyzer'] = US.get_file_hash(self.config.analyzer)
+        inputs['jdksummaries'] = US.get_file_hash(self.jdksummaries)
+        inputs['jars'] = list(zip(self.jars,US.get_file_hashes(
+            [ os.path.join(self.apppath,jar) for jar in self.jars ])))
+        inputs['dependencies'] = [ (d,None if f is None else US.get_file_hash(f))
+                                       for (d,f) in self.get_dependency_jars() ]
+        inputs['excludes'] = self.excludes
+        inputs['userdata'] = US.get_tree_hashes(os.path.join(self.apppath,'chuserdata'))
+        if mode != 'analyze':
+            inputs['dbg'] = self.dbg
+            record = US.get_record(self.apppath,'analyze')
+            if record is None: return None
+            inputs['analysis'] = record['hash']
+        return inputs
+
+    def get_input_hash(self,mode):
+        inputs = self.get_inputs(mode)
+        return None if inputs is None else US.get_input_hash(inputs)
+
+    def has_current_results(self,mode):
+        """Return true if the results of the last run in mode are present and its
+        inputs are unchanged."""
+        inputhash = self.get_input_hash(mode)
+        return (not inputhash is None) and US.has_current_results(self.apppath,mode,inputhash)
+
+    def restore_results(self,mode):
+        """Copy the results of a run in mode with the same inputs from the result
+        store; return false if the store has no such results."""
+        inputs = self.get_inputs(mode)
+        if inputs is None: return False
+        inputhash = US.get_input_hash(inputs)
+        files = US.restore_results(self.apppath,inputhash)
+        if files is None: return False
+        US.save_record(self.apppath,mode,inputhash,inputs,files,restored=True)
+        print('Restored ' + str(len(files)) + ' result files from ' + US.get_store_dir())
+        return True
+
+    def record_results(self,mode,before):
+        """Record the inputs of a completed run in mode, and save the files it wrote
+        (those changed since the snapshot before) in the result store."""
+        inputs = self.get_inputs(mode)
+        if inputs is None: return
+        inputhash = US.get_input_hash(inputs)
+        after = US.get_analysis_snapshot(self.apppath)
+        files = sorted([ f for f in after if before.get(f) != after[f] ])
+        try:
+            US.store_results(self.apppath,inputhash,files)
+        except OSError as e:
+            print('Unable to save results in the result store: ' + str(e))
+        US.save_record(self.apppath,mode,inputhash,inputs,files)
+
+    def _run_if_changed(self,mode,cmd,force):
+        if not force:
+            if self.has_current_results(mode):
+                print('Skipping ' + mode + ': inputs are unchanged since the last run')
+                return
+            if self.restore_results(mode): return
+        before = US.get_analysis_snapshot(self.apppath)
+        self._run_phase(phases[mode],cmd)
+        self.record_results(mode,before)
+
+    def _run_phase(self,phase,cmd):
+        """Run the analyzer, streaming its output, and record the resource usage
+        of the run in the metrics file of the application."""
         print('Executing: ' + ' '.join(cmd))
         try:
-            result = subprocess.call(cmd, cwd=self.apppath,stderr=subprocess.STDOUT)
+            record = UT.run_analyzer(cmd,self.apppath,phase,progress=self.progress)
         except OSError as e:
             raise UF.CHJOSErrorInAnalyzer(cmd,e)
-        except subprocess.CalledProcessError as e:
-            raise UF.CHJProcessErrorInAnalyzer(cmd,e)
-        if result == 0:
-            return
-        else:
-            raise UF.CHJCodeHawkAnalyzerError(cmd,result)
+        UT.record_run(self.apppath,record)
+        if record['returncode'] != 0:
+            raise UF.CHJCodeHawkAnalyzerError(cmd,record['returncode'])
+
+    def analyze(self,intervalsonly=False,force=False):
+        """Run the numerical analysis, unless its inputs are unchanged since the
+        last run (or results for the same inputs are in the result store)."""
+        self._run_if_changed('analyze',self.get_analyze_cmd(),force)
 
     def translate_only(self):
-        os.chdir(self.apppath)
         cmd = [ self.config.analyzer, '-summaries', self.jdksummaries,
                     '-translate_only' ]
         self.add_dependencies(cmd)
         self.add_excludes(cmd)
         self.add_jars(cmd)
-        print('Executing: ' + ' '.join(cmd))
-        try:
-            result = subprocess.call(cmd, cwd=self.apppath, stderr=subprocess.STDOUT)
-        except OSError as e:
-            raise UF.CHJOSErrorInAnalyzer(cmd,e)
-        except subprocess.CalledProcessError as e:
-            raise UF.CHJProcessErrorInAnalyzer(cmd,e)
-        if result == 0:
-            return
-        else:
-            raise UF.CHJCodeHawkAnalyzerError(cmd,result)
+        self._run_phase('translate',cmd)
 
     def rungui(self):
-        os.chdir(self.apppath)
         cmd = [ self.config.gui, '-summaries', self.jdksummaries ]
         self.add_dependencies(cmd)
         self.add_excludes(cmd)
@@ -149,28 +226,15 @@ class AnalysisManager():
             raise UF.CHJCodeHawkAnalyzerError(cmd,result)
 
     def scanonly(self,verbose=False):
-        os.chdir(self.apppath)
-        print('cd ' + self.apppath)
         cmd = [ self.config.analyzer, '-summaries', self.jdksummaries,'-scan_only']
         if verbose:
             cmd.append('-verbose')
         self.add_dependencies(cmd)
         self.add_excludes(cmd)
         self.add_jars(cmd)
-        print('Executing: ' + ' '.join(cmd))
-        try:
-            result = subprocess.call(cmd, cwd=self.apppath, stderr=subprocess.STDOUT)
-        except OSError as e:
-            raise UF.CHJOSErrorInAnalyzer(cmd,e)
-        except subprocess.CalledProcessError as e:
-            raise UF.CHJProcessErrorInAnalyzer(cmd,e)
-        if result == 0:
-            return
-        else:
-            raise UF.CHJCodeHawkAnalyzerError(cmd,result)
+        self._run_phase('scan',cmd)
 
-    def create_cost_model(self,silent=False,space=False):
-        os.chdir(self.apppath)
+    def create_cost_model(self,silent=False,space=False,force=False):
         cmd = [ self.config.analyzer, '-summaries', self.jdksummaries,
                     '-costmodel' ]
         self.add_dependencies(cmd)
@@ -178,20 +242,9 @@ class AnalysisManager():
         if self.verbose: cmd.append('-verbose')
         if self.dbg: cmd.append('-dbg')
         self.add_jars(cmd)            
-        print('Executing: ' + ' '.join(cmd))
-        try:
-            result = subprocess.call(cmd,cwd=self.apppath,stderr=subprocess.STDOUT)
-        except OSError as e:
-            raise UF.CHJOSErrorInAnalyzer(cmd,e)
-        except subprocess.CalledProcessError as e:
-            raise UF.CHJProcessErrorInAnalyzer(cmd,e)
-        if result == 0:
-            return
-        else:
-            raise UF.CHJCodeHawkAnalyzerError(cmd,result)
+        self._run_if_changed('costmodel',cmd,force)
 
-    def create_taint_graphs(self,silent=False,space=False):
-        os.chdir(self.apppath)
+    def create_taint_graphs(self,silent=False,space=False,force=False):
         cmd = [ self.config.analyzer, '-summaries', self.jdksummaries,
                     '-taint' ]
         self.add_dependencies(cmd)
@@ -199,20 +252,9 @@ class AnalysisManager():
         if self.verbose: cmd.append('-verbose')
         if self.dbg: cmd.append('-dbg')
         self.add_jars(cmd)            
-        print('Executing: ' + ' '.join(cmd))
-        try:
-            result = subprocess.call(cmd,cwd=self.apppath,stderr=subprocess.STDOUT)
-        except OSError as e:
-            raise UF.CHJOSErrorInAnalyzer(cmd,e)
-        except subprocess.CalledProcessError as e:
-            raise UF.CHJProcessErrorInAnalyzer(cmd,e)
-        if result == 0:
-            return
-        else:
-            raise UF.CHJCodeHawkAnalyzerError(cmd,result)
+        self._run_if_changed('taint',cmd,force)
 
-    def create_taint_trail(self,taintindex,silent=False,space=False):
-        os.chdir(self.apppath)
+    def get_taint_trail_cmd(self,taintindex):
         cmd = [ self.config.analyzer, '-summaries', self.jdksummaries,
                     '-taintorigin', str(taintindex) ]
         self.add_dependencies(cmd)
@@ -220,6 +262,10 @@ class AnalysisManager():
         if self.verbose: cmd.append('-verbose')
         if self.dbg: cmd.append('-dbg')
         self.add_jars(cmd)
+        return cmd
+
+    def create_taint_trail(self,taintindex,silent=False,space=False):
+        cmd = self.get_taint_trail_cmd(taintindex)
         if not silent: print('Executing: ' + ' '.join(cmd))
         try:
             stdout = subprocess.DEVNULL if silent else sys.stdout
@@ -30,6 +30,7 @@ import os
 import subprocess
 
 import chj.cmdline.AnalysisManager as AM
+import chj.index.ClassHierarchy as CH
 import chj.util.fileutil as UF
 import chj.util.xmlutil as UX
 
@@ -73,6 +74,12 @@ if __name__ == '__main__':
     if not userclass.has_method(msix):
         userclass.mk_method(methodname,methodsig,msix)
         
+    interfacecnix = app.jd.get_cnix(args.interface)
+    targetcnix = app.jd.get_cnix(args.targetclass)
+    if not (interfacecnix is None or targetcnix is None):
+        if CH.is_declared_subtype(app,targetcnix,interfacecnix) is False:
+            print('Warning: ' + args.targetclass + ' does not implement ' + args.interface)
+
     usermethod = userclass.get_method(msix)
     usermethod.add_interface_restriction(args.interface,args.targetclass)
 
@@ -40,6 +40,8 @@ def parse():
     parser.add_argument('appname',help='name of engagement application')
     parser.add_argument('--verbose',action='store_true',
                             help='show list of classes')
+    parser.add_argument('--force',action='store_true',
+                            help='run the analyzer even if its inputs are unchanged')
     args = parser.parse_args()
     return args
 
@@ -58,7 +60,6 @@ if __name__ == '__main__':
     try:
         UF.check_analyzer()
         (path,jars) = UF.get_engagement_app_jars(args.appname)
-        UF.remove_analysis_dir(path)
     except UF.CHJError as e:
         print(str(e.wrap()))
         exit(1)
@@ -66,13 +67,23 @@ if __name__ == '__main__':
     pkg_excludes = UF.get_engagement_app_excludes(args.appname)
     dependencies = UF.get_engagement_app_dependencies(args.appname)
 
+    am = AM.AnalysisManager(path,jars,platform='ref_8.0_121',
+                                dependencies=dependencies,excludes=pkg_excludes)
+
+    try:
+        if not args.force and am.has_current_results('analyze'):
+            print('Skipping ' + args.appname + ': inputs are unchanged since the last analysis')
+            exit(0)
+        UF.remove_analysis_dir(path)
+    except UF.CHJError as e:
+        print(str(e.wrap()))
+        exit(1)
+
     print('Analyzing: ' + args.appname + ' (' + path + ')')
 
     with timing('numerical analysis'):
         try:
-            am = AM.AnalysisManager(path,jars,platform='ref_8.0_121',
-                                    dependencies=dependencies,excludes=pkg_excludes)
-            am.analyze(False)
+            am.analyze(False,force=args.force)
         except UF.CHJError as e:
             print(str(e.wrap()))
         
@@ -0,0 +1,146 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Parses and analyzes a list of Engagement applications (or all applications
+of a list of engagements), running a bounded number of analyzer processes at
+the same time, largest applications first."""
+
+import argparse
+import os
+import time
+
+from contextlib import contextmanager
+
+import chj.cmdline.AnalysisManager as AM
+import chj.util.fileutil as UF
+import chj.util.jobutil as UJ
+import chj.util.runmetrics as UT
+
+def parse():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('names',nargs='+',
+                            help='names of engagement applications or engagements (e.g., E4)')
+    parser.add_argument('--jobs',type=int,default=1,
+                            help='maximum number of analyzer processes run at the same time')
+    parser.add_argument('--timeout',type=int,help='time limit per application (in seconds)')
+    parser.add_argument('--maxcpu',type=int,help='cpu time limit per application (in seconds)')
+    parser.add_argument('--maxmemory',type=int,help='memory limit per application (in MB)')
+    parser.add_argument('--manifest',
+                            help='file to record results and timings (default: ' +
+                            'chj_analyze_all_manifest.json in the engagements directory)')
+    parser.add_argument('--force',action='store_true',
+                            help='also analyze applications whose inputs are unchanged ' +
+                            'since their last analysis')
+    parser.add_argument('--verbose',action='store_true',help='show list of classes')
+    args = parser.parse_args()
+    return args
+
+@contextmanager
+def timing(activity):
+    t0 = time.time()
+    yield
+    print('\n' + ('=' * 80) + 
+          '\nCompleted ' + activity + ' in ' + str(time.time() - t0) + ' secs' +
+          '\n' + ('=' * 80))
+
+def get_apps(names):
+    """Return [ (appname,methods) ] for the applications named or contained
+    in the engagements named."""
+    engagements = UF.get_engagements_data_file()
+    result = {}
+    for name in names:
+        if name in engagements:
+            apps = engagements[name]['apps']
+            for app in apps: result[app] = apps[app].get('methods',0)
+        else:
+            engg = UF.get_engagement_from_name(name)
+            result[name] = engagements[engg]['apps'][name].get('methods',0)
+    return sorted(result.items(),key=lambda x:(-x[1],x[0]))
+
+def mk_job(appname,args):
+    (path,jars) = UF.get_engagement_app_jars(appname)
+    pkg_excludes = UF.get_engagement_app_excludes(appname)
+    dependencies = UF.get_engagement_app_dependencies(appname)
+    am = AM.AnalysisManager(path,jars,platform='ref_8.0_121',dependencies=dependencies,
+                                excludes=pkg_excludes,verbose=args.verbose)
+    cmd = am.get_analyze_cmd()
+    def job():
+        if not args.force and am.has_current_results('analyze'):
+            return { 'status': 'ok', 'time': 0, 'unchanged': True }
+        UF.remove_analysis_dir(path)
+        if not args.force and am.restore_results('analyze'):
+            return { 'status': 'ok', 'time': 0, 'restored': True }
+        logfilename = os.path.join(UF.get_logsdir(path),'analyze.log')
+        result = UJ.run_job(cmd,path,timeout=args.timeout,maxmemory=args.maxmemory,
+                                maxcpu=args.maxcpu,logfilename=logfilename)
+        UT.record_run(path,{ 'phase': 'analyze', 'start': result['start'], 'wall': result['time'],
+                                 'returncode': result.get('returncode'), 'status': result['status'],
+                                 'user': result.get('user'), 'sys': result.get('sys'),
+                                 'cpu': result.get('cpu'), 'maxrss': result.get('maxrss') })
+        if result['status'] == 'ok': am.record_results('analyze',{})
+        return result
+    return job
+
+if __name__ == '__main__':
+
+    args = parse()
+
+    try:
+        UF.check_analyzer()
+        apps = get_apps(args.names)
+        manifestfilename = args.manifest
+        if manifestfilename is None: manifestfilename = UF.get_analyze_all_manifest_filename()
+    except UF.CHJError as e:
+        print(str(e.wrap()))
+        exit(1)
+
+    manifest = UJ.JobManifest(manifestfilename)
+
+    jobs = []
+    for (appname,methods) in apps:
+        try:
+            jobs.append((appname,mk_job(appname,args)))
+        except UF.CHJError as e:
+            print(str(e.wrap()))
+            manifest.record(appname,{ 'status': 'error', 'error': str(e), 'methods': methods })
+
+    methodcounts = dict(apps)
+    maxlen = max([ len(a) for (a,_) in apps ]) + 2
+
+    def report(appname,result):
+        result['methods'] = methodcounts[appname]
+        manifest.record(appname,result)
+        note = ' (unchanged)' if 'unchanged' in result else ' (restored)' if 'restored' in result else ''
+        print(appname.ljust(maxlen) + str(result['methods']).rjust(10) + '  '
+                  + result['status'].ljust(9) + str(result.get('time','')).rjust(10) + ' secs'
+                  + note)
+
+    with timing('analysis of ' + str(len(jobs)) + ' applications'):
+        UJ.run_jobs(jobs,args.jobs,report)
+
+    summary = manifest.get_summary()
+    print('\n' + ', '.join([ k + ': ' + str(summary[k]) for k in sorted(summary) ]))
+    print('Results recorded in ' + manifestfilename)
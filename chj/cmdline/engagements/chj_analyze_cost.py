@@ -37,6 +37,8 @@ import chj.util.fileutil as UF
 def parse():
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument('appname',help='name of engagement application')
+    parser.add_argument('--force',action='store_true',
+                            help='run the analyzer even if its inputs are unchanged')
     args = parser.parse_args()
     return args
 
@@ -67,7 +69,7 @@ if __name__ == '__main__':
         try:
             am = AM.AnalysisManager(path,jars,platform="ref_8.0_121",
                                     dependencies=dependencies,excludes=pkg_excludes)
-            am.create_cost_model(space=False)
+            am.create_cost_model(space=False,force=args.force)
         except UF.CHJError as e:
             print(str(e.wrap()))
         
@@ -38,6 +38,8 @@ def parse():
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument('appname',help='name of engagement application')
     parser.add_argument('--space',help='analyze for space cost',action='store_true')
+    parser.add_argument('--force',action='store_true',
+                            help='run the analyzer even if its inputs are unchanged')
     args = parser.parse_args()
     return args
 
@@ -67,6 +69,6 @@ if __name__ == '__main__':
         try:
             am = AM.AnalysisManager(path,jars,platform="ref_8.0_121",
                                         dependencies=dependencies,excludes=pkg_excludes)
-            am.create_taint_graphs(space=args.space)
+            am.create_taint_graphs(space=args.space,force=args.force)
         except UF.CHJError as e:
             print(str(e.wrap()))
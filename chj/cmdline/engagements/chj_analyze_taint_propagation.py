@@ -24,20 +24,38 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 # ------------------------------------------------------------------------------
-"""Analyzes taint propagation from a particular taint source."""
+"""Analyzes taint propagation from one or more taint sources.
+
+With multiple origins (or all), the taint trails are generated by a bounded
+pool of analyzer processes; origins whose trail is already present (and newer
+than the analysis results) are skipped, and the outcome of every job is
+recorded in chanalysis/tainttrails_manifest.json, so that an interrupted batch
+can be resumed by rerunning the same command.
+"""
 
 import argparse
+import os
 import time
 
 from contextlib import contextmanager
 
 import chj.cmdline.AnalysisManager as AM
 import chj.util.fileutil as UF
+import chj.util.jobutil as UJ
+
+from chj.index.AppAccess import AppAccess
 
 def parse():
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument('appname',help='name of engagement application')
-    parser.add_argument('origin',type=int,help='index of taint origin of interest')
+    parser.add_argument('origins',nargs='+',
+                            help='indices of taint origins of interest, or all')
+    parser.add_argument('--jobs',type=int,default=1,
+                            help='maximum number of analyzer processes run at the same time')
+    parser.add_argument('--timeout',type=int,help='time limit per origin (in seconds)')
+    parser.add_argument('--maxmemory',type=int,help='memory limit per origin (in MB)')
+    parser.add_argument('--force',action='store_true',
+                            help='regenerate trails that are already present')
     args = parser.parse_args()
     return args
 
@@ -49,6 +67,25 @@ def timing(activity):
           '\nCompleted ' + activity + ' in ' + str(time.time() - t0) + ' secs' +
           '\n' + ('=' * 80))
 
+def get_origins(path,origins):
+    if 'all' in origins:
+        app = AppAccess(path)
+        if app.jd.ttd is None: return []
+        return sorted(o.index for o in app.jd.ttd.get_taint_origins())
+    result = []
+    for o in origins:
+        if not o.isdigit():
+            print('Taint origin should be an index or all: ' + o)
+            exit(1)
+        result.append(int(o))
+    return result
+
+def has_current_trail(path,origin):
+    """Return true if the trail exists and is newer than the analysis results."""
+    trailfp = UF.get_file_fingerprint(UF.get_data_taint_trail_filename(path,origin))
+    dictfp = UF.get_file_fingerprint(UF.get_datadictionary_filename(path))
+    return (not trailfp is None) and (dictfp is None or trailfp[1] >= dictfp[1])
+
 if __name__ == '__main__':
 
     args = parse()
@@ -65,8 +102,49 @@ if __name__ == '__main__':
 
     am = AM.AnalysisManager(path,jars,dependencies=dependencies,excludes=pkg_excludes)
 
-    with timing('taint propagation analysis'):
-        try:
-            am.create_taint_trail(args.origin)
-        except UF.CHJError as e:
-            print(str(e.wrap()))
+    manifest = UJ.JobManifest(UF.get_taint_trails_manifest_filename(path))
+
+    # a trail left by a job that failed or timed out may be incomplete
+    origins = get_origins(path,args.origins)
+    todo = [ o for o in origins if args.force or not has_current_trail(path,o)
+                 or not manifest.get_status(o) in [ None, 'ok' ] ]
+    for o in origins:
+        if not o in todo: print('Skipping origin ' + str(o) + ': trail is present')
+
+    if len(todo) == 1 and args.jobs == 1 and args.timeout is None and args.maxmemory is None:
+        with timing('taint propagation analysis'):
+            try:
+                am.create_taint_trail(todo[0])
+            except UF.CHJError as e:
+                print(str(e.wrap()))
+        exit(0)
+
+    if len(todo) == 0: exit(0)
+
+    logsdir = UF.get_logsdir(path)
+
+    def mk_job(origin):
+        cmd = am.get_taint_trail_cmd(origin)
+        def job():
+            return UJ.run_job(cmd,path,timeout=args.timeout,
+                                  maxmemory=args.maxmemory,
+                                  logfilename=os.path.join(logsdir,'tainttrail_' + str(origin) + '.log'))
+        return (origin,job)
+
+    def report(origin,result):
+        manifest.record(origin,result)
+        print(str(origin).rjust(6) + '  ' + result['status'].ljust(8)
+                  + str(result.get('time','')).rjust(10) + ' secs')
+
+    try:
+        jobs = [ mk_job(o) for o in todo ]
+    except UF.CHJError as e:
+        print(str(e.wrap()))
+        exit(1)
+
+    with timing('taint propagation analysis of ' + str(len(todo)) + ' origins'):
+        UJ.run_jobs(jobs,args.jobs,report)
+
+    summary = manifest.get_summary()
+    print('Manifest: ' + UF.get_taint_trails_manifest_filename(path))
+    print(', '.join(k + ': ' + str(v) for (k,v) in sorted(summary.items())))
@@ -0,0 +1,113 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Compares the latency of in-process cfg layout with the graphviz (dot) subprocess."""
+
+import argparse
+import time
+
+import chj.util.fileutil as UF
+import chj.util.svgutil as UG
+
+from chj.index.AppAccess import AppAccess
+
+def parse():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('appname',help='name of engagement application')
+    parser.add_argument('--cmsixs',nargs='*',type=int,
+                            help='indices of methods to lay out (default: all application methods)')
+    parser.add_argument('--maxmethods',type=int,default=100,
+                            help='maximum number of methods to lay out')
+    parser.add_argument('--nographviz',action='store_true',
+                            help='only time the in-process layout')
+    args = parser.parse_args()
+    return args
+
+def time_native(cfg):
+    t0 = time.time()
+    cfg.as_svg()
+    return time.time() - t0
+
+def time_graphviz(app,cfg):
+    t0 = time.time()
+    (nodes,dotgraph) = cfg.as_dot()
+    svggraph = UG.get_svg(app.path,dotgraph)
+    UG.append_pcs(svggraph,nodes)
+    UG.append_loop_levels(svggraph,cfg.get_loop_level_counts())
+    return time.time() - t0
+
+def summary(name,times):
+    if len(times) == 0: return name.ljust(12) + 'no data'
+    stimes = sorted(times)
+    return (name.ljust(12)
+                + '{:10.4f}'.format(sum(stimes))
+                + '{:10.4f}'.format(sum(stimes) / len(stimes))
+                + '{:10.4f}'.format(stimes[len(stimes) // 2])
+                + '{:10.4f}'.format(stimes[-1]))
+
+if __name__ == '__main__':
+
+    args = parse()
+
+    try:
+        (path,_) = UF.get_engagement_app_jars(args.appname)
+        UF.check_analysisdir(path)
+    except UF.CHJError as e:
+        print(str(e.wrap()))
+        exit(1)
+
+    app = AppAccess(path)
+
+    if args.cmsixs is None:
+        cmsixs = [ cmsix for (cmsix,m) in app.get_methods() if not m.is_abstract() ]
+    else:
+        cmsixs = args.cmsixs
+    cmsixs = cmsixs[:args.maxmethods]
+
+    nativetimes = []
+    graphviztimes = []
+    print('cmsix'.rjust(8) + 'blocks'.rjust(8) + 'native'.rjust(12) + 'graphviz'.rjust(12))
+    print('-' * 40)
+    for cmsix in cmsixs:
+        cfg = app.get_method(cmsix).get_cfg()
+        if cfg is None: continue
+        tnative = time_native(cfg)
+        nativetimes.append(tnative)
+        if args.nographviz:
+            pgraphviz = ''
+        else:
+            tgraphviz = time_graphviz(app,cfg)
+            graphviztimes.append(tgraphviz)
+            pgraphviz = '{:12.4f}'.format(tgraphviz)
+        print(str(cmsix).rjust(8) + str(len(cfg.blocks)).rjust(8)
+                  + '{:12.4f}'.format(tnative) + pgraphviz)
+
+    print('\n' + 'secs'.ljust(12) + 'total'.rjust(10) + 'mean'.rjust(10)
+              + 'median'.rjust(10) + 'max'.rjust(10))
+    print('-' * 52)
+    print(summary('native',nativetimes))
+    if not args.nographviz:
+        print(summary('graphviz',graphviztimes))
@@ -0,0 +1,137 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Produces the reports on loaded strings, static field accesses, object field
+accesses, objects created, reflective calls, and (optionally) calls to named
+methods in a single pass over the instructions of the application."""
+
+import argparse
+import multiprocessing
+import os
+import time
+
+from contextlib import contextmanager
+
+import chj.util.fileutil as UF
+import chj.util.printutil as UP
+import chj.util.reportcache as UR
+
+from chj.app.InstructionVisitor import InstructionVisitorEngine
+from chj.index.AppAccess import AppAccess
+from chj.reporting.InstructionReports import LoadedStringsVisitor
+from chj.reporting.InstructionReports import NamedCallsVisitor, reflective_names
+from chj.reporting.InstructionReports import ObjectsCreatedVisitor
+from chj.reporting.ObjectFields import ObjectFields, get_object_field_visitor
+from chj.reporting.ObjectsCreated import ObjectsCreated
+from chj.reporting.StaticFields import StaticFields, get_static_field_visitor
+
+def parse():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('appname',help='name of engagement application')
+    parser.add_argument('--names',nargs='*',default=[],
+                            help='also report calls to methods with these names')
+    parser.add_argument('--jobs',type=int,default=1,
+                            help='number of processes to divide the classes over ' +
+                            '(default: 1; max: ' + str(multiprocessing.cpu_count()) + ')')
+    parser.add_argument('--save',help='save reports to chreports directory',action='store_true')
+    parser.add_argument('--nocache',help='recompute the reports instead of using the cached results',
+                            action='store_true')
+    args = parser.parse_args()
+    return args
+
+@contextmanager
+def timing(activity):
+    t0 = time.time()
+    yield
+    print('\n' + ('=' * 80) + 
+          '\nCompleted ' + activity + ' in ' + str(time.time() - t0) + ' secs' +
+          '\n' + ('=' * 80))
+
+if __name__ == '__main__':
+
+    args = parse()
+
+    try:
+        (path,_) = UF.get_engagement_app_jars(args.appname)
+        UF.check_analysisdir(path)
+    except UF.CHJError as e:
+        print(str(e.wrap()))
+        exit(1)
+
+    # (title, filename, cache name, cache arguments, report); the report
+    # functions refer to the visitors below, which are only run when at
+    # least one of the reports is not available in the cache
+    reports = [
+        ('Loaded strings','loaded_strings_report.txt',
+             'loaded_strings',{ 'substring': None },
+             lambda:loadedstrings.to_string(app)),
+        ('Static Field Accesses','static_fields_report.txt','static_fields',{},
+             lambda:StaticFields(app,staticfields).to_string()),
+        ('Object Field Accesses','object_field_access_report.txt','object_fields',{},
+             lambda:ObjectFields(app,objectfields).to_string()),
+        ('Objects Created','objects_created_report.txt','objects_created',{},
+             lambda:ObjectsCreated(app,objectscreated).to_string()),
+        ('Reflective method calls','reflective_calls_report.txt','reflective_calls',{},
+             lambda:calls.to_string(app,reflective_names,loopdepth=False)) ]
+    for name in args.names:
+        reports.append(('Named method calls to ' + name,'method_calls_to_' + name + '.txt',
+                            'named_calls',{ 'name': name },
+                            (lambda name:lambda:calls.to_string(app,[ name ]))(name)))
+
+    missing = [ r for r in reports
+                    if args.nocache or not UR.has_current_report(path,r[2],r[3],[ 'analysis' ]) ]
+    if len(missing) > 0:
+        app = AppAccess(path)
+
+        engine = InstructionVisitorEngine(app)
+        loadedstrings = engine.register(LoadedStringsVisitor())
+        staticfields = engine.register(get_static_field_visitor())
+        objectfields = engine.register(get_object_field_visitor())
+        objectscreated = engine.register(ObjectsCreatedVisitor())
+        calls = engine.register(NamedCallsVisitor(reflective_names + args.names))
+
+        with timing('visiting all instructions'):
+            engine.run(jobs=args.jobs)
+
+    if args.save:
+        reportsdir = UF.get_engagement_reports_dir(path)
+        if reportsdir is None:
+            print('*' * 80)
+            print('Unable to create reports directory')
+            print('*' * 80)
+            exit(1)
+
+    for (title,filename,name,reportargs,report) in reports:
+        lines = []
+        lines.append(UP.reportheader(title,args.appname))
+        lines.append(UR.get_report(path,name,reportargs,[ 'analysis' ],report,
+                                       refresh=args.nocache))
+        if args.save:
+            with open(os.path.join(reportsdir,filename),'w') as fp:
+                fp.write('\n'.join(lines))
+            print('Saved ' + title.lower() + ' in ' + filename)
+        else:
+            print('\n'.join(lines))
@@ -0,0 +1,77 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Lists or purges the cached report results of an application."""
+
+import argparse
+
+import chj.util.fileutil as UF
+import chj.util.reportcache as UR
+
+def parse():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('appname',help='name of engagement application')
+    parser.add_argument('--purge',help='remove the cached reports',action='store_true')
+    parser.add_argument('--stale',help='only purge the reports whose inputs have changed',
+                            action='store_true')
+    parser.add_argument('--report',help='only list or purge the cached results of this report')
+    args = parser.parse_args()
+    return args
+
+if __name__ == '__main__':
+
+    args = parse()
+    try:
+        (path,_) = UF.get_engagement_app_jars(args.appname)
+        UF.check_analysisdir(path)
+    except UF.CHJError as e:
+        print(str(e.wrap()))
+        exit(1)
+
+    if args.purge:
+        count = UR.purge_reports(path,report=args.report,staleonly=args.stale)
+        print('Removed ' + str(count) + ' cached report(s)')
+        exit(0)
+
+    cachedreports = [ r for r in UR.get_cached_reports(path)
+                          if args.report is None or r[1] == args.report ]
+    if len(cachedreports) == 0:
+        print('No cached reports')
+        exit(0)
+    totalsize = 0
+    print('status   created               size  report')
+    print('-' * 80)
+    for (filename,report,reportargs,created,size,current) in cachedreports:
+        totalsize += size
+        if report is None:
+            print('invalid  ' + ' '.ljust(19) + str(size).rjust(8) + '  ' + filename)
+            continue
+        status = 'current' if current else 'stale'
+        argstr = ', '.join([ k + '=' + str(reportargs[k]) for k in sorted(reportargs) ])
+        print(status.ljust(9) + created + str(size).rjust(8) + '  ' + report
+                  + ('' if argstr == '' else ' (' + argstr + ')'))
+    print('-' * 80)
+    print('Total: ' + str(len(cachedreports)) + ' cached report(s), ' + str(totalsize) + ' bytes')
@@ -0,0 +1,134 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Compares the cost models of two analysis runs by their fingerprints.
+
+Save the fingerprints of the current cost results with --save NAME (e.g.,
+before re-running chj_analyze_cost after a change), and compare a saved run
+with the current results (or with another saved run) with --old NAME.
+"""
+
+import argparse
+import time
+
+from contextlib import contextmanager
+
+import chj.util.fileutil as UF
+import chj.util.printutil as UP
+import chj.cost.CostFingerprints as CF
+
+from chj.index.AppAccess import AppAccess
+
+def parse():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('appname',help='name of engagement application')
+    parser.add_argument('--save',metavar='NAME',
+                            help='save the fingerprints of the current cost results as NAME')
+    parser.add_argument('--old',metavar='NAME',help='saved run to compare')
+    parser.add_argument('--new',metavar='NAME',
+                            help='saved run to compare with (default: current cost results)')
+    parser.add_argument('--list',help='list the saved runs',action='store_true')
+    args = parser.parse_args()
+    return args
+
+@contextmanager
+def timing(activity):
+    t0 = time.time()
+    yield
+    print('\n' + ('=' * 80) + 
+          '\nCompleted ' + activity + ' in ' + str(time.time() - t0) + ' secs' +
+          '\n' + ('=' * 80))
+
+def cost_string(e):
+    if e[CF.LB] is None: return e[CF.KIND]
+    if e[CF.LB] == e[CF.UB]: return str(e[CF.LB])
+    return '[' + str(e[CF.LB]) + ' ; ' + str(e[CF.UB]) + ']'
+
+def diff_string(old,new):
+    (added,removed,changed) = CF.diff_cost_fingerprints(old,new)
+    lines = []
+    lines.append('Methods: ' + str(len(old)) + ' -> ' + str(len(new)))
+    lines.append('  changed: ' + str(len(changed)))
+    lines.append('  added  : ' + str(len(added)))
+    lines.append('  removed: ' + str(len(removed)))
+    if len(changed) > 0:
+        def key(c):
+            delta = CF.get_cost_delta(c[2],c[3])
+            return (delta is None, -abs(delta) if not delta is None else 0, c[0])
+        lines.append('\nChanged methods (by size of cost change)')
+        lines.append('-' * 80)
+        for (name,diffs,o,n) in sorted(changed,key=key):
+            delta = CF.get_cost_delta(o,n)
+            deltastr = '' if delta is None else ('+' if delta > 0 else '') + str(delta)
+            lines.append(deltastr.rjust(10) + '  ' + cost_string(o) + ' -> ' + cost_string(n)
+                             + '  (' + ','.join(diffs) + ')  ' + name)
+    if len(added) > 0:
+        lines.append('\nAdded methods')
+        lines.append('-' * 80)
+        for name in added:
+            lines.append('  ' + cost_string(new[name]).rjust(20) + '  ' + name)
+    if len(removed) > 0:
+        lines.append('\nRemoved methods')
+        lines.append('-' * 80)
+        for name in removed:
+            lines.append('  ' + cost_string(old[name]).rjust(20) + '  ' + name)
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+
+    args = parse()
+
+    try:
+        (path,_) = UF.get_engagement_app_jars(args.appname)
+        UF.check_analysisdir(path)
+    except UF.CHJError as e:
+        print(str(e.wrap()))
+        exit(1)
+
+    if args.list:
+        for name in CF.get_run_names(path): print(name)
+        exit(0)
+
+    current = None
+    if (not args.save is None) or (args.new is None and not args.old is None):
+        app = AppAccess(path)
+        with timing('computing cost fingerprints'):
+            current = CF.compute_cost_fingerprints(app)
+
+    if not args.save is None:
+        filename = CF.save_cost_fingerprints(path,args.save,current)
+        print('Saved fingerprints of ' + str(len(current)) + ' methods in ' + filename)
+
+    if not args.old is None:
+        try:
+            old = CF.load_cost_fingerprints(path,args.old)
+            new = current if args.new is None else CF.load_cost_fingerprints(path,args.new)
+        except UF.CHJError as e:
+            print(str(e.wrap()))
+            exit(1)
+        newname = 'current' if args.new is None else args.new
+        print(UP.reportheader('Cost model diff ' + args.old + ' -> ' + newname,args.appname))
+        print(diff_string(old,new))
@@ -0,0 +1,127 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Evaluates the lower and upper cost bounds of all methods over a grid of
+values of the symbolic constants (e.g., loop bounds, input sizes) they depend on.
+
+All cost bounds are compiled once and evaluated for all points in one
+vectorized pass. Requires numpy.
+"""
+
+import argparse
+import csv
+import sys
+import time
+
+from contextlib import contextmanager
+
+import numpy as np
+
+import chj.util.fileutil as UF
+
+from chj.index.AppAccess import AppAccess
+
+def parse():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('appname',help='name of engagement application')
+    parser.add_argument('--list',help='list the symbolic constants the costs depend on',
+                            action='store_true')
+    parser.add_argument('--range',action='append',default=[],metavar='NAME=START:STOP:NUM',
+                            help='evaluate for NUM evenly spaced values from START to STOP')
+    parser.add_argument('--values',action='append',default=[],metavar='NAME=V1,V2,...',
+                            help='evaluate for the given values')
+    parser.add_argument('--cmsixs',nargs='*',type=int,help='only evaluate these methods')
+    parser.add_argument('--output',help='name of csv file to write (default: stdout)')
+    args = parser.parse_args()
+    return args
+
+@contextmanager
+def timing(activity):
+    t0 = time.time()
+    yield
+    print('\n' + ('=' * 80) + 
+          '\nCompleted ' + activity + ' in ' + str(time.time() - t0) + ' secs' +
+          '\n' + ('=' * 80),file=sys.stderr)
+
+def get_axes(args):
+    """Return a list of (name,values) for the parameters of the sweep."""
+    axes = []
+    try:
+        for r in args.range:
+            (name,spec) = r.split('=',1)
+            (start,stop,num) = spec.split(':')
+            axes.append((name,np.linspace(float(start),float(stop),int(num))))
+        for v in args.values:
+            (name,spec) = v.split('=',1)
+            axes.append((name,np.array([ float(x) for x in spec.split(',') ])))
+    except ValueError:
+        print('Parameters should be given as NAME=START:STOP:NUM or NAME=V1,V2,...')
+        exit(1)
+    return axes
+
+if __name__ == '__main__':
+
+    args = parse()
+
+    try:
+        (path,_) = UF.get_engagement_app_jars(args.appname)
+        UF.check_analysisdir(path)
+    except UF.CHJError as e:
+        print(str(e.wrap()))
+        exit(1)
+
+    app = AppAccess(path)
+    costmodel = app.get_costmodel()
+
+    if args.list:
+        for name in costmodel.get_cost_symbol_names(): print(name)
+        exit(0)
+
+    axes = get_axes(args)
+    names = [ name for (name,_) in axes ]
+    if len(axes) > 0:
+        grid = np.meshgrid(*[ values for (_,values) in axes ],indexing='ij')
+        values = dict(zip(names,[ g.ravel() for g in grid ]))
+        npoints = grid[0].size
+    else:
+        values = {}
+        npoints = 1
+
+    with timing('evaluating method costs at ' + str(npoints) + ' points'):
+        costs = costmodel.evaluate_method_costs(values,cmsixs=args.cmsixs)
+
+    fp = open(args.output,'w',newline='') if not args.output is None else sys.stdout
+    writer = csv.writer(fp)
+    writer.writerow([ 'cmsix', 'method' ] + names + [ 'lb', 'ub' ])
+    for cmsix in sorted(costs):
+        (lbs,ubs) = costs[cmsix]
+        lbs = np.broadcast_to(lbs,(npoints,))
+        ubs = np.broadcast_to(ubs,(npoints,))
+        mname = str(app.jd.get_cms(cmsix))
+        for i in range(npoints):
+            writer.writerow([ cmsix, mname ] + [ values[n][i] for n in names ]
+                                + [ lbs[i], ubs[i] ])
+    if not args.output is None: fp.close()
@@ -27,12 +27,14 @@
 """Reports the cpu time cost of methods annd loops."""
 
 import argparse
+import os
 import time
 
 from contextlib import contextmanager
 
 import chj.util.printutil as UP
 import chj.util.fileutil as UF
+import chj.util.reportcache as UR
 
 from chj.index.AppAccess import AppAccess
 from chj.reporting.CostSummary import CostSummary
@@ -45,6 +47,8 @@ def parse():
     parser.add_argument('--save',help='save report to chreports directory',action='store_true')
     parser.add_argument('--namerestriction',nargs='*',
                             help='only report functions that contain these as substrings')
+    parser.add_argument('--nocache',help='recompute the report instead of using the cached result',
+                            action='store_true')
     args = parser.parse_args()
     return args
 
@@ -67,9 +71,6 @@ if __name__ == '__main__':
         print(str(e.wrap()))
         exit(1)
 
-    app = AppAccess(path)
-    costreport = CostSummary(app)
-
     if not args.namerestriction is None:
         def namefilter(name):
             for n in args.namerestriction:
@@ -83,11 +84,20 @@ if __name__ == '__main__':
     headername = args.appname
     lines.append(UP.reportheader('Cost Model Summary',headername))
 
+    def report():
+        costreport = CostSummary(AppAccess(path))
+        result = []
+        result.append(costreport.to_string(namefilter=namefilter))
+        result.append(costreport.to_side_channels_string())
+        if args.verbose: result.append(costreport.to_verbose_string(namefilter=namefilter))
+        if args.loops: result.append(costreport.to_loop_bounds_string())
+        return '\n'.join(result)
+
+    reportargs = { 'verbose': args.verbose, 'loops': args.loops,
+                       'namerestriction': args.namerestriction }
     with timing('Print cost report'):
-        lines.append(costreport.to_string(namefilter=namefilter))
-        lines.append(costreport.to_side_channels_string())
-        if args.verbose: lines.append(costreport.to_verbose_string(namefilter=namefilter))
-        if args.loops: lines.append(costreport.to_loop_bounds_string())
+        lines.append(UR.get_report(path,'costmodel',reportargs,[ 'analysis', 'cost', 'userdata' ],
+                                       report,refresh=args.nocache))
 
     if args.save:
         reportsdir = UF.get_engagement_reports_dir(path)
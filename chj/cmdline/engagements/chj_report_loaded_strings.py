@@ -27,17 +27,23 @@
 """Reports the literal strings loaded by the engagement application."""
 
 import argparse
+import os
 
 import chj.util.printutil as UP
 import chj.util.fileutil as UF
+import chj.util.reportcache as UR
 
+from chj.app.InstructionVisitor import InstructionVisitorEngine
 from chj.index.AppAccess import AppAccess
+from chj.reporting.InstructionReports import LoadedStringsVisitor
 
 def parse():
     parser = argparse.ArgumentParser()
     parser.add_argument('appname',help='name of engagement application')
     parser.add_argument('--substring',help='must include this substring')
     parser.add_argument('--save',help='save report to chreports directory',action='store_true')
+    parser.add_argument('--nocache',help='recompute the report instead of using the cached result',
+                            action='store_true')
     args = parser.parse_args()
     return args
 
@@ -52,19 +58,19 @@ if __name__ == '__main__':
         print(str(e.wrap()))
         exit(1)
 
-    app = AppAccess(path)
-    
-    results = app.get_loaded_strings(substring=args.substring)
+    def report():
+        app = AppAccess(path)
+        engine = InstructionVisitorEngine(app)
+        visitor = engine.register(LoadedStringsVisitor(substring=args.substring))
+        engine.run()
+        return visitor.to_string(app)
 
     lines = []
     headername = args.appname
     lines.append(UP.reportheader('Loaded strings',headername))
     print('-' * 80)
-    for (cmsix,methodresults) in sorted(results):
-        if len(methodresults) == 0: continue
-        lines.append('\n' + str(app.jd.get_cms(cmsix).get_aqname()))
-        for (pc,instr) in sorted(methodresults):
-            lines.append((str(pc).rjust(4) + '  ' + str(instr)))
+    lines.append(UR.get_report(path,'loaded_strings',{ 'substring': args.substring },
+                                   [ 'analysis' ],report,refresh=args.nocache))
 
     if args.save:
         reportsdir = UF.get_engagement_reports_dir(path)
@@ -26,17 +26,23 @@
 # ------------------------------------------------------------------------------
 
 import argparse
+import os
 
 import chj.util.fileutil as UF
+import chj.util.reportcache as UR
 import chj.util.printutil as UP
 
+from chj.app.InstructionVisitor import InstructionVisitorEngine
 from chj.index.AppAccess import AppAccess
+from chj.reporting.InstructionReports import NamedCallsVisitor
 
 def parse():
     parser = argparse.ArgumentParser()
     parser.add_argument('appname',help='name of engagement application')
     parser.add_argument('name',help='name or fragment of name of the method')
     parser.add_argument('--save',help='save report to chreports directory',action='store_true')
+    parser.add_argument('--nocache',help='recompute the report instead of using the cached result',
+                            action='store_true')
     args = parser.parse_args()
     return args
 
@@ -51,24 +57,18 @@ if __name__ == '__main__':
         print(str(e.wrap()))
         exit(1)
 
-    app = AppAccess(path)
+    def report():
+        app = AppAccess(path)
+        engine = InstructionVisitorEngine(app)
+        visitor = engine.register(NamedCallsVisitor([ args.name ]))
+        engine.run()
+        return visitor.to_string(app,[ args.name ])
 
     lines = []
     headername = args.appname
     lines.append(UP.reportheader('Named method calls to ' + args.name,headername))
-
-    results = []
-    def f(cmsix,m):
-        results.append((cmsix,m.get_named_method_calls(args.name)))
-    app.iter_methods(f)
-
-    for (cmsix,mmethodcalls) in results:
-        if len(mmethodcalls) > 0:
-            lines.append('\n'+ app.jd.get_cms(cmsix).get_aqname())
-            for (pc,i) in mmethodcalls:
-                loopdepth = i.get_loop_depth()
-                loopdepth = 'L' + str(loopdepth) if loopdepth > 0 else '  '
-                lines.append(str(pc).rjust(6) + '  ' + loopdepth + '  ' + str(i))
+    lines.append(UR.get_report(path,'named_calls',{ 'name': args.name },[ 'analysis' ],report,
+                                   refresh=args.nocache))
 
     if args.save:
         reportsdir = UF.get_engagement_reports_dir(path)
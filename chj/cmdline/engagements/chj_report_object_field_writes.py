@@ -26,8 +26,10 @@
 # ------------------------------------------------------------------------------
 
 import argparse
+import os
 
 import chj.util.fileutil as UF
+import chj.util.reportcache as UR
 import chj.util.printutil as UP
 import chj.reporting.ObjectFields as RPO
 
@@ -38,6 +40,8 @@ def parse():
     parser = argparse.ArgumentParser()
     parser.add_argument('appname',help='name of engagement application')
     parser.add_argument('--save',help='save report to chreports directory',action='store_true')
+    parser.add_argument('--nocache',help='recompute the report instead of using the cached result',
+                            action='store_true')
     args = parser.parse_args()
     return args
 
@@ -52,12 +56,13 @@ if __name__ == '__main__':
         print(str(e.wrap()))
         exit(1)
 
-    app = AppAccess(path)
+    def report():
+        return RPO.ObjectFields(AppAccess(path)).to_string()
 
     lines = []
     headername = args.appname
     lines.append(UP.reportheader('Object Field Accesses',headername))
-    lines.append(RPO.ObjectFields(app).to_string())
+    lines.append(UR.get_report(path,'object_fields',{},[ 'analysis' ],report,refresh=args.nocache))
 
     if args.save:
         reportsdir = UF.get_engagement_reports_dir(path)
@@ -27,6 +27,7 @@
 """Reports the size in bytes of objects used in an engagement application."""
 
 import argparse
+import os
 
 import chj.util.fileutil as UF
 import chj.util.printutil as UP
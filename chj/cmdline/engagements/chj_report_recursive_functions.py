@@ -26,6 +26,7 @@
 # ------------------------------------------------------------------------------
 
 import argparse
+import os
 
 import chj.util.fileutil as UF
 
@@ -62,7 +63,7 @@ if __name__ == '__main__':
             print('Unable to create reports directory')
             print('*' * 80)
             exit(1)
-        filename = os.path.join(reportsdir,'cost_model_report.txt')
+        filename = os.path.join(reportsdir,'recursion_report.txt')
         with open(filename,'w') as fp:
             fp.write(recursionstring)
     else:
@@ -26,34 +26,25 @@
 # ------------------------------------------------------------------------------
 
 import argparse
+import os
 
 import chj.util.fileutil as UF
+import chj.util.reportcache as UR
 import chj.util.printutil as UP
 
+from chj.app.InstructionVisitor import InstructionVisitorEngine
 from chj.index.AppAccess import AppAccess
+from chj.reporting.InstructionReports import NamedCallsVisitor, reflective_names
 
 def parse():
     parser = argparse.ArgumentParser()
     parser.add_argument('appname',help='name of engagement application')
     parser.add_argument('--save',help='save report to chreports directory',action='store_true')
+    parser.add_argument('--nocache',help='recompute the report instead of using the cached result',
+                            action='store_true')
     args = parser.parse_args()
     return args
 
-
-reflective_names = [
-    "forName",
-    "getDeclaredClassed",
-    "getDeclaredConstructors",
-    "getDeclaredField",
-    "getDeclaredFields",
-    "getDeclaredMethod",
-    "getDeclaredMethods",
-    "getField",
-    "getFields",
-    "getMethod",
-    "getMethods"
-    ]
-    
 if __name__ == '__main__':
 
     args = parse()
@@ -65,23 +56,18 @@ if __name__ == '__main__':
         print(str(e.wrap()))
         exit(1)
 
-    app = AppAccess(path)
+    def report():
+        app = AppAccess(path)
+        engine = InstructionVisitorEngine(app)
+        visitor = engine.register(NamedCallsVisitor(reflective_names))
+        engine.run()
+        return visitor.to_string(app,reflective_names,loopdepth=False)
 
     lines = []
     headername = args.appname
     lines.append(UP.reportheader('Reflective method calls',headername))
-
-    results = []
-    def f(cmsix,m):
-        for n in reflective_names:
-            results.append((cmsix,m.get_named_method_calls(n)))
-    app.iter_methods(f)
-
-    for (cmsix,mmethodcalls) in results:
-        if len(mmethodcalls) > 0:
-            lines.append('\n'+ app.jd.get_cms(cmsix).get_aqname())
-            for (pc,i) in mmethodcalls:
-                lines.append(str(pc).rjust(6) + '  ' + str(i))
+    lines.append(UR.get_report(path,'reflective_calls',{},[ 'analysis' ],report,
+                                   refresh=args.nocache))
 
     if args.save:
         reportsdir = UF.get_engagement_reports_dir(path)
@@ -90,7 +76,7 @@ if __name__ == '__main__':
             print('Unable to create reports directory')
             print('*' * 80)
             exit(1)
-        filename = 'method_calls_to_' + args.name + '.txt'
+        filename = 'reflective_calls_report.txt'
         filename = os.path.join(reportsdir,filename)
         with open(filename,'w') as fp:
             fp.write('\n'.join(lines))
@@ -0,0 +1,192 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Reports for every taint origin with a taint trail how many loop counters,
+conditionals, calls, and methods it reaches.
+
+All available trail files (generated by chj_analyze_taint_propagation) are
+loaded in parallel; the sets of nodes reached are kept as bitsets over the
+taint nodes of the application (the impact matrix).
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+import chj.util.fileutil as UF
+import chj.util.printutil as UP
+import chj.index.TaintTrail as TT
+
+from chj.index.AppAccess import AppAccess
+
+columns = [ 'lc', 'conditionals', 'calls', 'methods', 'nodes' ]
+
+def parse():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('appname',help='name of engagement application')
+    parser.add_argument('--jobs',type=int,default=multiprocessing.cpu_count(),
+                            help='number of processes used to load the trails')
+    parser.add_argument('--sort',choices=columns,default='lc',
+                            help='column to rank the origins by')
+    parser.add_argument('--save',help='save report (csv, json, and the impact matrix) ' +
+                            'to chreports directory',action='store_true')
+    args = parser.parse_args()
+    return args
+
+def get_trail_ids(path):
+    result = []
+    for f in UF.list_data_taint_trail_filenames(path):
+        id = f[len('tainttrails_'):-len('.xml')]
+        if id.isdigit(): result.append(int(id))
+    return sorted(result)
+
+# set in the parent before the pool is forked
+apppath = None
+
+def load_reached_nodes(id):
+    """Return (id,ids of the nodes reached from the root of the trail,error)."""
+    try:
+        fingerprint = TT.get_fingerprint(apppath,id)
+        trail = TT.load_taint_trail(UF.get_taint_trail_cache_filename(apppath,id),fingerprint)
+        if trail is None:
+            trail = TT.read_taint_trail(apppath,id)
+        root = trail.get_root()
+        if root is None:
+            return (id,trail.nodeids,None)
+        return (id,trail.nodeids[trail.get_reachable([ root ])],None)
+    except Exception as e:
+        return (id,None,str(e))
+
+def to_bitset(mask): return int.from_bytes(np.packbits(mask,bitorder='little').tobytes(),'little')
+
+def popcount(x): return bin(x).count('1')
+
+if __name__ == '__main__':
+
+    args = parse()
+    try:
+        (path,_) = UF.get_engagement_app_jars(args.appname)
+        UF.check_analysisdir(path)
+    except UF.CHJError as e:
+        print(str(e.wrap()))
+        exit(1)
+
+    app = AppAccess(path)
+    apppath = path
+    ids = get_trail_ids(path)
+    if len(ids) == 0:
+        print('*' * 80)
+        print('No taint trails found; run chj_analyze_taint_propagation first')
+        print('*' * 80)
+        exit(1)
+
+    # kinds and methods of all taint nodes of the application
+    nodekinds = {}
+    nodecallers = {}
+    def f(ix,n):
+        nodekinds[ix] = TT.get_node_kind(n)
+        cmsix = n.get_caller_index()
+        nodecallers[ix] = -1 if cmsix is None else cmsix
+    app.jd.ttd.iter_taint_node_types(f)
+    size = max(nodekinds) + 1 if len(nodekinds) > 0 else 1
+    kinds = np.zeros(size,dtype=np.int64)
+    callers = np.full(size,-1,dtype=np.int64)
+    kinds[list(nodekinds.keys())] = list(nodekinds.values())
+    callers[list(nodecallers.keys())] = list(nodecallers.values())
+    kindmasks = {
+        'lc': to_bitset((kinds & TT.KIND_LC) > 0),
+        'conditionals': to_bitset((kinds & TT.KIND_CONDITIONAL) > 0),
+        'calls': to_bitset((kinds & TT.KIND_CALL) > 0) }
+
+    t0 = time.time()
+    context = multiprocessing.get_context('fork')
+    with context.Pool(processes=max(1,args.jobs)) as pool:
+        loaded = pool.map(load_reached_nodes,ids,chunksize=1)
+    print('Loaded ' + str(len(ids)) + ' trails in ' + str(round(time.time() - t0,2)) + ' secs')
+
+    results = []
+    matrix = []
+    origins = []
+    for (id,reached,error) in loaded:
+        if reached is None:
+            print('Unable to load trail ' + str(id) + ': ' + str(error))
+            continue
+        reached = reached[reached < size]
+        mask = np.zeros(size,dtype=bool)
+        mask[reached] = True
+        bits = to_bitset(mask)
+        result = {}
+        result['id'] = id
+        result['origin'] = str(app.jd.ttd.get_taint_origin(id))
+        result['nodes'] = popcount(bits)
+        for (k,m) in kindmasks.items(): result[k] = popcount(bits & m)
+        methods = callers[mask]
+        result['methods'] = len(np.unique(methods[methods >= 0]))
+        results.append(result)
+        matrix.append(np.packbits(mask,bitorder='little'))
+        origins.append(id)
+
+    results = sorted(results,key=lambda r:(-r[args.sort],r['id']))
+
+    lines = []
+    lines.append(UP.reportheader('Taint impact',args.appname))
+    lines.append('  id ' + ''.join(c.rjust(14) for c in columns) + '  origin')
+    lines.append('-' * 80)
+    for r in results:
+        lines.append(str(r['id']).rjust(4) + ' ' + ''.join(str(r[c]).rjust(14) for c in columns)
+                         + '  ' + r['origin'])
+
+    if args.save:
+        reportsdir = UF.get_engagement_reports_dir(path)
+        if reportsdir is None:
+            print('*' * 80)
+            print('Unable to create reports directory')
+            print('*' * 80)
+            exit(1)
+        filename = os.path.join(reportsdir,'taint_impact.csv')
+        with open(filename,'w',newline='') as fp:
+            writer = csv.writer(fp)
+            writer.writerow([ 'id' ] + columns + [ 'origin' ])
+            for r in results:
+                writer.writerow([ r['id'] ] + [ r[c] for c in columns ] + [ r['origin'] ])
+        filename = os.path.join(reportsdir,'taint_impact.json')
+        with open(filename,'w') as fp:
+            json.dump(results,fp,indent=2)
+        # rows: origins; columns: taint node indices (packed bits, little-endian)
+        filename = os.path.join(reportsdir,'taint_impact_matrix.npz')
+        rowbytes = (size + 7) // 8
+        with open(filename,'wb') as fp:
+            np.savez_compressed(fp,origins=np.array(origins,dtype=np.int64),
+                                    matrix=np.array(matrix,dtype=np.uint8).reshape(len(origins),rowbytes),
+                                    size=np.array([ size ]))
+        print('Saved taint impact report for ' + str(len(results)) + ' origins in ' + reportsdir)
+    else:
+        print('\n'.join(lines))
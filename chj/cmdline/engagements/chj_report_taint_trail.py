@@ -27,15 +27,16 @@
 """Creates a graphical representation of a taint trail."""
 
 import argparse
+import os
 import time
 
 from contextlib import contextmanager
 
 import chj.util.fileutil as UF
 import chj.util.dotutil as UD
-import chj.util.graphutil as UG
 
 from chj.index.AppAccess import AppAccess
+from chj.index.TaintGraph import TaintGraph
 from chj.util.DotGraph import DotGraph
 
 def parse():
@@ -46,6 +47,15 @@ def parse():
     parser.add_argument('--sink',help='(partial) name of a node to restrict paths to as a destination')
     parser.add_argument('--loops',help='restrict paths to destinations that represent loop counters',
                             action='store_true')
+    parser.add_argument('--stats',help='print node degree statistics of the trail',
+                            action='store_true')
+    parser.add_argument('--paths',type=int,
+                            help='print at most this many explicit paths to each destination')
+    parser.add_argument('--k',type=int,
+                            help='print the k shortest paths to the destinations and ' +
+                            'restrict the graph to these paths')
+    parser.add_argument('--maxlength',type=int,
+                            help='maximum number of nodes in the explicit paths printed')
     args = parser.parse_args()
     return args
 
@@ -57,112 +67,77 @@ def timing(activity):
           '\nCompleted ' + activity + ' in ' + str(time.time() - t0) + ' secs' +
           '\n' + ('=' * 80))
 
-# return the root of the taint graph
-def get_root_node(nodes,enode):
-    tgts = []
-    for n in enode.findall('edge'):
-        tgts.append(int(n.get('src')))
-    for n in nodes:
-        if not n in tgts:
-            return n
-
 if __name__ == '__main__':
 
     args = parse()
     try:
         (path,_) = UF.get_engagement_app_jars(args.appname)
         UF.check_analysisdir(path)
-        xtrail = UF.get_data_taint_trail_xnode(path,int(args.taintsourceid))        
+        trailfilename = UF.get_data_taint_trail_filename(path,args.taintsourceid)
+        if not os.path.isfile(trailfilename):
+            raise UF.CHJTaintTrailNotFoundError(
+                path,trailfilename,UF.list_data_taint_trail_filenames(path))
     except UF.CHJError as e:
         print(str(e.wrap()))
         exit(1)
 
     app = AppAccess(path)
 
-    xnodes = xtrail.find('node-dictionary')
-    xedges = xtrail.find('edges')
-
-    nodes = [ int(n.get('ix')) for n in xnodes.findall('tn') ]
-    pathnodes = set([])
-
-    if (not args.sink is None) or args.loops:
-        with timing('find paths'):
-            sinkids = []
-
-            if not args.sink is None:
-                for n in nodes:
-                    cms = app.jd.ttd.get_taint_node_type(n)
-                    if args.sink in str(cms):
-                        sinkids.append(n)
-                if len(sinkids) == 0:
-                    print('*' * 80)
-                    print('No node found that contains ' + args.sink)
-                    print('*' * 80)
-                    exit(1)
-
-            if args.loops:
-                for n in nodes:
-                    cms = app.jd.ttd.get_taint_node_type(n)
-                    if cms.is_var() and str(cms.get_variable()) == 'lc':
-                        sinkids.append(n)
-
-            edge_adjacencylists = {}
-            for n in xedges.findall('edge'):
-                src = int(n.get('src'))
-                tgts = [ int(x) for x in n.get('tgts').split(',') ]
-                for t in tgts:
-                    edge_adjacencylists.setdefault(t,[])
-                    edge_adjacencylists[t].append(src)
-
-            srcid = get_root_node(nodes,xedges)
-
-            srcname = str(app.jd.ttd.get_taint_node_type(srcid))
-            print('Generating paths from ' + srcname + ' to ')
-            for sinkid in sinkids:
-                sinkname = str(app.jd.ttd.get_taint_node_type(sinkid))
-                print(' - ' + sinkname)
-
-
-            for sinkid in sinkids:
-                if sinkid in pathnodes: continue   
-                g = UG.DirectedGraph(nodes,edge_adjacencylists)
-                print('Find path to ' + str(app.jd.ttd.get_taint_node_type(sinkid)))
-                g.find_paths(srcid,sinkid)
-                for p in g.paths:
-                    pathnodes = pathnodes.union(p)
-
-    # if no restrictions include all nodes
-    if len(pathnodes) == 0:
-        pathnodes = nodes
-
-    edges = []
-    for n in xedges.findall('edge'):
-        src = int(n.get('src'))
-        if src in pathnodes:
-            tgts = [ int(x) for x in n.get('tgts').split(',') ]
-            for tgt in tgts:
-                if tgt in pathnodes:
-                    edges.append((src,tgt))
+    with timing('find path nodes'):
+        taintgraph = TaintGraph(app,args.appname,args.taintsourceid,
+                                    loops=args.loops,sink=args.sink)
+
+    if args.stats and not taintgraph.trail is None:
+        trail = taintgraph.trail
+        print('Nodes: ' + str(trail.get_node_count()) + '; edges: ' + str(trail.get_edge_count()))
+        stats = trail.get_degree_stats()
+        for d in sorted(stats):
+            print(d.ljust(4) + 'degree: max: ' + str(stats[d]['max']).rjust(6)
+                      + '; mean: ' + str(round(stats[d]['mean'],2)).rjust(8)
+                      + '; zero: ' + str(stats[d]['zero']).rjust(8))
+
+    if (not args.sink is None) and len(taintgraph.sinkids) == 0:
+        print('*' * 80)
+        print('No node found that contains ' + args.sink)
+        print('*' * 80)
+        exit(1)
+
+    def label(n): return taintgraph.trail.labels[taintgraph.trail.get_row(n)]
+
+    if ((not args.sink is None) or args.loops) and not taintgraph.srcid is None:
+        print('Paths from ' + label(taintgraph.srcid) + ' to ')
+        for sinkid in taintgraph.sinkids:
+            print(' - ' + label(sinkid))
+
+        if not args.paths is None:
+            with timing('enumerating paths'):
+                paths = taintgraph.get_paths(maxpaths=args.paths,maxlength=args.maxlength)
+                for p in paths:
+                    print('\n' + ' -> '.join(label(n) for n in p))
+
+        if not args.k is None:
+            with timing('finding the ' + str(args.k) + ' shortest paths'):
+                paths = []
+                for p in taintgraph.iter_shortest_paths(maxlength=args.maxlength):
+                    print('\n' + str(len(paths) + 1) + ' (' + str(len(p)) + ' nodes): '
+                              + ' -> '.join(label(n) for n in p))
+                    paths.append(p)
+                    if len(paths) >= args.k: break
+                taintgraph.restrict_to_paths(paths)
+
+    nodes = taintgraph.nodes
+    pathnodes = taintgraph.pathnodes
+    edges = [ (src,tgt) for (src,tgt) in taintgraph.edges
+                  if src in pathnodes and tgt in pathnodes ]
 
     with timing('creating graph (' + str(len(pathnodes)) + ' nodes; '
                                              + str(len(edges))  + ' edges)'):
         graphname = 'trail_' + str(args.taintsourceid)
         dotgraph = DotGraph(graphname)
-        for n in nodes:
+        for (row,n) in enumerate(nodes):
             if not n in pathnodes: continue
-            color = None
-            cms = app.jd.ttd.get_taint_node_type(n)
-            shaded = cms.is_call()
-            cmslabel = cms.dotlabel()
-            if cms.is_var():
-                if str(cms.get_variable()) == 'lc':
-                    color = 'red'
-                if str(cms.get_variable()) == 'return':
-                    color = 'green'
-            elif cms.is_conditional():
-                color = 'yellow'
-            dotgraph.add_node(str(n),str(cmslabel),shaded=shaded,color=color)
+            dotgraph.add_node(str(n),taintgraph.trail.dotlabels[row],
+                                  shaded=taintgraph.is_call(row),color=taintgraph.get_color(row))
         for (src,tgt) in edges:
-            if src in pathnodes and tgt in pathnodes:
-                dotgraph.add_edge(str(tgt),str(src))
+            dotgraph.add_edge(str(tgt),str(src))
         UD.print_dot(app.path,dotgraph)
@@ -0,0 +1,114 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Shows the wall time, cpu time and peak memory of the analyzer runs recorded
+for a list of applications (or all applications of a list of engagements),
+per phase, with the change since the previous run."""
+
+import argparse
+
+import chj.util.fileutil as UF
+import chj.util.runmetrics as UT
+
+phases = [ 'translate', 'scan', 'analyze', 'cost', 'taint' ]
+
+def parse():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('names',nargs='*',
+                            help='names of engagement applications or engagements ' +
+                            '(default: all applications)')
+    parser.add_argument('--phase',choices=phases,help='only show runs of this phase')
+    parser.add_argument('--history',action='store_true',help='show every run')
+    args = parser.parse_args()
+    return args
+
+def get_apps(names):
+    engagements = UF.get_engagements_data_file()
+    if len(names) == 0: names = sorted(engagements)
+    result = []
+    for name in names:
+        if name in engagements:
+            result.extend(sorted(engagements[name]['apps']))
+        else:
+            UF.get_engagement_from_name(name)
+            result.append(name)
+    return result
+
+def mb(n): return '-' if n is None else str(int(round(n / (1024.0 * 1024.0))))
+
+def secs(t): return '-' if t is None else '%.1f' % t
+
+def change(new,old):
+    if new is None or old is None or old == 0: return '-'
+    return '%+.0f%%' % (100.0 * (new - old) / old)
+
+def median(values):
+    values = sorted(values)
+    if len(values) == 0: return None
+    return values[len(values) // 2]
+
+if __name__ == '__main__':
+
+    args = parse()
+    try:
+        apps = get_apps(args.names)
+    except UF.CHJError as e:
+        print(str(e.wrap()))
+        exit(1)
+
+    maxlen = max([ len(app) for app in apps ] + [ 11 ]) + 2
+    header = ('application'.ljust(maxlen) + 'phase'.ljust(10) + 'runs'.rjust(5)
+                  + 'wall (s)'.rjust(10) + 'change'.rjust(8) + 'median'.rjust(9)
+                  + 'cpu (s)'.rjust(10) + 'change'.rjust(8) + 'rss (MB)'.rjust(10)
+                  + 'change'.rjust(8))
+    print(header)
+    print('-' * len(header))
+    for app in apps:
+        try:
+            (path,_) = UF.get_engagement_app_data(app)
+        except UF.CHJError:
+            continue
+        runs = [ r for r in UT.get_runs(path) if r.get('status') == 'ok' or args.history ]
+        for phase in phases:
+            if (not args.phase is None) and phase != args.phase: continue
+            phaseruns = [ r for r in runs if r['phase'] == phase ]
+            if len(phaseruns) == 0: continue
+            last = phaseruns[-1]
+            prev = phaseruns[-2] if len(phaseruns) > 1 else {}
+            print(app.ljust(maxlen) + phase.ljust(10) + str(len(phaseruns)).rjust(5)
+                      + secs(last.get('wall')).rjust(10)
+                      + change(last.get('wall'),prev.get('wall')).rjust(8)
+                      + secs(median([ r['wall'] for r in phaseruns ])).rjust(9)
+                      + secs(last.get('cpu')).rjust(10)
+                      + change(last.get('cpu'),prev.get('cpu')).rjust(8)
+                      + mb(last.get('maxrss')).rjust(10)
+                      + change(last.get('maxrss'),prev.get('maxrss')).rjust(8))
+            if args.history:
+                for r in phaseruns:
+                    print(' ' * (maxlen + 2) + r['start'].ljust(21) + r['status'].ljust(10)
+                              + secs(r.get('wall')).rjust(10) + secs(r.get('cpu')).rjust(10)
+                              + mb(r.get('maxrss')).rjust(10))
+    print('-' * len(header))
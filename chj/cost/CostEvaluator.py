@@ -0,0 +1,181 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Henny Sipma
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Compiled, vectorized evaluation of cost bounds.
+
+Cost bounds (jterm lists of lower and upper bounds) are compiled into a flat
+program of instructions over slots; the subterms shared between bounds are
+compiled once. The program is evaluated with NumPy arrays of values for the
+symbolic constants, so that all bounds are evaluated for all points of a
+parameter sweep in one pass. Terms that cannot be evaluated (local variables,
+loop counters, field values, sizes) evaluate to NaN. Requires numpy.
+"""
+
+import numpy as np
+
+# opcodes
+CONST = 0          # operand: value
+SYMBOL = 1         # operand: name of the symbolic constant
+ARITH = 2          # operand: (op,slot1,slot2)
+MAX = 3            # operand: list of slots
+MIN = 4            # operand: list of slots
+
+arithops = {
+    'add': np.add,
+    'sub': np.subtract,
+    'mult': np.multiply,
+    'div': np.true_divide
+    }
+
+class CostEvaluator(object):
+
+    def __init__(self,jtd):
+        self.jtd = jtd                 # JTermDictionary
+        self.instrs = []               # (opcode,operand), one per slot
+        self.termslots = {}            # jterm index -> slot
+        self.listslots = {}            # (jterm list index,upper) -> slot
+        self.constslots = {}           # value -> slot
+        self.symbols = {}              # name -> slot
+
+    def _emit(self,opcode,operand):
+        self.instrs.append((opcode,operand))
+        return len(self.instrs) - 1
+
+    def _const(self,v):
+        if not v in self.constslots:
+            self.constslots[v] = self._emit(CONST,v)
+        return self.constslots[v]
+
+    def compile_term(self,t):
+        """Return the slot that holds the value of jterm t."""
+        if t.index in self.termslots: return self.termslots[t.index]
+        tag = t.tags[0]
+        if tag == 'c':
+            slot = self._const(float(t.get_value()))
+        elif tag == 'fc':
+            slot = self._const(float(t.get_value()))
+        elif tag == 'bc':
+            slot = self._const(1.0 if t.get_value() else 0.0)
+        elif tag == 'symc':
+            name = t.get_name()
+            if not name in self.symbols:
+                self.symbols[name] = self._emit(SYMBOL,name)
+            slot = self.symbols[name]
+        elif tag == 'ar' and t.get_op() in arithops:
+            slot1 = self.compile_term(t.get_exp1())
+            slot2 = self.compile_term(t.get_exp2())
+            slot = self._emit(ARITH,(t.get_op(),slot1,slot2))
+        else:
+            slot = self._const(float('nan'))
+        self.termslots[t.index] = slot
+        return slot
+
+    def compile_bounds(self,jtlist,upper):
+        """Return the slot that holds the tightest of the bounds in jtlist: the
+        minimum of the upper bounds (inf if there are none), or the maximum of
+        the lower bounds (0 if there are none)."""
+        key = (jtlist.index,upper)
+        if key in self.listslots: return self.listslots[key]
+        slots = [ self.compile_term(t) for t in jtlist.get_jterms() ]
+        if len(slots) == 0:
+            slot = self._const(float('inf') if upper else 0.0)
+        elif len(slots) == 1:
+            slot = slots[0]
+        else:
+            slot = self._emit(MIN if upper else MAX,slots)
+        self.listslots[key] = slot
+        return slot
+
+    def compile_range(self,jtrange):
+        """Return the slots of the lower and upper bound of a jterm range."""
+        return (self.compile_bounds(jtrange.get_lower_bounds(),False),
+                    self.compile_bounds(jtrange.get_upper_bounds(),True))
+
+    def get_symbol_names(self): return sorted(self.symbols.keys())
+
+    def get_operands(self,slot):
+        (opcode,operand) = self.instrs[slot]
+        if opcode == ARITH: return list(operand[1:])
+        if opcode in [ MAX, MIN ]: return operand
+        return []
+
+    def get_slot_symbols(self,slots):
+        """Return the names of the symbolic constants the slots depend on."""
+        result = set([])
+        visited = set([])
+        stack = list(slots)
+        while len(stack) > 0:
+            slot = stack.pop()
+            if slot in visited: continue
+            visited.add(slot)
+            (opcode,operand) = self.instrs[slot]
+            if opcode == SYMBOL: result.add(operand)
+            stack.extend(self.get_operands(slot))
+        return result
+
+    def _evaluate_instr(self,slot,values,npoints,slots):
+        (opcode,operand) = self.instrs[slot]
+        if opcode == CONST:
+            return np.full(npoints,operand)
+        elif opcode == SYMBOL:
+            return np.broadcast_to(
+                np.asarray(values.get(operand,np.nan),dtype=np.float64),(npoints,))
+        elif opcode == ARITH:
+            (op,slot1,slot2) = operand
+            return arithops[op](slots[slot1],slots[slot2])
+        elif opcode == MAX:
+            # bounds that cannot be evaluated (NaN) are ignored
+            return np.fmax.reduce([ slots[s] for s in operand ])
+        else:
+            return np.fmin.reduce([ slots[s] for s in operand ])
+
+    def evaluate_slots(self,values,slots,cache,npoints=1):
+        """Evaluate the given slots and the slots they depend on, except for
+        those already in cache (slot -> array), which is extended with the new
+        slot values. Can be used to evaluate a program incrementally, as long as
+        the values of the symbols of the cached slots do not change."""
+        needed = set([])
+        stack = [ s for s in slots if not s in cache ]
+        while len(stack) > 0:
+            slot = stack.pop()
+            if slot in needed: continue
+            needed.add(slot)
+            stack.extend([ s for s in self.get_operands(slot) if not s in cache ])
+        with np.errstate(divide='ignore',invalid='ignore',over='ignore'):
+            # operands are always emitted before the instructions that use them
+            for slot in sorted(needed):
+                cache[slot] = self._evaluate_instr(slot,values,npoints,cache)
+        return [ cache[s] for s in slots ]
+
+    def evaluate(self,values,npoints=1):
+        """Evaluate the program; values maps names of symbolic constants to
+        scalars or arrays of length npoints (missing constants are NaN).
+        Returns the list of slot values, each an array of length npoints."""
+        slots = []
+        with np.errstate(divide='ignore',invalid='ignore',over='ignore'):
+            for slot in range(len(self.instrs)):
+                slots.append(self._evaluate_instr(slot,values,npoints,slots))
+        return slots
@@ -0,0 +1,150 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Henny Sipma
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Fingerprints of the method costs of an analysis run.
+
+The fingerprint of a method consists of the kind and constant bounds of its
+cost, and hashes of its cost expression, of the edges of its cfg, of its
+block costs, and of its loop bounds. Methods are identified by their fully
+qualified signature, which is stable across runs (unlike indices). The
+fingerprints of a run are saved as a compact json file in
+chanalysis/chindex/costruns; two runs are compared from these files alone.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import chj.util.fileutil as UF
+
+from chj.cost.CostModel import get_cost_kind
+
+fingerprintversion = 1
+
+# positions in a fingerprint entry
+CMSIX = 0
+KIND = 1
+LB = 2
+UB = 3
+COST = 4
+CFG = 5
+BLOCKS = 6
+LOOPS = 7
+
+components = [ (COST,'cost'), (CFG,'cfg'), (BLOCKS,'blocks'), (LOOPS,'loops') ]
+
+def get_hash(s): return hashlib.md5(s.encode('utf-8')).hexdigest()[:16]
+
+def compute_cost_fingerprints(app):
+    """Return method signature -> fingerprint entry for the current cost results
+    (read directly from the cost files; no MethodCost objects are created)."""
+    costmodel = app.get_costmodel()
+    jd = app.jd
+    jtd = jd.jtd
+    result = {}
+    for cnix in sorted(jd.appclassindices.values()):
+        xnode = costmodel.get_class_xnode(cnix)
+        if xnode is None: continue
+        jclass = app.get_class(cnix)
+        def f(x):
+            cmsix = int(x.get('cmsix'))
+            cost = jtd.get_jterm_range(int(x.get('imcost')))
+            (kind,lb,ub) = get_cost_kind(cost)
+            blocks = []
+            xblocks = x.find('blocks')
+            if not xblocks is None:
+                for b in xblocks.findall('block'):
+                    bcost = jtd.get_jterm_range(int(b.get('ibcost')))
+                    blocks.append(b.get('pc') + ':' + str(bcost))
+            loops = []
+            xloops = x.find('loops')
+            if not xloops is None:
+                for l in xloops.findall('loop'):
+                    oneit = jtd.get_jterm_range(int(l.get('i1it')))
+                    itc = jtd.get_jterm_range(int(l.get('iitcount')))
+                    loops.append(l.get('hpc') + ':' + str(oneit) + ':' + str(itc))
+            cfghash = None
+            if not jclass is None and cmsix in jclass.methods:
+                try:
+                    cfghash = jclass.get_method(cmsix).get_cfg_hash()
+                except (UF.CHJFileNotFoundError,UF.CHJXmlParseError) as e:
+                    print('No cfg for ' + str(jd.get_cms(cmsix)) + ': ' + str(e))
+            result[str(jd.get_cms(cmsix))] = [
+                cmsix, kind, lb, ub, get_hash(str(cost)), cfghash,
+                get_hash(';'.join(sorted(blocks))), get_hash(';'.join(sorted(loops))) ]
+        costmodel.iter_method_xnodes(xnode,f)
+    return result
+
+def get_fingerprints_filename(path,name):
+    """Return the filename of the fingerprints of a run given by name, or by
+    the name of a json file."""
+    if name.endswith('.json') and os.path.isfile(name): return name
+    return UF.get_cost_fingerprints_filename(path,name)
+
+def save_cost_fingerprints(path,name,fingerprints):
+    filename = get_fingerprints_filename(path,name)
+    tmpfilename = filename + '.tmp'
+    with open(tmpfilename,'w') as fp:
+        json.dump({ 'version': fingerprintversion,
+                        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                        'methods': fingerprints },fp,separators=(',',':'))
+    os.replace(tmpfilename,filename)
+    return filename
+
+def load_cost_fingerprints(path,name):
+    filename = get_fingerprints_filename(path,name)
+    if not os.path.isfile(filename):
+        raise UF.CHJFileNotFoundError(filename)
+    with open(filename) as fp:
+        d = json.load(fp)
+    if d.get('version') != fingerprintversion:
+        raise UF.CHJError('Cost fingerprints ' + filename + ' have version '
+                              + str(d.get('version')) + '; please save them again')
+    return d['methods']
+
+def get_run_names(path):
+    fpdir = UF.get_cost_fingerprints_dir(path)
+    return sorted([ f[:-5] for f in os.listdir(fpdir) if f.endswith('.json') ])
+
+def diff_cost_fingerprints(old,new):
+    """Return (added,removed,changed): lists of method signatures, and, for the
+    changed methods, [ (signature,components that changed,old entry,new entry) ]."""
+    added = sorted([ k for k in new if not k in old ])
+    removed = sorted([ k for k in old if not k in new ])
+    changed = []
+    for k in sorted(new):
+        if not k in old: continue
+        (o,n) = (old[k],new[k])
+        diffs = [ name for (i,name) in components if o[i] != n[i] ]
+        if len(diffs) > 0: changed.append((k,diffs,o,n))
+    return (added,removed,changed)
+
+def get_cost_delta(o,n):
+    """Return the change in upper bound (or lower bound if there is no upper
+    bound) between two entries, or None if either is not constant."""
+    for i in [ UB, LB ]:
+        if (not o[i] is None) and (not n[i] is None): return n[i] - o[i]
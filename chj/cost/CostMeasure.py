@@ -40,11 +40,11 @@ class CostMeasure():
         if self.is_value(): return self.cost.get_value()
 
     def get_lowerbound(self):
-        if self.lowerbounds.is_value(): return self.lowerbounds[0].get_value()
+        if self.lowerbounds.is_constant(): return self.lowerbounds.get_constant()
         return 0
 
     def get_upperbound(self):
-        if self.upperbounds.is_value(): return self.upperbounds[0].get_value()
+        if self.upperbounds.is_constant(): return self.upperbounds.get_constant()
 
     def get_ub_symbolic_dependencies(self):
         return self.cost.get_ub_symbolic_dependencies()
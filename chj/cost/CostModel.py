@@ -25,6 +25,9 @@
 # SOFTWARE.
 # ------------------------------------------------------------------------------
 
+import json
+import os
+
 import xml.etree.ElementTree as ET
 
 import chj.util.fileutil as UF
@@ -32,66 +35,141 @@ import chj.util.xmlutil as UX
 
 from chj.cost.MethodCost import MethodCost
 
+# version of the layout of the cost index file
+indexversion = 2
+
+def get_cost_kind(cost):
+    """Return the kind of a cost range (top, value, range, or symbolic), and
+    its constant lower and upper bound (None if not constant)."""
+    if cost.is_top(): return ('top',None,None)
+    if cost.is_value(): return ('value',cost.get_value(),cost.get_value())
+    if cost.is_range():
+        (lb,ub) = cost.get_range()
+        return ('range',lb,ub)
+    return ('symbolic',None,None)
+
 class CostModel():
+    """Cost model of the application methods.
+
+    The cost files of the application classes are loaded per class, when the
+    cost of one of its methods is requested. Queries over all methods by kind
+    of cost (top, constant, range) are answered from the cost index, a json
+    file in chanalysis/chindex with the kind and bounds of every method cost,
+    which is rebuilt when any of the cost files changes.
+    """
 
     def __init__(self,app):
         self.app = app            # AppAccess
         self.jd = self.app.jd     # DataDictionary
         self.methodcosts = {}     # cmsix -> MethodCost
+        self.loadedclasses = set([])   # cnix's whose cost file has been loaded
+        self.index = None         # cost index entries: [ cmsix, cnix, kind, lb, ub, unknown, imcost ]
+        self.evaluator = None     # CostEvaluator
+        self.compiledcosts = {}   # cmsix -> (lb slot, ub slot) in evaluator
+        self.rollup = None        # CostRollup
         self.constants = {}       # name -> value
         self.originalconstants = {}
-        self._initialize()
 
     def iter(self,f): 
+        self._load_all_classes()
         for m in sorted(self.methodcosts,key=lambda m:self.methodcosts[m]): 
             f(self.methodcosts[m])
 
-    def reinitialize(self): self._initialize()
+    def reinitialize(self):
+        self.methodcosts = {}
+        self.loadedclasses = set([])
+        self.index = None
+        self.evaluator = None
+        self.compiledcosts = {}
+        self.rollup = None
 
     def get_method_cost(self,id):
+        if not id in self.methodcosts:
+            self._load_class(self.jd.get_cms(id).cnix)
         if id in self.methodcosts: return self.methodcosts[id]
 
     def get_simplified_method_cost(self,id):
-        if id in self.methodcosts:
-            cost = self.methodcosts[id].methodcost
+        mc = self.get_method_cost(id)
+        if not mc is None:
+            cost = mc.methodcost
             if cost.is_top() or cost.is_value() or cost.is_range():
-                return self.methodcosts[id]
+                return mc
             else: return "X"
 
     def get_top_method_costs(self):
-        result = []
-        for cmsix in self.methodcosts:
-            if self.methodcosts[cmsix].methodcost.cost.is_top():
-                result.append(cmsix)
-        return result
+        return [ e[0] for e in self._get_index() if e[2] == 'top' ]
 
     def get_constant_method_costs(self):
-        result = []
-        for cmsix in self.methodcosts:
-            if self.methodcosts[cmsix].methodcost.is_value():
-                result.append((cmsix,self.methodcosts[cmsix].methodcost.get_value()))
+        result = [ (e[0],e[3]) for e in self._get_index() if e[2] == 'value' ]
         result = sorted(result,key=(lambda c : c[1]))
         return result
 
     def get_range_method_costs(self):
-        result = []
-        for cmsix in self.methodcosts:
-            if (self.methodcosts[cmsix].methodcost.is_range()
-                    and not self.methodcosts[cmsix].methodcost.is_value()):
-                result.append((cmsix,self.methodcosts[cmsix].methodcost.get_range()))
+        result = [ (e[0],(e[3],e[4])) for e in self._get_index() if e[2] == 'range' ]
         result = sorted(result,key=lambda x:x[1][1])
         return result
 
     def get_symbolic_method_costs(self):
         result = []
-        for cmsix in self.methodcosts:
-            cost = self.methodcosts[cmsix].methodcost
-            if cost.is_top(): continue
-            if cost.is_value(): continue
-            if cost.is_range(): continue
-            result.append((cmsix,cost))
+        for e in self._get_index():
+            if e[2] == 'symbolic':
+                result.append((e[0],self.get_method_cost(e[0]).methodcost))
+        return result
+
+    def get_cost_evaluator(self):
+        if self.evaluator is None:
+            # numpy is only needed for the evaluation of cost bounds
+            try:
+                from chj.cost.CostEvaluator import CostEvaluator
+            except ImportError as e:
+                raise UF.CHJError('Evaluation of cost bounds requires numpy: ' + str(e))
+            self.evaluator = CostEvaluator(self.jd.jtd)
+        return self.evaluator
+
+    def get_cost_symbol_names(self):
+        '''returns the names of the symbolic constants the method costs depend on'''
+        self._compile_method_costs(None)
+        return self.get_cost_evaluator().get_symbol_names()
+
+    def _compile_method_costs(self,cmsixs):
+        evaluator = self.get_cost_evaluator()
+        result = []
+        for e in self._get_index():
+            if (not cmsixs is None) and not e[0] in cmsixs: continue
+            if not e[0] in self.compiledcosts:
+                jtrange = self.jd.jtd.get_jterm_range(e[6])
+                self.compiledcosts[e[0]] = evaluator.compile_range(jtrange)
+            result.append(e[0])
+        return result
+
+    def evaluate_method_costs(self,values,cmsixs=None):
+        '''returns cmsix -> (lower bounds,upper bounds) for all methods (or the
+        methods in cmsixs) as arrays, for the values of the symbolic constants
+        given in values (name -> scalar or array; all arrays of the same length);
+        constants not in values take the value set by set_constant_value, or NaN.'''
+        allvalues = dict(self.constants)
+        allvalues.update(values)
+        npoints = 1
+        for v in values.values():
+            if hasattr(v,'__len__'): npoints = max(npoints,len(v))
+        methods = self._compile_method_costs(cmsixs)
+        slots = self.get_cost_evaluator().evaluate(allvalues,npoints)
+        result = {}
+        for cmsix in methods:
+            (lbslot,ubslot) = self.compiledcosts[cmsix]
+            result[cmsix] = (slots[lbslot],slots[ubslot])
         return result
 
+    def get_cost_rollup(self):
+        '''returns the inclusive method costs (own cost plus the cost of callees)'''
+        if self.rollup is None:
+            try:
+                from chj.cost.CostRollup import CostRollup
+            except ImportError as e:
+                raise UF.CHJError('Roll-up of inclusive costs requires numpy: ' + str(e))
+            self.rollup = CostRollup(self)
+        return self.rollup
+
     def get_constant_names(self): return self.constants.keys()
 
     def get_constant_values(self): return self.constants.items()
@@ -102,13 +180,12 @@ class CostModel():
     def set_constant_value(self,name,v): self.constants[name] = v
 
     def get_unknown_methodcosts(self):
-        return len(list(m for m in self.methodcosts
-                        if self.methodcosts[m].get_method_cost().is_unknown()))
+        return len([ e for e in self._get_index() if e[5] ])
     
     def save_constants_file(self):
         doc = UX.dict_to_xmlpretty(self.constants,'constants','constant','name','value')
         if not doc is None:
-            with open(UF.get_costmodel_constants_filename(self.app.path),'w') as fp:
+            with open(UF.get_costmodelconstants_filename(self.app.path),'w') as fp:
                 fp.write(doc)
 
     def restore_original_constants(self):
@@ -116,7 +193,7 @@ class CostModel():
             self.constants[name] = value
 
     def store_original_constants(self):
-        xnode = UF.get_costmodel_constants_xnode(self.app.path)
+        xnode = UF.get_costmodelconstants_xnode(self.app.path)
         if not xnode is None:
             for x in xnode.findall('constant'):
                 name = x.get('name')
@@ -126,6 +203,7 @@ class CostModel():
             print('No constants file found')
 
     def __str__(self):
+        self._load_all_classes()
         lines = []
         for m in self.methodcosts:
             lines.append(str(self.methodcosts[m]))
@@ -133,29 +211,91 @@ class CostModel():
         lines.append('Methods with unknown cost: ' + str(unknowncount))
         return '\n'.join(lines)
 
-    def _initialize(self):
-        self.methodcosts = {}
+    def get_class_xnode(self,cnix):
+        """Return the xml node of the cost results of class cnix."""
+        c = self.jd.get_cn(cnix)
+        try:
+            return UF.get_costclass_xnode(self.app.path,c.get_package_name(),c.get_simple_name())
+        except UF.CHJError as e:
+            print(str(e.wrap()))
+            print('\nPlease make sure cost analysis has been performed with chj_analyze_cost.py.\n')
+            exit(1)
+
+    def iter_method_xnodes(self,xnode,f):
+        """Apply f to the xml nodes of the (concrete) methods and constructors
+        with a cost in the cost results xnode of a class."""
+        for x in xnode.find('methods').findall('method'):
+            if 'abstract' in x.attrib: continue
+            if 'imcost' in x.attrib: f(x)
+        xcc = xnode.find('constructors')
+        if not xcc is None:
+            for x in xcc.findall('constructor'):
+                if 'imcost' in x.attrib: f(x)
+
+    def _load_class(self,cnix):
+        if cnix in self.loadedclasses: return
+        self.loadedclasses.add(cnix)
+        if not self.jd.is_application_class(cnix): return
+        xnode = self.get_class_xnode(cnix)
+        if not xnode is None:
+            def f(x):
+                mc = MethodCost(self,x)
+                self.methodcosts[mc.cmsix] = mc
+            self.iter_method_xnodes(xnode,f)
+
+    def _load_all_classes(self):
+        for cnix in self.jd.appclassindices.values():
+            self._load_class(cnix)
+
+    def _get_cost_files(self):
+        result = {}
         for cnix in self.jd.appclassindices.values():
             c = self.jd.get_cn(cnix)
-            try:
-                xnode = UF.get_costclass_xnode(self.app.path,c.get_package_name(),c.get_simple_name())
-            except UF.CHJError as e:
-                print(str(e.wrap()))
-                print('\nPlease make sure cost analysis has been performed with chj_analyze_cost.py.\n')
-                exit(1)
-            if not xnode is None:
-                for x in xnode.find('methods').findall('method'):
-                    if 'abstract' in x.attrib: continue
-                    if 'imcost' in x.attrib:
-                        mc = MethodCost(self,x)
-                        cmsix = int(x.get('cmsix'))
-                        self.methodcosts[cmsix] = mc
-                xcc = xnode.find('constructors')
-                if not xcc is None:
-                    for x in xcc.findall('constructor'):
-                        mc = MethodCost(self,x)
-                        self.methodcosts[mc.getid()] = mc
+            result[str(cnix)] = UF.get_costclass_filename(
+                self.app.path,c.get_package_name(),c.get_simple_name())
+        return result
 
+    def _get_index_fingerprints(self):
+        result = {}
+        for (cnix,filename) in self._get_cost_files().items():
+            result[cnix] = UF.get_file_fingerprint(filename)
+        result['jterms'] = UF.get_file_fingerprint(UF.get_jterm_dictionary_filename(self.app.path))
+        return dict((k,(None if v is None else list(v))) for (k,v) in result.items())
 
+    def _get_index(self):
+        if self.index is None:
+            fingerprints = self._get_index_fingerprints()
+            filename = UF.get_cost_index_filename(self.app.path)
+            if os.path.isfile(filename):
+                try:
+                    with open(filename) as fp:
+                        index = json.load(fp)
+                    if (index.get('version') == indexversion
+                            and index.get('fingerprints') == fingerprints):
+                        self.index = index['methods']
+                except ValueError as e:
+                    print('Ignoring cost index ' + filename + ': ' + str(e))
+            if self.index is None:
+                self.index = self._build_index()
+                tmpfilename = filename + '.tmp'
+                with open(tmpfilename,'w') as fp:
+                    json.dump({ 'version': indexversion, 'fingerprints': fingerprints,
+                                    'methods': self.index },fp)
+                os.replace(tmpfilename,filename)
+        return self.index
 
-    
+    def _build_index(self):
+        """Return the kind and bounds of every method cost, without creating
+        MethodCost objects."""
+        jtd = self.jd.jtd
+        result = []
+        for cnix in self.jd.appclassindices.values():
+            xnode = self.get_class_xnode(cnix)
+            if xnode is None: continue
+            def f(x):
+                cost = jtd.get_jterm_range(int(x.get('imcost')))
+                (kind,lb,ub) = get_cost_kind(cost)
+                result.append([ int(x.get('cmsix')), cnix, kind, lb, ub,
+                                    cost.is_ub_open_range(), cost.index ])
+            self.iter_method_xnodes(xnode,f)
+        return result
@@ -0,0 +1,151 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Henny Sipma
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Inclusive (transitive) method costs.
+
+The cost of a method that calls methods whose cost is not a constant refers
+to the costs of these callees through symbolic constants named
+<prefix>_<cmsix>. The inclusive cost of a method is its cost with the
+inclusive costs of its callees substituted for these constants.
+
+The dependency graph between methods (the call graph as seen by the cost
+model) is condensed into strongly connected components, which are processed
+bottom-up in topological order. All components at the same height (whose
+callees have all been processed) form a frontier. The bounds of all methods
+in a frontier are evaluated in one vectorized step of the compiled cost
+program, with the lower and upper bounds of the callee costs as two points.
+Each shared subterm is evaluated once overall. In a recursive component the
+costs of the members are taken to be unbounded (lower bound 0), which makes
+the upper bound of any cost that depends on them infinite. Bounds that
+cannot be evaluated get lower bound 0 and upper bound infinity. Requires
+numpy.
+"""
+
+import numpy as np
+
+import chj.util.graphutil as UG
+
+def get_callee_cmsix(name):
+    """Return the cmsix of the callee whose cost is represented by the symbolic
+    constant with this name, or None."""
+    parts = name.split('_')
+    if len(parts) == 2 and parts[1].isdigit(): return int(parts[1])
+
+class CostRollup(object):
+
+    def __init__(self,costmodel):
+        self.costmodel = costmodel          # CostModel
+        self.cmsixs = []                    # method index -> cmsix
+        self.methods = {}                   # cmsix -> method index
+        self.recursive = None               # bool array: in recursive component
+        self.height = None                  # int array: height of component
+        self.inclusivelb = None             # float array
+        self.inclusiveub = None             # float array
+        self._rollup()
+
+    def get_inclusive_cost(self,cmsix):
+        """Return (lb,ub) of the inclusive cost of the method (None if the method
+        has no cost)."""
+        if cmsix in self.methods:
+            i = self.methods[cmsix]
+            return (float(self.inclusivelb[i]),float(self.inclusiveub[i]))
+
+    def is_recursive(self,cmsix):
+        return cmsix in self.methods and bool(self.recursive[self.methods[cmsix]])
+
+    def get_ranked_inclusive_costs(self,n=None,bounded=False):
+        """Return [ (cmsix,(lb,ub)) ] ranked by decreasing inclusive upper bound,
+        at most n (all if None), optionally only the bounded ones."""
+        order = np.argsort(-self.inclusiveub,kind='stable')
+        if bounded:
+            order = order[np.isfinite(self.inclusiveub[order])]
+        if not n is None: order = order[:n]
+        return [ (self.cmsixs[i],(float(self.inclusivelb[i]),float(self.inclusiveub[i])))
+                     for i in order ]
+
+    def _rollup(self):
+        costmodel = self.costmodel
+        self.cmsixs = sorted(costmodel._compile_method_costs(None))
+        self.methods = dict((cmsix,i) for (i,cmsix) in enumerate(self.cmsixs))
+        evaluator = costmodel.get_cost_evaluator()
+        n = len(self.cmsixs)
+
+        # dependencies on the costs of other methods
+        edges = {}                          # method index -> callee method indices
+        calleesymbols = {}                  # method index -> names of its cost symbols
+        for (i,cmsix) in enumerate(self.cmsixs):
+            edges[i] = []
+            for name in evaluator.get_slot_symbols(costmodel.compiledcosts[cmsix]):
+                callee = get_callee_cmsix(name)
+                if not callee in self.methods: continue
+                edges[i].append(self.methods[callee])
+                calleesymbols.setdefault(self.methods[callee],set([])).add(name)
+        g = UG.DirectedGraph(list(range(n)),edges)
+        sccs = g.get_sccs()            # callees before callers
+        sccmap = g.get_scc_map(sccs)
+
+        # height of each component: 0 without callees, else 1 + max callee height
+        sccheight = [ 0 ] * len(sccs)
+        self.recursive = np.zeros(n,dtype=bool)
+        for (i,scc) in enumerate(sccs):
+            h = 0
+            for m in scc:
+                for d in edges[m]:
+                    if sccmap[d] != i: h = max(h,sccheight[sccmap[d]] + 1)
+            sccheight[i] = h
+            if len(scc) > 1 or scc[0] in edges[scc[0]]:
+                self.recursive[scc] = True
+        self.height = np.array([ sccheight[sccmap[m]] for m in range(n) ],dtype=np.int64)
+
+        # values of the symbolic constants as two points: lower and upper bound
+        values = {}
+        for (name,v) in costmodel.constants.items():
+            values[name] = np.array([ v, v ],dtype=np.float64)
+        for m in np.flatnonzero(self.recursive):
+            for name in calleesymbols.get(m,[]):
+                values[name] = np.array([ 0.0, np.inf ])
+
+        self.inclusivelb = np.zeros(n,dtype=np.float64)
+        self.inclusiveub = np.full(n,np.inf)
+        cache = {}
+        frontiers = {}
+        for m in range(n): frontiers.setdefault(int(self.height[m]),[]).append(m)
+        for h in sorted(frontiers):
+            frontier = frontiers[h]
+            slots = []
+            for m in frontier: slots.extend(costmodel.compiledcosts[self.cmsixs[m]])
+            results = evaluator.evaluate_slots(values,slots,cache,npoints=2)
+            lbs = np.array([ results[2*k][0] for k in range(len(frontier)) ])
+            ubs = np.array([ results[2*k+1][1] for k in range(len(frontier)) ])
+            lbs[np.isnan(lbs)] = 0.0
+            ubs[np.isnan(ubs)] = np.inf
+            self.inclusivelb[frontier] = lbs
+            self.inclusiveub[frontier] = ubs
+            # make the costs of this frontier available to its callers
+            for (k,m) in enumerate(frontier):
+                if self.recursive[m]: continue
+                for name in calleesymbols.get(m,[]):
+                    values[name] = np.array([ lbs[k], ubs[k] ])
@@ -29,9 +29,13 @@ from chj.cost.CostMeasure import CostMeasure
 
 class SideChannelCheck:
 
+    # paths between decision and observation are listed individually only if
+    # there are at most this many
+    maxenumeratedpaths = 1000
+
     def __init__(self,jmc,xnode):
-        self.mc = mc                        # MethodCost               
-        self.costmodel = self.mc.costmodel
+        self.jmc = jmc                      # MethodCost               
+        self.costmodel = self.jmc.costmodel
         self.xnode = xnode
         self.paths = {}             # pred-pc -> CostMeasure
         self.decisionpc = int(self.xnode.get('decision-pc'))
@@ -40,30 +44,58 @@ class SideChannelCheck:
     def get_method(self): return self.jmc.get_method()
 
     def get_paths(self):
-        return self.path.values()
+        return self.paths.values()
 
     def get_full_paths(self):
         cfg = self.get_method().get_cfg()
         return cfg.enumerate_paths(self.decisionpc,self.observationpc)
 
-    def get_full_paths_through_pc(self,pc):
-        fullpaths = self.get_full_paths()
-        return [ x for x in fullpaths if x[-2] == pc ]
-
-    def get_longest_full_paths_through_pc(self,pc):
-        fullpaths = self.get_full_paths_through_pc(pc)
-        sets = set([])
-        for p in fullpaths:
-            sets.add(frozenset(p))
-        maximalsets = set([])
-        for s in sets:
-            if any(x for x in sets if s != x and s.issubset(x)): continue
-            maximalsets.add(s)
-        maximalpaths = []
-        for p in fullpaths:
-            if set(p) in maximalsets:
-                maximalpaths.append(p)
-        return maximalpaths
+    def iter_full_paths(self,maxpaths=None):
+        cfg = self.get_method().get_cfg()
+        return cfg.iter_paths(self.decisionpc,self.observationpc,maxpaths=maxpaths)
+
+    def get_path_count(self):
+        """Return an estimate of the number of paths (loops counted once)."""
+        cfg = self.get_method().get_cfg()
+        return cfg.count_paths(self.decisionpc,self.observationpc)
+
+    def get_block_cost_bounds(self):
+        """Return the numerical lower and upper bounds of the block costs; blocks
+        without a constant bound get 0 and infinity, respectively."""
+        lbcosts = {}
+        ubcosts = {}
+        cfg = self.get_method().get_cfg()
+        for pc in cfg.blocks:
+            c = self.jmc.get_block_cost(pc)
+            lbcosts[pc] = 0 if c is None else c.get_lowerbound()
+            ub = None if c is None else c.get_upperbound()
+            ubcosts[pc] = float('inf') if ub is None else ub
+        return (lbcosts,ubcosts)
+
+    def get_cost_bounds(self):
+        """Return ((mincost,minpath),(maxcost,maxpath)) over all paths from the
+        decision to the observation pc, or None if there are no such paths."""
+        cfg = self.get_method().get_cfg()
+        (lbcosts,ubcosts) = self.get_block_cost_bounds()
+        return cfg.get_path_cost_bounds(self.decisionpc,self.observationpc,lbcosts,ubcosts)
+
+    def get_full_paths_through_pc(self,pc,maxpaths=None):
+        return [ x for x in self.iter_full_paths(maxpaths) if x[-2] == pc ]
+
+    def get_longest_full_paths_through_pc(self,pc,maxpaths=None):
+        """Return the paths through pc whose set of blocks is not contained in
+        that of another such path, considering at most maxpaths paths."""
+        maximal = {}                # frozenset of pcs -> list of paths
+        for p in self.iter_full_paths(maxpaths):
+            if p[-2] != pc: continue
+            s = frozenset(p)
+            if s in maximal:
+                maximal[s].append(p)
+                continue
+            if any(s < x for x in maximal): continue
+            for x in [ x for x in maximal if x < s ]: maximal.pop(x)
+            maximal[s] = [ p ]
+        return sorted(sum(maximal.values(),[]))
 
     def get_conditions_in_path(self,p):
         result = []
@@ -84,7 +116,6 @@ class SideChannelCheck:
 
     def __str__(self):
         lines = []
-        cfg = self.get_method().get_cfg()
         lines.append('decision-pc   : ' + str(self.decisionpc))
         lines.append('observation-pc: ' + str(self.observationpc))
         decisionblock = self.jmc.get_method().get_cfg().get_block(self.decisionpc)
@@ -99,7 +130,21 @@ class SideChannelCheck:
             lines.append('No conditions found decision-pc')
         lines.append(' ')
 
-        fullpaths = cfg.enumerate_paths(self.decisionpc,self.observationpc)
+        bounds = self.get_cost_bounds()
+        if bounds is None:
+            lines.append('No paths from decision-pc to observation-pc')
+            return '\n'.join(lines)
+        ((mincost,minpath),(maxcost,maxpath)) = bounds
+        lines.append('minimum cost: ' + str(mincost).rjust(12) + '  ' + str(minpath))
+        lines.append('maximum cost: ' + str(maxcost).rjust(12) + '  ' + str(maxpath))
+        lines.append(' ')
+
+        pathcount = self.get_path_count()
+        if pathcount > self.maxenumeratedpaths:
+            lines.append('  ' + str(pathcount) + ' paths (loops counted once); not enumerated')
+            return '\n'.join(lines)
+
+        fullpaths = self.iter_full_paths(self.maxenumeratedpaths)
                              
         lines.append('  path through pc=        cost')
         lines.append('-' * 80)
@@ -117,7 +162,8 @@ class SideChannelCheck:
         lines.append(' ')
         for p in sorted(self.paths):
             lines.append('Paths through ' + str(p))
-            pathsthroughp = self.get_longest_full_paths_through_pc(p)
+            pathsthroughp = self.get_longest_full_paths_through_pc(
+                p,self.maxenumeratedpaths)
             for pp in pathsthroughp:
                 lines.append('  ' + str(pp))
                 conds = self.get_conditions_in_path(pp[1:])
@@ -29,9 +29,11 @@
 import chj.util.fileutil as UF
 
 from chj.app.JavaClass import JavaClass
+from chj.app.ObjectSize import ObjectSizeTable
 from chj.cost.CostModel import CostModel
 
 from chj.index.Callgraph import Callgraph
+from chj.index.ClassHierarchy import ClassHierarchy
 from chj.index.DataDictionary import DataDictionary
 
 from chj.libsum.JDKModels import JDKModels
@@ -47,8 +49,14 @@ class AppAccess(object):
         self.classes = {}                    # cnix -> JavaClass (application classes)
         self.userdataclasses = {}            # cnix -> UserDataClass
         self.costmodel = None                # JCostModel
+        self.objectsizes = None              # ObjectSizeTable
+        self.classhierarchy = None           # ClassHierarchy
         self.classesloaded = False
 
+    def pack(self):
+        '''packs the dictionaries into read-only flat tables (see DataDictionary.pack)'''
+        self.jd.pack()
+
     def iter_classes(self,f):
         self._get_classes()
         for cnix in self.classes: f(self.classes[cnix])
@@ -106,6 +114,22 @@ class AppAccess(object):
         self._get_costmodel()
         return self.costmodel
 
+    def get_class_hierarchy(self):
+        '''returns a ClassHierarchy object (read from the index if up-to-date)'''
+        if self.classhierarchy is None:
+            self.classhierarchy = ClassHierarchy(self)
+        return self.classhierarchy
+
+    def get_object_size_table(self):
+        '''returns an ObjectSizeTable object (application classes only)'''
+        if self.objectsizes is None:
+            self.objectsizes = ObjectSizeTable(self)
+        return self.objectsizes
+
+    def get_object_size(self,cnix):
+        '''returns the ObjectSize of an application class, including inherited fields'''
+        return self.get_object_size_table().get_object_size(cnix)
+
     def get_loaded_strings(self,substring=None):
         results = []
         def f(c): results.extend(c.get_loaded_strings(substring=substring))
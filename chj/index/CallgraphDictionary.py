@@ -26,6 +26,7 @@
 # ------------------------------------------------------------------------------
 
 import chj.util.IndexedTable as IT
+import chj.util.PackedTable as PT
 
 import chj.index.JDictionaryRecord as JD
 
@@ -162,6 +163,10 @@ class CallgraphDictionary(object):
     def read_xml_target(self,node,tag='itgt'):
         return self.get_target(int(node.get(tag)))
 
+    def pack(self):
+        '''replaces the tables by read-only packed tables (used by the pre-fork server)'''
+        PT.pack_tables(self)
+
     def write_xml(self,node):
         def f(n,r):r.write_xml(n)
         for (t,_) in self.tables:
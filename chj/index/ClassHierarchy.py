@@ -0,0 +1,321 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Henny Sipma
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Class hierarchy of the application classes.
+
+The superclass and interfaces of every application class are read from the
+class files in one pass (without loading methods) and saved in the index
+directory, together with an interval encoding of the subclass tree: each
+class has a preorder number pre and the number post following its last
+descendant, so that b is a subclass of a iff pre[a] <= pre[b] < post[a], and
+the transitive subclasses of a are order[pre[a]+1:post[a]]. Subtyping through
+interfaces (a dag) uses bitsets of supertypes, computed on demand.
+
+The interfaces are read from an optional interfaces element of the class
+file; classes whose file does not have it are recorded as such (see
+has_interface_data), and subtyping through their interfaces is not known.
+"""
+
+import json
+import os
+
+import chj.util.fileutil as UF
+
+# version of the layout of the class hierarchy index file
+indexversion = 2
+
+def get_class_data(app,cnix):
+    """Return the superclass and interfaces of an application class, from the
+    loaded class if available, or else from its class file (interfaces is None
+    if the class file has no interface data); None if the file is missing."""
+    if cnix in app.classes:
+        jclass = app.classes[cnix]
+        return (jclass.superix,jclass.interfaces)
+    cn = app.jd.get_cn(cnix)
+    xnode = UF.get_app_class_xnode(app.path,cn.get_package_name(),cn.get_simple_name())
+    if xnode is None: return None
+    superix = int(xnode.get('super-ix')) if 'super-ix' in xnode.attrib else None
+    interfaces = None
+    xinterfaces = xnode.find('interfaces')
+    if not xinterfaces is None:
+        interfaces = [ int(x.get('ix')) for x in xinterfaces.findall('interface') ]
+    return (superix,interfaces)
+
+def is_declared_subtype(app,cnix,supercnix):
+    """Return true if the application class cnix is a subtype of the application
+    class or interface supercnix, false if it is not, and None if that is not
+    known because a supertype of cnix has no interface data or is not an
+    application class. Only the class files of the supertypes of cnix are read
+    (no index is built)."""
+    stack = [ cnix ]
+    seen = set([])
+    known = True
+    while len(stack) > 0:
+        c = stack.pop()
+        if c == supercnix: return True
+        if c in seen: continue
+        if not app.jd.is_application_class(c):
+            known = False
+            continue
+        seen.add(c)
+        data = get_class_data(app,c)
+        if data is None:
+            known = False
+            continue
+        (superix,interfaces) = data
+        if not superix is None: stack.append(superix)
+        if interfaces is None:
+            known = False
+        else:
+            stack.extend(interfaces)
+    return False if known else None
+
+class ClassHierarchy(object):
+
+    def __init__(self,app):
+        self.app = app
+        self.jd = app.jd
+        self.supers = {}          # cnix -> superclass cnix (None if not known)
+        self.interfaces = {}      # cnix -> [ cnix ] (directly implemented or extended)
+        self.interfacesknown = set([])   # cnixs whose class file has interface data
+        self.order = []           # cnixs in preorder of the subclass tree
+        self.intervals = {}       # cnix -> (pre,post)
+        self.subclasses = None    # cnix -> [ cnix ] direct subclasses
+        self.implementors = None  # cnix -> [ cnix ] direct implementors
+        self.bits = None          # cnix -> bit position
+        self.supertypes = None    # cnix -> bitset of all supertypes (including itself)
+        self._initialize()
+
+    def get_super_class(self,cnix):
+        """Return the cnix of the superclass, or None."""
+        return self.supers.get(cnix)
+
+    def get_interfaces(self,cnix):
+        """Return the interfaces directly implemented (or extended) by cnix."""
+        return self.interfaces.get(cnix,[])
+
+    def has_interface_data(self,cnix):
+        """Return true if the interfaces of cnix were found in its class file."""
+        return cnix in self.interfacesknown
+
+    def get_direct_subclasses(self,cnix):
+        if self.subclasses is None:
+            self.subclasses = {}
+            for c in self.order:
+                s = self.supers.get(c)
+                if not s is None: self.subclasses.setdefault(s,[]).append(c)
+        return self.subclasses.get(cnix,[])
+
+    def get_direct_implementors(self,cnix):
+        if self.implementors is None:
+            self.implementors = {}
+            for c in self.order:
+                for i in self.interfaces.get(c,[]):
+                    self.implementors.setdefault(i,[]).append(c)
+        return self.implementors.get(cnix,[])
+
+    def get_subclasses(self,cnix):
+        """Return all transitive subclasses of cnix (not including cnix)."""
+        if not cnix in self.intervals: return []
+        (pre,post) = self.intervals[cnix]
+        return self.order[pre+1:post]
+
+    def is_subclass(self,cnix,supercnix):
+        """Return true if cnix is supercnix or one of its transitive subclasses."""
+        if not (cnix in self.intervals and supercnix in self.intervals): return False
+        (pre,post) = self.intervals[supercnix]
+        return pre <= self.intervals[cnix][0] < post
+
+    def get_ancestors(self,cnix):
+        """Return the transitive superclasses of cnix, nearest first."""
+        result = []
+        c = self.supers.get(cnix)
+        while not c is None and not c in result:
+            result.append(c)
+            c = self.supers.get(c)
+        return result
+
+    def is_subtype(self,cnix,supercnix):
+        """Return true if cnix is supercnix, or a subclass or implementor of it
+        (implementors are known only for classes with interface data)."""
+        if self.is_subclass(cnix,supercnix): return True
+        self._get_supertypes()
+        if not (cnix in self.supertypes and supercnix in self.bits): return False
+        return (self.supertypes[cnix] >> self.bits[supercnix]) & 1 == 1
+
+    def get_implementors(self,cnix):
+        """Return all classes and interfaces that are transitive subtypes of the
+        interface cnix (not including cnix)."""
+        self._get_supertypes()
+        if not cnix in self.bits: return []
+        bit = self.bits[cnix]
+        return [ c for c in self.order if c != cnix and (self.supertypes[c] >> bit) & 1 == 1 ]
+
+    def get_virtual_targets(self,cnix,msix):
+        """Return the application classes that may implement msix for a receiver
+        of static type cnix: cnix and its subtypes that define msix. Classes for
+        which subtyping is not known (the class or one of its application
+        superclasses has no interface data) are included."""
+        if not msix in self.jd.mstargets: return []
+        (_,appcnixs,_) = self.jd.mstargets[msix]
+        return [ c for c in appcnixs
+                     if self.is_subtype(c,cnix) or not self.is_subtype_known(c) ]
+
+    def is_subtype_known(self,cnix):
+        """Return true if cnix and its application superclasses have interface data."""
+        return all([ self.has_interface_data(c) for c in [ cnix ] + self.get_ancestors(cnix)
+                         if self.jd.is_application_class(c) ])
+
+    def to_string(self,cnix=None):
+        """Return the subclass tree (of cnix, or of all roots), with the interfaces
+        of each class."""
+        lines = []
+        roots = [ cnix ] if not cnix is None else [ c for c in self.order
+                                                     if self.supers.get(c) not in self.intervals ]
+        for root in roots:
+            if not root in self.intervals: continue
+            (pre,post) = self.intervals[root]
+            depth = { self.supers.get(root): -1 }
+            for c in self.order[pre:post]:
+                depth[c] = depth[self.supers.get(c)] + 1
+                line = ('  ' * depth[c]) + str(self.jd.get_cn(c))
+                if len(self.get_interfaces(c)) > 0:
+                    line += ' implements ' + ', '.join([ str(self.jd.get_cn(i))
+                                                             for i in self.get_interfaces(c) ])
+                lines.append(line)
+        return '\n'.join(lines)
+
+    def _get_supertypes(self):
+        if self.supertypes is None:
+            self.bits = {}
+            for c in self.order: self.bits[c] = len(self.bits)
+            for c in self.order:
+                for i in self.interfaces.get(c,[]):
+                    if not i in self.bits: self.bits[i] = len(self.bits)
+            self.supertypes = {}
+            for c in self.bits: self._get_supertype_bits(c)
+
+    def _get_supertype_bits(self,cnix):
+        """Compute the supertype bitsets of cnix and its supertypes (iteratively,
+        supertypes first)."""
+        stack = [ cnix ]
+        onstack = set([ cnix ])
+        while len(stack) > 0:
+            c = stack[-1]
+            if c in self.supertypes:
+                stack.pop()
+                continue
+            parents = [ p for p in ([ self.supers.get(c) ] + self.interfaces.get(c,[]))
+                            if not p is None and p in self.bits ]
+            pending = [ p for p in parents if not p in self.supertypes and not p in onstack ]
+            if len(pending) > 0:
+                for p in pending: onstack.add(p)
+                stack.extend(pending)
+                continue
+            bits = 1 << self.bits[c]
+            for p in parents: bits |= self.supertypes.get(p,0)
+            self.supertypes[c] = bits
+            stack.pop()
+
+    def _get_class_files(self):
+        result = {}
+        for cnix in self.jd.appclassindices.values():
+            cn = self.jd.get_cn(cnix)
+            result[str(cnix)] = UF.get_app_class_filename(
+                self.app.path,cn.get_package_name(),cn.get_simple_name())
+        return result
+
+    def _get_index_fingerprints(self):
+        result = {}
+        for (cnix,filename) in self._get_class_files().items():
+            result[cnix] = UF.get_file_fingerprint(filename)
+        return dict((k,(None if v is None else list(v))) for (k,v) in result.items())
+
+    def _initialize(self):
+        fingerprints = self._get_index_fingerprints()
+        filename = UF.get_class_hierarchy_index_filename(self.app.path)
+        index = None
+        if os.path.isfile(filename):
+            try:
+                with open(filename) as fp:
+                    index = json.load(fp)
+                if not (index.get('version') == indexversion
+                            and index.get('fingerprints') == fingerprints):
+                    index = None
+            except ValueError as e:
+                print('Ignoring class hierarchy index ' + filename + ': ' + str(e))
+                index = None
+        if index is None:
+            self._build_index()
+            tmpfilename = filename + '.tmp'
+            with open(tmpfilename,'w') as fp:
+                json.dump({ 'version': indexversion, 'fingerprints': fingerprints,
+                                'classes': [ [ c, self.supers.get(c),
+                                                   (self.interfaces.get(c,[])
+                                                        if c in self.interfacesknown else None) ]
+                                                 + list(self.intervals[c]) for c in self.order ] },fp)
+            os.replace(tmpfilename,filename)
+        else:
+            for (c,superix,interfaces,pre,post) in index['classes']:
+                self.order.append(c)
+                if not superix is None: self.supers[c] = superix
+                if not interfaces is None: self.interfacesknown.add(c)
+                if interfaces: self.interfaces[c] = interfaces
+                self.intervals[c] = (pre,post)
+
+    def _build_index(self):
+        """Read the superclass and interfaces of all application classes, and
+        number the subclass tree in preorder (non-application superclasses,
+        such as java.lang.Object, are included as roots)."""
+        nodes = set([])
+        for cnix in sorted(self.jd.appclassindices.values()):
+            data = get_class_data(self.app,cnix)
+            if data is None: continue
+            (superix,interfaces) = data
+            nodes.add(cnix)
+            if not superix is None:
+                self.supers[cnix] = superix
+                nodes.add(superix)
+            if not interfaces is None:
+                self.interfacesknown.add(cnix)
+                if len(interfaces) > 0: self.interfaces[cnix] = interfaces
+        children = {}
+        for (c,s) in self.supers.items(): children.setdefault(s,[]).append(c)
+        roots = sorted([ c for c in nodes if not c in self.supers ])
+        for root in roots:
+            self.intervals[root] = (len(self.order),None)
+            self.order.append(root)
+            stack = [ (root,iter(sorted(children.get(root,[])))) ]
+            while len(stack) > 0:
+                (c,succs) = stack[-1]
+                d = next(succs,None)
+                if d is None:
+                    stack.pop()
+                    self.intervals[c] = (self.intervals[c][0],len(self.order))
+                    continue
+                self.intervals[d] = (len(self.order),None)
+                self.order.append(d)
+                stack.append((d,iter(sorted(children.get(d,[])))))
@@ -27,6 +27,7 @@
 
 
 import chj.util.fileutil as UF
+import chj.util.PackedTable as PT
 
 from chj.index.JTypeDictionary import JTypeDictionary
 from chj.index.TaintDictionary import TaintDictionary
@@ -42,6 +43,7 @@ class DataDictionary():
         self.cgd = None                 # CallgraphDictionary
         self.jtd = None                 # JTermDictionary
         self.appclassindices = {}       # classname (string) -> cnix
+        self.appclassset = set([])      # cnix's of application classes
         self.msindices = {}             # (name(string),sig(string)) -> msix
         self.mssignatures = {}          # msix -> (name(string),sig(string))
         self.mstargets = {}             # msix -> (stub-cnix list, appclass-cnix list, native-cnix list)
@@ -121,7 +123,7 @@ class DataDictionary():
             (msix,tgt) = self.callgraphedges[ (cmsix,pc) ]
             f(cmsix,pc,msix,tgt)
 
-    def is_application_class(self,cnix): return cnix in self.appclassindices.values()
+    def is_application_class(self,cnix): return cnix in self.appclassset
 
     def has_call_target(self,cmsix,pc): return (cmsix,pc) in self.callgraphedges
 
@@ -138,6 +140,22 @@ class DataDictionary():
                 lines.append('  ' + str(self.get_cn(t)))
         return '\n'.join(lines)
 
+    def pack(self):
+        '''replaces the tables and maps by read-only packed versions, which can be
+        shared by forked processes without their pages being copied (the jterm
+        dictionary is extended at run time and is not packed)'''
+        for d in [ self.tpd, self.ttd, self.cgd ]:
+            if not d is None: d.pack()
+        cgd = self.cgd
+        self.appclassindices = PT.PackedDict(self.appclassindices)
+        self.appclassset = PT.PackedIntSet(self.appclassset)
+        self.msindices = PT.PackedDict(self.msindices)
+        self.mssignatures = PT.PackedDict(self.mssignatures)
+        self.mstargets = PT.PackedDict(self.mstargets)
+        self.callgraphedges = PT.PackedDict(self.callgraphedges,
+                                                encode=lambda v:(v[0],v[1].index),
+                                                decode=lambda v:(v[0],cgd.get_target(v[1])))
+
     def _initialize(self):
         path = self.app.path
         self._initialize_type_dictionary(path)
@@ -183,6 +201,7 @@ class DataDictionary():
                 else:
                     cname = cn.get('name')
                 self.appclassindices[cname] = int(cn.get('ix'))
+                self.appclassset.add(int(cn.get('ix')))
 
     def _initialize_missing_classes(self,path):
         xnode = UF.get_datamissingitems_xnode(path)
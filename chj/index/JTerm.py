@@ -72,17 +72,26 @@ class JTermBase(JD.JDictionaryRecord):
 
     def to_float(self): return self
 
-    def add(self,other):
+    # add, div, and simplify are memoized in the dictionary by term index;
+    # subclasses override _add, _div, and _simplify
+
+    def add(self,other): return self.jtd.add_jterms(self,other)
+
+    def div(self,other): return self.jtd.div_jterms(self,other)
+
+    def simplify(self): return self.jtd.simplify_jterm(self)
+
+    def _add(self,other):
         if other.is_zero(): return self
         if other.is_constant(): return other.add(self)
         if other.is_float_constant(): return other.add(self)
         return self.jtd.mk_arithmetic_jterm(self,other,'add')
 
-    def div(self,other):
+    def _div(self,other):
         if other.is_one(): return self        
         return self.jtd.mk_arithmetic_jterm(self,other,'div')
 
-    def simplify(self): return self
+    def _simplify(self): return self
 
     def __str__(self): return 'jdtermbase'
 
@@ -185,16 +194,16 @@ class JTConstant(JTermBase):
     def to_float(self):
         return self.jtd.mk_float_constant(self.get_value())
 
-    def add(self,other):
+    def _add(self,other):
         if other.is_constant():
             v = self.get_value() + other.get_value()
             return self.jtd.mk_constant_jterm(v)
         if other.is_float_constant():
             return self.jtd.mk_float_constant(self.to_float().get_value() + other.get_value())
         else:
-            return JTermBase.add(self,other)
+            return JTermBase._add(self,other)
 
-    def div(self,other):
+    def _div(self,other):
         if other.is_one(): return self
         if other.is_constant(): return self.to_float().div(other.to_float())
         if other.is_float_constant(): return self.to_float().div(other)
@@ -202,7 +211,7 @@ class JTConstant(JTermBase):
 
     def is_constant(self): return True
 
-    def simplify(self): return self.to_float()
+    def _simplify(self): return self.to_float()
 
     def __str__(self): return str(self.get_value())
 
@@ -278,14 +287,14 @@ class JTFloatConstant(JTermBase):
 
     def is_float_constant(self): return True
 
-    def div(self,other):
+    def _div(self,other):
         if other.is_constant():
             return self.jtd.mk_float_constant(self.get_value() / other.to_float().get_value())
         if other.is_float_constant():
             return self.jtd.mk_float_constant(self.get_value() / other.get_value())
         return self.jtd.mk_arithmetic_jterm(self,other,'div')
 
-    def add(self,other):
+    def _add(self,other):
         if other.is_constant():
             return self.jtd.mk_float_constant(self.get_value() + other.to_float().get_value())
         if other.is_float_constant():
@@ -423,7 +432,7 @@ class JTArithmeticExpr(JTermBase):
         return (self.get_exp1().is_symbolic_expr()
                     or self.get_exp2().is_symbolic_expr())
 
-    def simplify(self):
+    def _simplify(self):
         jt1 = self.get_exp1().simplify()
         jt2 = self.get_exp2().simplify()
         if self.get_op() == 'div' and jt1.is_float_constant() and jt2.is_float_constant():
@@ -440,7 +449,7 @@ class JTArithmeticExpr(JTermBase):
                 return self.jtd.mk_arithmetic_jterm(jt11,jt12.div(jt2).simplify(),'mult')
             return self
         if self.get_op() == 'add' and jt1.is_float_constant() and jt2.is_float_constant():
-            return self.jd.mk_float_constant(jt1.get_value() + jt2.get_value())
+            return self.jtd.mk_float_constant(jt1.get_value() + jt2.get_value())
         if self.get_op() == 'add' and jt1.is_float_constant() and jt2.is_compound():
             op2 = jt2.get_op()
             jt21 = jt2.get_exp1().simplify()
@@ -25,6 +25,8 @@
 # SOFTWARE.
 # ------------------------------------------------------------------------------
 
+import xml.etree.ElementTree as ET
+
 import chj.util.IndexedTable as IT
 
 import chj.index.JTerm as JT
@@ -70,6 +72,9 @@ class JTermDictionary(object):
             (self.jterm_list_table, self._read_xml_jterm_list_table),
             (self.relational_expr_list_table, self._read_xml_relational_expr_list_table),
             (self.jterm_range_table, self._read_xml_jterm_range_table) ]
+        self.addtable = {}              # (index,index) -> jterm
+        self.divtable = {}              # (index,index) -> jterm
+        self.simplifytable = {}         # index -> jterm
         self.initialize(xnode)
 
     def get_symbolic_jterm_constant(self,ix):
@@ -97,7 +102,7 @@ class JTermDictionary(object):
         return self.numerical_table.add(IT.get_key(tags,[]),f)
 
     def mk_numerical(self,v):
-        return self.gget_numerical(self.index_numerical(v))
+        return self.get_numerical(self.index_numerical(v))
 
     def index_float(self,v):
         tags = [ str(v) ]
@@ -131,6 +136,92 @@ class JTermDictionary(object):
     def mk_arithmetic_jterm(self,jt1,jt2,op):
         return self.get_jterm(self.index_arithmetic_jterm(jt1,jt2,op))
 
+    def index_array_length_jterm(self,jt):
+        tags = ['al']
+        args = [ jt.index ]
+        def f(index,key): return JT.JTArrayLength(self,index,tags,args)
+        return self.jterm_table.add(IT.get_key(tags,args),f)
+
+    def mk_array_length_jterm(self,jt):
+        return self.get_jterm(self.index_array_length_jterm(jt))
+
+    def index_string_length_jterm(self,jt):
+        tags = ['sl']
+        args = [ jt.index ]
+        def f(index,key): return JT.JTStringLength(self,index,tags,args)
+        return self.jterm_table.add(IT.get_key(tags,args),f)
+
+    def mk_string_length_jterm(self,jt):
+        return self.get_jterm(self.index_string_length_jterm(jt))
+
+    def index_size_jterm(self,jt):
+        tags = ['si']
+        args = [ jt.index ]
+        def f(index,key): return JT.JTSize(self,index,tags,args)
+        return self.jterm_table.add(IT.get_key(tags,args),f)
+
+    def mk_size_jterm(self,jt):
+        return self.get_jterm(self.index_size_jterm(jt))
+
+    def index_relational_expr(self,jt1,jt2,op):
+        tags = [ op ]
+        args = [ jt1.index, jt2.index ]
+        def f(index,key): return JT.JTRelationalExpr(self,index,tags,args)
+        return self.relational_expr_table.add(IT.get_key(tags,args),f)
+
+    def mk_relational_expr(self,jt1,jt2,op):
+        return self.get_relational_expr(self.index_relational_expr(jt1,jt2,op))
+
+    def index_jterm_list(self,jts):
+        tags = []
+        args = [ jt.index for jt in jts ]
+        def f(index,key): return JT.JTermList(self,index,tags,args)
+        return self.jterm_list_table.add(IT.get_key(tags,args),f)
+
+    def mk_jterm_list(self,jts):
+        return self.get_jterm_list(self.index_jterm_list(jts))
+
+    def index_jterm_range(self,lbs,ubs):
+        tags = []
+        args = [ self.index_jterm_list(lbs), self.index_jterm_list(ubs) ]
+        def f(index,key): return JT.JTermRange(self,index,tags,args)
+        return self.jterm_range_table.add(IT.get_key(tags,args),f)
+
+    def mk_jterm_range(self,lbs,ubs):
+        return self.get_jterm_range(self.index_jterm_range(lbs,ubs))
+
+    # ----------------------- Memoized term arithmetic -------------------------
+
+    # Terms are hash-consed in the jterm table, so results can be keyed by
+    # term index; only terms stored in the jterm table are memoized.
+
+    def _is_jterm(self,jt):
+        return self.jterm_table.indextable.get(jt.index) is jt
+
+    def add_jterms(self,jt1,jt2):
+        if not (self._is_jterm(jt1) and self._is_jterm(jt2)): return jt1._add(jt2)
+        key = (jt1.index,jt2.index)
+        if not key in self.addtable:
+            self.addtable[key] = jt1._add(jt2)
+        return self.addtable[key]
+
+    def div_jterms(self,jt1,jt2):
+        if not (self._is_jterm(jt1) and self._is_jterm(jt2)): return jt1._div(jt2)
+        key = (jt1.index,jt2.index)
+        if not key in self.divtable:
+            self.divtable[key] = jt1._div(jt2)
+        return self.divtable[key]
+
+    def simplify_jterm(self,jt):
+        if not self._is_jterm(jt): return jt._simplify()
+        if not jt.index in self.simplifytable:
+            self.simplifytable[jt.index] = jt._simplify()
+        return self.simplifytable[jt.index]
+
+    def get_memo_sizes(self):
+        return { 'add': len(self.addtable), 'div': len(self.divtable),
+                     'simplify': len(self.simplifytable) }
+
     def read_xml_jterm(self,node,tag='ijt'):
         return self.get_jterm(int(node.get(tag)))
 
@@ -155,6 +246,9 @@ class JTermDictionary(object):
  
     def initialize(self,xnode,force=False):
         if xnode is None: return
+        self.addtable = {}
+        self.divtable = {}
+        self.simplifytable = {}
         for (t,f) in self.tables:
             t.reset()
             f(xnode.find(t.name))
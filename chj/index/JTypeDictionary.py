@@ -26,6 +26,7 @@
 # ------------------------------------------------------------------------------
 
 import chj.util.IndexedTable as IT
+import chj.util.PackedTable as PT
 
 import chj.index.JType as JT
 
@@ -122,10 +123,10 @@ class JTypeDictionary(object):
         self.initialize(xnode)
 
     def get_fields(self):
-        return self.class_field_signature_data_table.indextable.values()
+        return self.class_field_signature_data_table.values()
 
     def get_methods(self):
-        return self.class_method_signature_data_table.indextable.values()
+        return self.class_method_signature_data_table.values()
 
     def get_string(self,ix): return self.string_table.retrieve(ix)
 
@@ -157,6 +158,10 @@ class JTypeDictionary(object):
 
     def get_method_handle_type(self,ix): return self.method_handle_type_table.retrieve(ix)
 
+    def pack(self):
+        '''replaces the tables by read-only packed tables (used by the pre-fork server)'''
+        PT.pack_tables(self)
+
     def write_xml(self,node):
         def f(n,r):r.write_xml(n)
         for (t,_) in self.tables:
@@ -252,6 +252,10 @@ class TaintNodeBase(TaintBase):
     def is_var(self): return False
     def is_conditional(self): return False
 
+    def get_caller_index(self):
+        '''returns the cmsix of the method the node belongs to (None if not in a method)'''
+        return None
+
     def dotlabel(self): return 'dot-label'
 
 
@@ -274,6 +278,8 @@ class VariableTaintNode(TaintNodeBase):
 
     def is_var(self): return True
 
+    def get_caller_index(self): return int(self.args[0])
+
     def get_caller(self):
         return self.ttd.jd.get_cms(int(self.args[0]))
 
@@ -296,6 +302,8 @@ class VariableEqTaintNode(TaintNodeBase):
     def __init__(self,ttd,index,tags,args):
         TaintNodeBase.__init__(self,ttd,index,tags,args)
 
+    def get_caller_index(self): return int(self.args[0])
+
     def get_caller(self):
         return self.ttd.jd.get_cms(int(self.args[0]))
 
@@ -321,6 +329,8 @@ class CallTaintNode(TaintNodeBase):
 
     def is_call(self): return True
 
+    def get_caller_index(self): return int(self.args[2])
+
     def get_caller(self):
         return self.ttd.jd.get_cms(int(self.args[2]))
 
@@ -344,6 +354,8 @@ class UnknownCallTaintNode(TaintNodeBase):
     def __init__(self,ttd,index,tags,args):
         TaintNodeBase.__init__(self,ttd,index,tags,args)
 
+    def get_caller_index(self): return int(self.args[2])
+
     def get_caller(self):
         return self.ttd.jd.get_cms(int(self.args[2]))
 
@@ -361,6 +373,8 @@ class ObjectFieldTaintNode(TaintNodeBase):
     def __init__(self,ttd,index,tags,args):
         TaintNodeBase.__init__(self,ttd,index,tags,args)
 
+    def get_caller_index(self): return int(self.args[0])
+
     def get_caller(self): return self.ttd.jd.get_cms(int(self.args[0]))
 
     def get_variable(self): return self.ttd.get_variable(int(self.args[1]))
@@ -383,6 +397,8 @@ class ConditionalTaintNode(TaintNodeBase):
     def __init__(self,ttd,index,tags,args):
         TaintNodeBase.__init__(self,ttd,index,tags,args)
 
+    def get_caller_index(self): return int(self.args[0])
+
     def get_caller(self):
         return self.ttd.jd.get_cms(int(self.args[0]))
 
@@ -402,6 +418,8 @@ class SizeTaintNode(TaintNodeBase):
     def __init__(self,ttd,index,tags,args):
         TaintNodeBase.__init__(self,ttd,index,tags,args)
 
+    def get_caller_index(self): return int(self.args[0])
+
     def get_caller(self):
         return self.ttd.jd.get_cms(int(self.args[0]))
 
@@ -27,6 +27,7 @@
 
 
 import chj.util.IndexedTable as IT
+import chj.util.PackedTable as PT
 
 import chj.index.Taint as T
 
@@ -108,6 +109,10 @@ class TaintDictionary(object):
     def read_xml_tainted_variable_ids(self,node,tag='itvids'):
         return self.get_tainted_variable_ids(int(node.get(tag)))
 
+    def pack(self):
+        '''replaces the tables by read-only packed tables (used by the pre-fork server)'''
+        PT.pack_tables(self)
+
     def write_xml(self,node):
         def f(n,r):r.write_xml(n)
         for (t,_) in self.tables:
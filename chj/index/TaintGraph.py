@@ -25,128 +25,190 @@
 # SOFTWARE.
 # ------------------------------------------------------------------------------
 
+import itertools
+
+import numpy as np
+
 from chj.util.DotGraph import DotGraph
 
+import chj.index.TaintTrail as TT
 import chj.util.fileutil as UF
 import chj.util.dotutil as UD
 import chj.util.graphutil as UG
 
 class TaintGraph():
 
-    def __init__(self,app,appname,taintsourceid,loops=False,sink=None):
+    def __init__(self,app,appname,taintsourceid,loops=False,sink=None,condense=None):
         self.app = app                   # AppAccess
         self.jd = self.app.jd            # DataDictionary
         self.loops = loops
         self.sink = sink
+        self.condense = condense         # None, 'method', or 'class'
 
-        self.xnodes = None
-        self.xedges = None
+        self.trail = None                # TaintTrail
 
         self.pathnodes = []
         self.nodes = []
-        self.edges = []
+        self.edges = []                  # (src,tgt) as in the trail file, between path nodes
+        self.graph = None                # DirectedGraph of the path nodes, built on demand
+        self.srcid = None                # root of the trail
+        self.sinkids = []
 
         self._build_graph(appname, taintsourceid)
 
-    def _get_edges(self, appname, taintsourceid):
+    def _get_trail(self, appname, taintsourceid):
         try:
-            (path,_) = UF.get_engagement_app_jars(appname)
-            UF.check_analysisdir(path)
-            xtrail = UF.get_data_taint_trail_xnode(path,int(taintsourceid))
+            self.trail = TT.get_taint_trail(self.app,int(taintsourceid))
         except UF.CHJError as e:
             print(str(e.wrap()))
             return
+        self.nodes = self.trail.nodeids.tolist()
 
-        self.xnodes = xtrail.find('node-dictionary')
-        self.xedges = xtrail.find('edges')
-
-        self.nodes = [ int(n.get('ix')) for n in self.xnodes.findall('tn') ]
-
-    def _get_root_node(self,nodes,enode):
-        tgts = []
-        for n in enode.findall('edge'):
-            tgts.append(int(n.get('src')))
-        for n in nodes:
-            if not n in tgts:
-                return n
+    def _get_sink_rows(self):
+        rows = []
+        if not self.sink is None:
+            rows.extend(self.trail.get_label_matches(self.sink).tolist())
+        if self.loops:
+            rows.extend(self.trail.get_kind_matches(TT.KIND_LC).tolist())
+        return rows
 
     def _build_graph(self, appname, taintsourceid):
-        self._get_edges(appname, taintsourceid)
+        self._get_trail(appname, taintsourceid)
+        if self.trail is None: return
 
-        pathnodes = set([])
+        root = self.trail.get_root()
+        self.srcid = None if root is None else self.nodes[root]
 
+        mask = None
         if (not self.sink is None) or self.loops:
-            sinkids = []
-
-            if not self.sink is None:
-                for n in self.nodes:
-                    cms = self.jd.ttd.get_taint_node_type(n)
-                    if self.sink in str(cms):
-                        sinkids.append(n)
-                if len(sinkids) == 0:
-                    return
-
-            if self.loops:
-                for n in self.nodes:
-                    cms = self.jd.ttd.get_taint_node_type(n)
-                    if cms.is_var() and str(cms.get_variable()) == 'lc':
-                        sinkids.append(n)
-
-            edge_adjacencylists = {}
-            for n in self.xedges.findall('edge'):
-                src = int(n.get('src'))
-                tgts = [ int(x) for x in n.get('tgts').split(',') ]
-                for t in tgts:
-                    edge_adjacencylists.setdefault(t,[])
-                    edge_adjacencylists[t].append(src)
-
-            srcid = self._get_root_node(self.nodes,self.xedges)
-
-            srcname = str(self.jd.ttd.get_taint_node_type(srcid))
-            for sinkid in sinkids:
-                sinkname = str(self.jd.ttd.get_taint_node_type(sinkid))
-
-            for sinkid in sinkids:
-                if sinkid in pathnodes: continue
-                g = UG.DirectedGraph(self.nodes,edge_adjacencylists)
-                g.find_paths(srcid,sinkid)
-                for p in g.paths:
-                    pathnodes = pathnodes.union(p)
+            sinkrows = self._get_sink_rows()
+            self.sinkids = [ self.nodes[r] for r in sinkrows ]
+            if (not self.sink is None) and len(self.sinkids) == 0:
+                return
+            if not root is None:
+                mask = self.trail.get_path_mask(root,sinkrows)
 
         # if no restrictions include all nodes
-        if len(pathnodes) == 0:
-            pathnodes = self.nodes
-
-        edges = []
-        for n in self.xedges.findall('edge'):
-            src = int(n.get('src'))
-            if src in self.nodes:
-                tgts = [ int(x) for x in n.get('tgts').split(',') ]
-                for tgt in tgts:
-                    if tgt in self.nodes:
-                        edges.append((src,tgt))
-
-        self.pathnodes = pathnodes
-        self.edges = edges
+        if mask is None or not mask.any():
+            mask = np.ones(self.trail.get_node_count(),dtype=bool)
+
+        (flowsrcs,flowtgts) = self.trail.get_subgraph_edges(mask)
+        ids = self.trail.nodeids
+        self.pathnodes = set(ids[mask].tolist())
+        self.edges = list(zip(ids[flowtgts].tolist(),ids[flowsrcs].tolist()))
         return
 
-    def as_dot(self, taintsourceid):
+    def _get_path_graph(self):
+        if self.graph is None:
+            edge_adjacencylists = {}
+            for (src,tgt) in self.edges:
+                edge_adjacencylists.setdefault(tgt,[]).append(src)
+            self.graph = UG.DirectedGraph(list(self.pathnodes),edge_adjacencylists)
+        return self.graph
+
+    def get_paths(self,maxpaths=None,maxlength=None):
+        """Return explicit paths from the root to each of the sinks, bounded by
+        maxpaths per sink and maxlength nodes per path."""
+        result = []
+        if self.srcid is None: return result
+        for sinkid in self.sinkids:
+            result.extend(self._get_path_graph().iter_paths(
+                self.srcid,sinkid,maxpaths=maxpaths,maxlength=maxlength))
+        return result
+
+    def iter_shortest_paths(self,maxlength=None):
+        """Generate the paths from the root to any of the sinks, shortest first."""
+        if self.srcid is None or len(self.sinkids) == 0: return iter([])
+        return self._get_path_graph().iter_shortest_paths(
+            self.srcid,self.sinkids,maxlength=maxlength)
+
+    def get_shortest_paths(self,k,maxlength=None):
+        """Return the k shortest paths from the root to any of the sinks."""
+        return list(itertools.islice(self.iter_shortest_paths(maxlength=maxlength),k))
+
+    def restrict_to_paths(self,paths):
+        """Restrict the graph to the nodes and edges on the given paths."""
+        pathedges = set([])
+        for p in paths:
+            for i in range(len(p) - 1):
+                pathedges.add((p[i+1],p[i]))
+        self.pathnodes = set(n for p in paths for n in p)
+        self.edges = [ e for e in self.edges if e in pathedges ]
+        self.graph = None
+
+    def is_call(self,row): return bool(self.trail.kinds[row] & TT.KIND_CALL)
+
+    def get_color(self,row):
+        kind = self.trail.kinds[row]
+        if kind & TT.KIND_VAR:
+            if kind & TT.KIND_RETURN: return 'green'
+            if kind & TT.KIND_LC: return 'red'
+        elif kind & TT.KIND_CONDITIONAL:
+            return 'yellow'
+        return None
+
+    def get_group(self,row):
+        '''returns the name of the super-node of the node (None if it is not condensed)'''
+        if self.condense == 'method':
+            ix = self.trail.callers[row]
+            return None if ix < 0 else 'm' + str(ix)
+        if self.condense == 'class':
+            ix = self.trail.classes[row]
+            return None if ix < 0 else 'c' + str(ix)
+        return None
+
+    def get_group_label(self,group):
+        ix = int(group[1:])
+        if group.startswith('m'): return self.jd.get_cms(ix).get_aqname()
+        return self.jd.get_cn(ix).get_aqname()
+
+    def get_group_color(self,rows):
+        kinds = np.bitwise_or.reduce(self.trail.kinds[rows])
+        if kinds & TT.KIND_LC: return 'red'
+        if kinds & TT.KIND_CONDITIONAL: return 'yellow'
+        if kinds & TT.KIND_RETURN: return 'green'
+        return None
+
+    def as_condensed_dot(self, taintsourceid, expand=None):
+        '''returns a graph with the nodes of each method (class) collapsed into a
+        single node, except for the nodes of the group expand; edges are labeled
+        with the number of edges they represent.'''
+        graphname = 'trail_' + str(taintsourceid)
+        dotgraph = DotGraph(graphname)
+        names = {}
+        members = {}
+        for (row,n) in enumerate(self.nodes):
+            if not n in self.pathnodes: continue
+            group = self.get_group(row)
+            if group is None or group == expand:
+                names[n] = str(n)
+                dotgraph.add_node(str(n),self.trail.dotlabels[row],shaded=self.is_call(row),
+                                      fillcolor=self.get_color(row))
+            else:
+                names[n] = group
+                members.setdefault(group,[]).append(row)
+        for (group,rows) in members.items():
+            label = self.get_group_label(group) + ' (' + str(len(rows)) + ')'
+            dotgraph.add_node(group,label,fillcolor=self.get_group_color(rows))
+        multiplicities = {}
+        for (src,tgt) in self.edges:
+            if src in names and tgt in names:
+                edge = (names[tgt],names[src])
+                if edge[0] == edge[1]: continue
+                multiplicities[edge] = multiplicities.get(edge,0) + 1
+        for ((src,tgt),count) in multiplicities.items():
+            dotgraph.add_edge(src,tgt,labeltxt=(str(count) if count > 1 else None))
+        return dotgraph
+
+    def as_dot(self, taintsourceid, expand=None):
+        if not self.condense is None:
+            return self.as_condensed_dot(taintsourceid,expand=expand)
         graphname = 'trail_' + str(taintsourceid)
         dotgraph = DotGraph(graphname)
-        for n in self.nodes:
+        for (row,n) in enumerate(self.nodes):
             if not n in self.pathnodes: continue
-            color = None
-            cms = self.app.jd.ttd.get_taint_node_type(n)
-            shaded = cms.is_call()
-            cmslabel = cms.dotlabel()
-            if cms.is_var():
-                if str(cms.get_variable()) == 'lc':
-                    color = 'red'
-                if str(cms.get_variable()) == 'return':
-                    color = 'green'
-            elif cms.is_conditional():
-                color = 'yellow'
-            dotgraph.add_node(str(n),str(cmslabel),shaded=shaded,fillcolor=color)
+            dotgraph.add_node(str(n),self.trail.dotlabels[row],shaded=self.is_call(row),
+                                  fillcolor=self.get_color(row))
         for (src,tgt) in self.edges:
             if src in self.pathnodes and tgt in self.pathnodes:
                 dotgraph.add_edge(str(tgt),str(src))
@@ -0,0 +1,305 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Compact representation of a taint trail as NumPy arrays in CSR format.
+
+Nodes are stored as rows 0..n-1 (in the order of the node dictionary of the
+trail file); edges are stored in the direction of the taint flow, which is
+from the tgt to the src of an edge in the trail file. Requires numpy.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+import xml.etree.ElementTree as ET
+
+import chj.util.fileutil as UF
+
+# version of the layout of the cached trails
+cacheversion = 2
+
+# node kinds (bit flags)
+KIND_CALL = 1
+KIND_VAR = 2
+KIND_LC = 4
+KIND_RETURN = 8
+KIND_CONDITIONAL = 16
+
+def get_node_kind(cms):
+    kind = 0
+    if cms.is_call(): kind |= KIND_CALL
+    if cms.is_var():
+        kind |= KIND_VAR
+        v = str(cms.get_variable())
+        if v == 'lc': kind |= KIND_LC
+        if v == 'return': kind |= KIND_RETURN
+    if cms.is_conditional(): kind |= KIND_CONDITIONAL
+    return kind
+
+def mk_csr(n,srcs,tgts):
+    """Return (offsets,targets) of the graph with edges srcs[i] -> tgts[i]."""
+    order = np.argsort(srcs,kind='stable')
+    targets = tgts[order]
+    counts = np.bincount(srcs,minlength=n)
+    offsets = np.zeros(n + 1,dtype=np.int64)
+    np.cumsum(counts,out=offsets[1:])
+    return (offsets,targets)
+
+def get_neighbors(offsets,targets,rows):
+    """Return the concatenation of the adjacency lists of rows (vectorized)."""
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    total = int(lengths.sum())
+    if total == 0: return np.zeros(0,dtype=np.int64)
+    # index of each neighbor: start of its row plus its position within the row
+    shifts = np.repeat(starts - np.cumsum(lengths) + lengths,lengths)
+    return targets[shifts + np.arange(total)]
+
+class TaintTrail(object):
+
+    def __init__(self,nodeids,flowsrcs,flowtgts):
+        """nodeids: node ids in dictionary order; flowsrcs, flowtgts: rows of the
+        edges, in the direction of the flow."""
+        self.nodeids = np.asarray(nodeids,dtype=np.int64)
+        self.sortedrows = np.argsort(self.nodeids,kind='stable')
+        self.sortedids = self.nodeids[self.sortedrows]
+        n = len(self.nodeids)
+        self.flowsrcs = np.asarray(flowsrcs,dtype=np.int64)
+        self.flowtgts = np.asarray(flowtgts,dtype=np.int64)
+        (self.offsets,self.targets) = mk_csr(n,self.flowsrcs,self.flowtgts)
+        (self.roffsets,self.rtargets) = mk_csr(n,self.flowtgts,self.flowsrcs)
+        self.labels = None               # str of the taint node type, per row
+        self.dotlabels = None            # dot label of the taint node type, per row
+        self.kinds = None                # KIND_ flags, per row
+        self.callers = None              # cmsix of the method of the node (-1 if none), per row
+        self.classes = None              # cnix of the class of the node (-1 if none), per row
+
+    def set_node_info(self,labels,dotlabels,kinds,callers,classes):
+        self.labels = np.asarray(labels,dtype=np.str_)
+        self.dotlabels = np.asarray(dotlabels,dtype=np.str_)
+        self.kinds = np.asarray(kinds,dtype=np.int64)
+        self.callers = np.asarray(callers,dtype=np.int64)
+        self.classes = np.asarray(classes,dtype=np.int64)
+
+    def get_label_matches(self,s):
+        """Return the rows whose label contains s."""
+        return np.flatnonzero(np.char.find(self.labels,s) >= 0)
+
+    def get_kind_matches(self,kind):
+        """Return the rows that have (all of) the given KIND_ flags."""
+        return np.flatnonzero((self.kinds & kind) == kind)
+
+    def get_node_count(self): return len(self.nodeids)
+
+    def get_edge_count(self): return len(self.flowsrcs)
+
+    def get_rows(self,ids):
+        """Return the rows of the given node ids (-1 for ids not in the trail)."""
+        ids = np.asarray(ids,dtype=np.int64)
+        if len(self.sortedids) == 0: return np.full(len(ids),-1,dtype=np.int64)
+        pos = np.searchsorted(self.sortedids,ids)
+        pos = np.minimum(pos,len(self.sortedids) - 1)
+        found = self.sortedids[pos] == ids
+        return np.where(found,self.sortedrows[pos],-1)
+
+    def get_row(self,id): return int(self.get_rows([ id ])[0])
+
+    def get_ids(self,rows): return self.nodeids[rows]
+
+    def get_out_degrees(self): return np.diff(self.offsets)
+
+    def get_in_degrees(self): return np.diff(self.roffsets)
+
+    def get_root(self):
+        """Return the row of the origin: the first node without incoming flow."""
+        roots = np.flatnonzero(self.get_in_degrees() == 0)
+        return int(roots[0]) if len(roots) > 0 else None
+
+    def get_successors(self,row):
+        return self.targets[self.offsets[row]:self.offsets[row+1]]
+
+    def get_predecessors(self,row):
+        return self.rtargets[self.roffsets[row]:self.roffsets[row+1]]
+
+    def get_reachable(self,rows,reverse=False):
+        """Return a boolean mask of the rows reachable from rows along the flow
+        (against the flow if reverse is True), by level-synchronous BFS."""
+        (offsets,targets) = (self.roffsets,self.rtargets) if reverse else (self.offsets,self.targets)
+        visited = np.zeros(self.get_node_count(),dtype=bool)
+        frontier = np.unique(np.asarray(rows,dtype=np.int64))
+        visited[frontier] = True
+        while len(frontier) > 0:
+            neighbors = get_neighbors(offsets,targets,frontier)
+            neighbors = neighbors[~visited[neighbors]]
+            frontier = np.unique(neighbors)
+            visited[frontier] = True
+        return visited
+
+    def get_path_mask(self,srcrow,sinkrows):
+        """Return a boolean mask of the rows that lie on a path from srcrow to
+        any of sinkrows."""
+        sinkrows = np.asarray(sinkrows,dtype=np.int64)
+        forward = self.get_reachable([ srcrow ])
+        if len(sinkrows) == 0 or not forward[sinkrows].any():
+            return np.zeros(self.get_node_count(),dtype=bool)
+        return forward & self.get_reachable(sinkrows,reverse=True)
+
+    def get_subgraph_edges(self,mask):
+        """Return the edges (as rows, in the direction of the flow) between the
+        rows selected by mask."""
+        keep = mask[self.flowsrcs] & mask[self.flowtgts]
+        return (self.flowsrcs[keep],self.flowtgts[keep])
+
+    def get_subgraph(self,mask):
+        """Return the TaintTrail induced by the rows selected by mask, and the
+        rows of its nodes in this trail."""
+        rows = np.flatnonzero(mask)
+        newrows = np.full(self.get_node_count(),-1,dtype=np.int64)
+        newrows[rows] = np.arange(len(rows))
+        (srcs,tgts) = self.get_subgraph_edges(mask)
+        trail = TaintTrail(self.nodeids[rows],newrows[srcs],newrows[tgts])
+        if not self.kinds is None:
+            trail.set_node_info(self.labels[rows],self.dotlabels[rows],self.kinds[rows],
+                                    self.callers[rows],self.classes[rows])
+        return (trail,rows)
+
+    def get_degree_stats(self):
+        result = {}
+        for (name,degrees) in [ ('out',self.get_out_degrees()), ('in',self.get_in_degrees()) ]:
+            if len(degrees) == 0: continue
+            result[name] = {
+                'max': int(degrees.max()),
+                'mean': float(degrees.mean()),
+                'zero': int((degrees == 0).sum()),
+                'histogram': dict((int(d),int(c)) for (d,c) in
+                                      zip(*np.unique(degrees,return_counts=True))) }
+        return result
+
+def read_taint_trail(path,id):
+    """Parse the taint trail file for the given taint origin into a TaintTrail."""
+    filename = UF.get_data_taint_trail_filename(path,id)
+    if not os.path.isfile(filename):
+        raise UF.CHJTaintTrailNotFoundError(
+            path,filename,UF.list_data_taint_trail_filenames(path))
+    nodeids = []
+    edgesrcs = []
+    edgetgts = []
+    try:
+        for (event,elem) in ET.iterparse(filename):
+            if elem.tag == 'tn':
+                nodeids.append(elem.get('ix'))
+                elem.clear()
+            elif elem.tag == 'edge':
+                edgesrcs.append(elem.get('src'))
+                edgetgts.append(elem.get('tgts'))
+                elem.clear()
+    except ET.ParseError as e:
+        raise UF.CHJXmlParseError(filename,e.code,e.position)
+    nodeids = np.array(nodeids,dtype=np.int64)
+    if len(edgetgts) > 0:
+        counts = np.array([ t.count(',') + 1 for t in edgetgts ],dtype=np.int64)
+        xsrcs = np.repeat(np.array(edgesrcs,dtype=np.int64),counts)
+        xtgts = np.array(','.join(edgetgts).split(','),dtype=np.int64)
+    else:
+        xsrcs = np.zeros(0,dtype=np.int64)
+        xtgts = np.zeros(0,dtype=np.int64)
+    trail = TaintTrail(nodeids,[],[])
+    srcrows = trail.get_rows(xsrcs)
+    tgtrows = trail.get_rows(xtgts)
+    keep = (srcrows >= 0) & (tgtrows >= 0)
+    # taint flows from the tgt of an edge to its src
+    return TaintTrail(nodeids,tgtrows[keep],srcrows[keep])
+
+def get_fingerprint(path,id):
+    filenames = [ UF.get_data_taint_trail_filename(path,id),
+                  UF.get_data_taint_origins_filename(path),
+                  UF.get_datadictionary_filename(path) ]
+    result = [ cacheversion ]
+    for f in filenames:
+        fp = UF.get_file_fingerprint(f)
+        result.extend([ -1, -1 ] if fp is None else list(fp))
+    return np.array(result,dtype=np.int64)
+
+def save_taint_trail(filename,trail,fingerprint):
+    """Write the trail to filename through a temporary file of its own, so that
+    concurrent writers (server threads or processes) do not clobber each other."""
+    cachedir = os.path.dirname(filename)
+    if not os.path.isdir(cachedir): os.makedirs(cachedir,exist_ok=True)
+    (fd,tmpfilename) = tempfile.mkstemp(dir=cachedir,suffix='.tmp')
+    try:
+        with os.fdopen(fd,'wb') as fp:
+            np.savez(fp,fingerprint=fingerprint,nodeids=trail.nodeids,
+                         flowsrcs=trail.flowsrcs,flowtgts=trail.flowtgts,
+                         labels=trail.labels,dotlabels=trail.dotlabels,kinds=trail.kinds,
+                         callers=trail.callers,classes=trail.classes)
+        os.replace(tmpfilename,filename)
+    finally:
+        if os.path.isfile(tmpfilename): os.remove(tmpfilename)
+
+def load_taint_trail(filename,fingerprint):
+    """Return the cached trail, or None if it is absent or out of date."""
+    if not os.path.isfile(filename): return None
+    try:
+        with np.load(filename) as data:
+            if not np.array_equal(data['fingerprint'],fingerprint): return None
+            trail = TaintTrail(data['nodeids'],data['flowsrcs'],data['flowtgts'])
+            trail.set_node_info(data['labels'],data['dotlabels'],data['kinds'],
+                                    data['callers'],data['classes'])
+            return trail
+    except (IOError,OSError,ValueError,KeyError) as e:
+        print('Ignoring taint trail cache ' + filename + ': ' + str(e))
+        return None
+
+def get_taint_trail(app,id):
+    """Return the trail for the given taint origin, with node labels and kinds,
+    from the trail cache if it is up to date, otherwise from the trail file
+    (and update the cache)."""
+    fingerprint = get_fingerprint(app.path,id)
+    cachefilename = UF.get_taint_trail_cache_filename(app.path,id)
+    trail = load_taint_trail(cachefilename,fingerprint)
+    if not trail is None: return trail
+    trail = read_taint_trail(app.path,id)
+    labels = []
+    dotlabels = []
+    kinds = []
+    callers = []
+    classes = []
+    for n in trail.nodeids.tolist():
+        cms = app.jd.ttd.get_taint_node_type(n)
+        labels.append(str(cms))
+        dotlabels.append(str(cms.dotlabel()))
+        kinds.append(get_node_kind(cms))
+        cmsix = cms.get_caller_index()
+        callers.append(-1 if cmsix is None else cmsix)
+        classes.append(-1 if cmsix is None else app.jd.get_cms(cmsix).cnix)
+    trail.set_node_info(labels,dotlabels,kinds,callers,classes)
+    try:
+        save_taint_trail(cachefilename,trail,fingerprint)
+    except (IOError,OSError) as e:
+        print('Unable to save taint trail cache ' + cachefilename + ': ' + str(e))
+    return trail
@@ -43,6 +43,11 @@ class JDKModels():
             if info.filename.endswith('.xml') and not (info.filename == 'jdk_jar_version.xml'):
                 self.filenames.append(info.filename)
 
+    def reopen(self):
+        """Open a fresh handle on the summaries jar; a forked process must not
+        share the file offset of its parent's handle."""
+        self.jdkjar = zipfile.ZipFile(Config().jdksummaries,'r')
+
     def get_class_count(self): return len(self.filenames)
 
     def iter_class_summaries(self,f):
@@ -30,9 +30,11 @@ import json
 import os
 import traceback
 
+from collections import OrderedDict
+
 import xml.etree.ElementTree as ET
 
-from flask import Flask, render_template, render_template_string, jsonify, request, Markup
+from flask import Flask, render_template, render_template_string, jsonify, request, Markup, Response
 
 import chj.util.fileutil as UF
 import chj.util.xmlutil as UX
@@ -40,8 +42,11 @@ import chj.index.AppAccess as AP
 import chj.util.dotutil as UD
 import chj.util.svgutil as UG
 import chj.util.analysisutil as UA
+import chj.util.perfmetrics as UM
+import chj.util.reportcache as UR
 
 from chj.index.TaintGraph import TaintGraph
+from chj.util.Config import Config
 
 from chj.reporting.BytecodeReport import BytecodeReport
 from chj.reporting.BranchConditions import BranchConditions
@@ -57,6 +62,40 @@ from chj.reporting.TaintOrigins import TaintOrigins
 # ======================================================================
 
 app = Flask(__name__)
+config = Config()
+
+# loaded applications, keyed by project: (fingerprint, AppAccess), least recently used first;
+# at most appcachesize applications are kept besides those preloaded (pinned) by the
+# pre-fork server
+appcache = OrderedDict()
+appcachesize = 2
+pinnedapps = set()
+
+@app.before_request
+def start_request_metrics():
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    UM.start_request(route)
+
+@app.after_request
+def end_request_metrics(response):
+    UM.end_request(request.method, response.status_code)
+    return response
+
+@app.route('/metrics')
+def loadmetrics():
+    return Response(UM.to_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics/json')
+def loadmetricsjson():
+    return jsonify(UM.as_dictionary())
+
+def to_json(result):
+    with UM.phase('serialization'):
+        return jsonify(result)
+
+def render_page(template, **kwargs):
+    with UM.phase('serialization'):
+        return render_template(template, **kwargs)
 
 @app.route('/')
 def index():
@@ -81,15 +120,15 @@ def loadprojects():
     else:
         result['meta']['status'] = 'ok'
         result['content'] = projects
-    return jsonify(result)
+    return to_json(result)
 
 @app.route('/branches/<engagement>/<project>')
 def loadbranches(engagement, project):
     result = {}
     result['meta'] = {}
     try:
-        app = load_engagement_app(engagement, project)
-        branchsummary = BranchConditions(app).as_dictionary()
+        branchsummary = load_cached_report(engagement, project, 'branches', [ 'analysis' ],
+                                           lambda app: BranchConditions(app).as_dictionary())
     except Exception as e:
         result['meta']['status'] = 'fail'
         result['meta']['reason'] = print(e)
@@ -97,16 +136,16 @@ def loadbranches(engagement, project):
     else:
         result['meta']['status'] = 'ok'
         result['content'] = branchsummary
-    return jsonify(result)
+    return to_json(result)
 
 @app.route('/costs/<engagement>/<project>')
 def loadcosts(engagement, project):
     result = {}
     result['meta'] = {}
     try:
-        app = load_engagement_app(engagement, project)
-        costreport = CostSummary(app)
-        costsummary = costreport.as_dictionary()
+        costsummary = load_cached_report(engagement, project, 'costs',
+                                         [ 'analysis', 'cost', 'userdata' ],
+                                         lambda app: CostSummary(app).as_dictionary())
     except Exception as e:
         result['meta']['status'] = 'fail'
         result['meta']['reason'] = print(e)
@@ -114,16 +153,15 @@ def loadcosts(engagement, project):
     else:
         result['meta']['status'] = 'ok' 
         result['content'] = costsummary
-    return jsonify(result)
+    return to_json(result)
 
 @app.route('/exceptions/<engagement>/<project>')
 def loadexceptions(engagement, project):
     result = {}
     result['meta'] = {}
     try:
-        app = load_engagement_app(engagement, project)
-        exceptionreport = ExceptionHandlers(app)
-        exceptionsummary = exceptionreport.as_dictionary()
+        exceptionsummary = load_cached_report(engagement, project, 'exceptions', [ 'analysis' ],
+                                              lambda app: ExceptionHandlers(app).as_dictionary())
     except Exception as e:
         result['meta']['status'] = 'fail'
         result['meta']['reason'] = print(str(e))
@@ -131,15 +169,15 @@ def loadexceptions(engagement, project):
     else:
         result['meta']['status'] = 'ok'       
         result['content'] = exceptionsummary
-    return jsonify(result)
+    return to_json(result)
 
 @app.route('/loops/<engagement>/<project>')
 def loadloops(engagement, project):
     result = {}
     result['meta'] = {}
     try:
-        app = load_engagement_app(engagement, project)
-        loopsummary = LoopSummary(app).as_dictionary()
+        loopsummary = load_cached_report(engagement, project, 'loops', [ 'analysis' ],
+                                         lambda app: LoopSummary(app).as_dictionary())
     except Exception as e:
         result['meta']['status'] = 'fail'
         result['meta']['reason'] = print(e)
@@ -147,7 +185,7 @@ def loadloops(engagement, project):
     else:
         result['meta']['status'] = 'ok'       
         result['content'] = loopsummary
-    return jsonify(result)
+    return to_json(result)
 
 @app.route('/project/<engagement>/<project>')
 def loadproject(engagement, project):
@@ -166,7 +204,7 @@ def loadproject(engagement, project):
     else:
         result['meta']['status'] = 'ok'
         result['content'] = classes
-    return jsonify(result)
+    return to_json(result)
 
 @app.route('/strings/<engagement>/<project>')
 def loadstrings(engagement, project):
@@ -193,15 +231,15 @@ def loadstrings(engagement, project):
     else:
         result['meta']['status'] = 'ok'       
         result['content'] = stringsummary
-    return jsonify(result)
+    return to_json(result)
     
 @app.route('/recursive/<engagement>/<project>')
 def loadrecursive(engagement, project):
     result = {}
     result['meta'] = {}
     try:
-        app = load_engagement_app(engagement, project)
-        recursionsummary = Recursion(app).as_dictionary()
+        recursionsummary = load_cached_report(engagement, project, 'recursion', [ 'analysis' ],
+                                              lambda app: Recursion(app).as_dictionary())
     except Exception as e:
         result['meta']['status'] = 'fail'
         result['meta']['reason'] = print(e)
@@ -209,7 +247,7 @@ def loadrecursive(engagement, project):
     else:
         result['meta']['status'] = 'ok'       
         result['content'] = recursionsummary
-    return jsonify(result)
+    return to_json(result)
     
 @app.route('/reflective/<engagement>/<project>')
 def loadreflective(engagement, project):
@@ -261,15 +299,15 @@ def loadreflective(engagement, project):
     else:
         result['meta']['status'] = 'ok'       
         result['content'] = reflectionsummary
-    return jsonify(result)
+    return to_json(result)
 
 @app.route('/staticfieldinits/<engagement>/<project>')
 def loadstaticfieldinits(engagement, project):
     result = {}
     result['meta'] = {}
     try:
-        app = load_engagement_app(engagement, project)
-        sfsummary = StaticFields(app).as_dictionary()
+        sfsummary = load_cached_report(engagement, project, 'staticfields', [ 'analysis' ],
+                                       lambda app: StaticFields(app).as_dictionary())
     except Exception as e:
         result['meta']['status'] = 'fail'
         result['meta']['reason'] = print(e)
@@ -277,7 +315,7 @@ def loadstaticfieldinits(engagement, project):
     else:
         result['meta']['status'] = 'ok'       
         result['content'] = sfsummary
-    return jsonify(result)
+    return to_json(result)
 
 @app.route('/taintorigins/<engagement>/<project>')
 def loadtaintorigins(engagement, project):
@@ -293,7 +331,7 @@ def loadtaintorigins(engagement, project):
     else:
         result['meta']['status'] = 'ok'       
         result['content'] = taintsummary
-    return jsonify(result)
+    return to_json(result)
 
 @app.route('/taint/<engagement>/<project>/<index>', methods=['GET', 'POST'])
 def loadtaintgraph(engagement, project, index):
@@ -301,6 +339,9 @@ def loadtaintgraph(engagement, project, index):
     result['meta'] = {}
     loops = False
     sink = None
+    condense = None
+    k = None
+    maxlength = None
     try:
         title = engagement + ":" + project + ":" + index
         app = load_engagement_app(engagement, project)
@@ -311,14 +352,19 @@ def loadtaintgraph(engagement, project, index):
             req = request.form
             loops = True if 'loops' in req else False
             sink = req['sinkid'] if 'sinkid' in req else None
+            condense = req['condense'] if req.get('condense') in ['method', 'class'] else None
+            k = int(req['k']) if req.get('k', '').isdigit() else None
+            maxlength = int(req['maxlength']) if req.get('maxlength', '').isdigit() else None
 
-        taintgraph = TaintGraph(app, project, index, loops=loops, sink=sink)
+        taintgraph = TaintGraph(app, project, index, loops=loops, sink=sink, condense=condense)
+        if not k is None:
+            taintgraph.restrict_to_paths(taintgraph.get_shortest_paths(k, maxlength=maxlength))
         dotgraph = taintgraph.as_dot(index)
         svggraph = UG.get_svg(app.path, dotgraph)
         svg = ET.tostring(svggraph.getroot(), encoding='unicode', method='html')
 
         if request.method == 'GET':
-            template = render_template('taint.html', title=title, body=Markup(svg), name=name,
+            template = render_page('taint.html', title=title, body=Markup(svg), name=name,
                                         eng=engagement, proj=project, index=index)
     except Exception as e:
         result['meta']['status'] = 'fail'
@@ -334,12 +380,57 @@ def loadtaintgraph(engagement, project, index):
             result['content']['svg'] = Markup(svg)
             return result
 
+@app.route('/taint/<engagement>/<project>/<index>/expand/<group>', methods=['POST'])
+def expandtaintgraph(engagement, project, index, group):
+    result = {}
+    result['meta'] = {}
+    try:
+        app = load_engagement_app(engagement, project)
+        req = request.form
+        loops = True if 'loops' in req else False
+        sink = req['sinkid'] if 'sinkid' in req else None
+        condense = 'class' if group.startswith('c') else 'method'
+
+        taintgraph = TaintGraph(app, project, index, loops=loops, sink=sink, condense=condense)
+        dotgraph = taintgraph.as_dot(index, expand=group)
+        svggraph = UG.get_svg(app.path, dotgraph)
+        svg = ET.tostring(svggraph.getroot(), encoding='unicode', method='html')
+    except Exception as e:
+        result['meta']['status'] = 'fail'
+        result['meta']['reason'] = str(e)
+        traceback.print_exc()
+    else:
+        result['meta']['status'] = 'ok'
+        result['content'] = {}
+        result['content']['svg'] = Markup(svg)
+    return to_json(result)
+
 def load_engagement_app(engagement, project):
     (path, jars) = UF.get_engagement_app_data(project)
     UF.check_analysisdir(path)
-    app = AP.AppAccess(path)
+    fingerprint = UF.get_analysis_fingerprint(path)
+    if project in appcache and appcache[project][0] == fingerprint:
+        UM.record_cache_access('app', True)
+        appcache.move_to_end(project)
+        return appcache[project][1]
+    UM.record_cache_access('app', False)
+    appcache.pop(project, None)
+    with UM.phase('app-load'):
+        app = AP.AppAccess(path)
+    appcache[project] = (fingerprint, app)
+    unpinned = [ p for p in appcache if not p in pinnedapps ]
+    for p in unpinned[:max(0, len(unpinned) - appcachesize)]:
+        del appcache[p]
     return app
 
+def load_cached_report(engagement, project, report, deps, f):
+    """Returns the result of f(app), computed only if there is no cached
+    result that is current with respect to deps (shared with the command line)."""
+    (path, jars) = UF.get_engagement_app_data(project)
+    UF.check_analysisdir(path)
+    return UR.get_report(path, report, {}, deps,
+                         lambda: f(load_engagement_app(engagement, project)))
+
 def get_method_body(engagement, project, cmsix):
     app = load_engagement_app(engagement, project)
     mname = app.get_method(int(cmsix)).get_qname()
@@ -355,13 +446,13 @@ def load_method(engagement, project, cmsix):
     try:
         (mname, body) = get_method_body(engagement, project, cmsix)
         title = engagement + ":" + project + ":" + cmsix
-        template = render_template('method.html', title=title, body=Markup(body), name=mname,
+        template = render_page('method.html', title=title, body=Markup(body), name=mname,
                                         eng=engagement, proj=project, index=cmsix)
     except Exception as e:
         result['meta']['status'] = 'fail'
         result['meta']['reason'] = print(e)
         traceback.print_exc()
-        return jsonify(result)
+        return to_json(result)
     else:
         return template
 
@@ -376,13 +467,13 @@ def load_bytecode(engagement, project, cnix):
         body = Markup(ET.tostring(mk_class_code_table(bytecode, engagement, project), 
                                         encoding='unicode', method='html')) 
         title = engagement + ":" + project + ":" + cnix
-        template = render_template('class.html', title=title, body=body, name=cname, 
+        template = render_page('class.html', title=title, body=body, name=cname, 
                                         eng=engagement, proj=project, index=cnix)
     except Exception as e:
         result['meta']['status'] = 'fail'
         result['meta']['reason'] = print(e)
         traceback.print_exc()
-        return jsonify(result)
+        return to_json(result)
     else:
         return template
 
@@ -407,7 +498,7 @@ def load_method_cg(engagement, project, cmsix):
         result['meta']['status'] = 'ok'
         result['content'] = {}
         result['content']['svg'] = svg
-    return jsonify(result)
+    return to_json(result)
 
 @app.route('/methodrevcg/<engagement>/<project>/<cmsix>')
 def load_method_rev_cg(engagement, project, cmsix):
@@ -429,7 +520,17 @@ def load_method_rev_cg(engagement, project, cmsix):
         result['meta']['status'] = 'ok'
         result['content'] = {}
         result['content']['svg'] = svg
-    return jsonify(result)
+    return to_json(result)
+
+def get_cfg_svg(app, cfg, methodcost=None, simplecost=False):
+    if config.cfglayout == 'native':
+        with UM.phase('layout'):
+            return cfg.as_svg(methodcost=methodcost, simplecost=simplecost)
+    (nodes, dotgraph) = cfg.as_dot(methodcost=methodcost, simplecost=simplecost)
+    svggraph = UG.get_svg(app.path, dotgraph)
+    UG.append_pcs(svggraph, nodes)
+    UG.append_loop_levels(svggraph, cfg.get_loop_level_counts())
+    return svggraph
 
 @app.route('/methodcfg/<engagement>/<project>/<cmsix>')
 def load_method_cfg(engagement, project, cmsix):
@@ -439,13 +540,8 @@ def load_method_cfg(engagement, project, cmsix):
         app = load_engagement_app(engagement, project)
         cfg = app.get_method(int(cmsix)).get_cfg()
 
-        (nodes, dotgraph) = cfg.as_dot()
-        svggraph = UG.get_svg(app.path, dotgraph)
-
-        loop_levels = cfg.get_loop_level_counts()
-        UG.append_pcs(svggraph, nodes)
-        UG.append_loop_levels(svggraph, loop_levels)
-        svg = ET.tostring(svggraph.getroot(), encoding='unicode', method='html') 
+        svggraph = get_cfg_svg(app, cfg)
+        svg = ET.tostring(svggraph.getroot(), encoding='unicode', method='html')
     except Exception as e:
         result['meta']['status'] = 'fail'
         result['meta']['reason'] = print(e)
@@ -454,7 +550,7 @@ def load_method_cfg(engagement, project, cmsix):
         result['meta']['status'] = 'ok'
         result['content'] = {}
         result['content']['svg'] = svg
-    return jsonify(result) 
+    return to_json(result) 
 
 @app.route('/methodcfgcost/<engagement>/<project>/<cmsix>')
 def load_method_cfg_cost(engagement, project, cmsix):
@@ -465,12 +561,7 @@ def load_method_cfg_cost(engagement, project, cmsix):
         cfg = app.get_method(int(cmsix)).get_cfg()
         methodcost = app.get_costmodel().get_method_cost(int(cmsix))
 
-        (nodes, dotgraph) = cfg.as_dot(methodcost=methodcost)
-        svggraph = UG.get_svg(app.path, dotgraph)
-
-        loop_levels = cfg.get_loop_level_counts()
-        UG.append_pcs(svggraph, nodes)
-        UG.append_loop_levels(svggraph, loop_levels)
+        svggraph = get_cfg_svg(app, cfg, methodcost=methodcost)
         svg = ET.tostring(svggraph.getroot(), encoding='unicode', method='html')
     except Exception as e:
         result['meta']['status'] = 'fail'
@@ -480,7 +571,7 @@ def load_method_cfg_cost(engagement, project, cmsix):
         result['meta']['status'] = 'ok'
         result['content'] = {}
         result['content']['svg'] = svg
-    return jsonify(result)
+    return to_json(result)
 
 @app.route('/methodsimplecfgcost/<engagement>/<project>/<cmsix>')
 def load_method_simple_cfg_cost(engagement, project, cmsix):
@@ -491,12 +582,7 @@ def load_method_simple_cfg_cost(engagement, project, cmsix):
         cfg = app.get_method(int(cmsix)).get_cfg()
         methodcost = app.get_costmodel().get_method_cost(int(cmsix))
 
-        (nodes, dotgraph) = cfg.as_dot(methodcost=methodcost,simplecost=True)
-        svggraph = UG.get_svg(app.path, dotgraph)
-
-        loop_levels = cfg.get_loop_level_counts()
-        UG.append_pcs(svggraph, nodes)
-        UG.append_loop_levels(svggraph, loop_levels)
+        svggraph = get_cfg_svg(app, cfg, methodcost=methodcost, simplecost=True)
         svg = ET.tostring(svggraph.getroot(), encoding='unicode', method='html')
     except Exception as e:
         result['meta']['status'] = 'fail'
@@ -506,7 +592,7 @@ def load_method_simple_cfg_cost(engagement, project, cmsix):
         result['meta']['status'] = 'ok'
         result['content'] = {}
         result['content']['svg'] = svg
-    return jsonify(result)
+    return to_json(result)
 
 #@app.route('/', defaults={'path': ''})
 #@app.route('/<path:path>')
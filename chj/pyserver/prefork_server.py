@@ -0,0 +1,195 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Pre-fork launcher for the flask application.
+
+The master process loads the configured engagement applications once, packs
+their dictionaries into flat read-only tables (util/PackedTable.py), moves all
+loaded objects out of the reach of the garbage collector (gc.freeze), and then
+forks the worker processes. The workers share the loaded dictionaries,
+classes, and cost models with the master copy-on-write. Dictionary records are
+constructed in the worker when a request needs them, so that reading them
+does not update reference counts on (and copy) the shared pages; the classes
+and cost models are kept as objects, and their pages are copied when a request
+touches them. The memory private to a worker is reported at /metrics as
+process_private_memory_bytes.
+
+Signals (sent to the master):
+  SIGHUP : reload the applications (e.g., after reanalysis) and re-fork
+  SIGTERM, SIGINT: stop the workers (after their current request) and exit
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+from werkzeug.serving import make_server
+
+import chj.pyserver.flask_app as F
+import chj.util.fileutil as UF
+import chj.util.perfmetrics as UM
+
+from chj.util.Config import Config
+
+def parse():
+    config = Config()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host',help='address to listen on',default='127.0.0.1')
+    parser.add_argument('--port',help='port to listen on',type=int,default=5000)
+    parser.add_argument('--workers',help='number of worker processes',type=int,
+                            default=config.preforkworkers)
+    parser.add_argument('--apps',nargs='*',
+                            help='applications to preload, as engagement:project ' +
+                            '(default: config.preforkapps)')
+    args = parser.parse_args()
+    return args
+
+def get_apps(args):
+    if args.apps is None:
+        return Config().preforkapps
+    result = []
+    for a in args.apps:
+        if not ':' in a:
+            print('Application ' + a + ' should be given as engagement:project')
+            exit(1)
+        (engagement,project) = a.split(':',1)
+        result.append((engagement,project))
+    return result
+
+def preload(apps):
+    """Load the applications and all of their lazily loaded tables."""
+    F.appcache.clear()
+    F.pinnedapps.clear()
+    gc.unfreeze()
+    for (engagement,project) in apps:
+        F.pinnedapps.add(project)
+        t0 = time.time()
+        try:
+            app = F.load_engagement_app(engagement,project)
+            app.get_classes()
+            app.get_callgraph()
+            app.get_costmodel()
+            app.pack()
+        except UF.CHJError as e:
+            print(str(e.wrap()))
+            continue
+        except Exception as e:
+            print('Unable to preload ' + engagement + ':' + project + ': ' + str(e))
+            traceback.print_exc()
+            continue
+        print('Preloaded ' + engagement + ':' + project + ' in '
+                  + str(round(time.time() - t0,2)) + ' secs')
+    # collect once, so that the remaining objects are not touched by later collections
+    # (which would write to their gc headers and unshare their pages)
+    gc.collect()
+    gc.freeze()
+
+def run_worker(sock):
+    for (fp,app) in F.appcache.values():
+        app.jdkmodels.reopen()
+    UM.reset()
+    signal.signal(signal.SIGHUP,signal.SIG_DFL)
+    server = make_server(sock.getsockname()[0],sock.getsockname()[1],F.app,
+                             fd=sock.fileno())
+    def stop(signum,frame):
+        threading.Thread(target=server.shutdown).start()
+    signal.signal(signal.SIGTERM,stop)
+    signal.signal(signal.SIGINT,signal.SIG_IGN)
+    server.serve_forever()
+    os._exit(0)
+
+def spawn(sock):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(sock)
+        except BaseException:
+            traceback.print_exc()
+        os._exit(1)
+    return pid
+
+def stop_workers(workers):
+    for pid in workers:
+        try:
+            os.kill(pid,signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    for pid in workers:
+        try:
+            os.waitpid(pid,0)
+        except ChildProcessError:
+            pass
+
+if __name__ == '__main__':
+
+    args = parse()
+    apps = get_apps(args)
+    preload(apps)
+
+    sock = socket.socket(socket.AF_INET,socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET,socket.SO_REUSEADDR,1)
+    sock.bind((args.host,args.port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+
+    state = { 'reload': False, 'stop': False }
+    def request_reload(signum,frame): state['reload'] = True
+    def request_stop(signum,frame): state['stop'] = True
+    signal.signal(signal.SIGHUP,request_reload)
+    signal.signal(signal.SIGTERM,request_stop)
+    signal.signal(signal.SIGINT,request_stop)
+
+    workers = set([ spawn(sock) for i in range(args.workers) ])
+    print('Master ' + str(os.getpid()) + ' serving on ' + args.host + ':' + str(args.port)
+              + ' with ' + str(args.workers) + ' workers')
+
+    while not state['stop']:
+        if state['reload']:
+            state['reload'] = False
+            print('Reloading applications')
+            # the old workers keep serving until the new ones are forked
+            preload(apps)
+            oldworkers = workers
+            workers = set([ spawn(sock) for i in range(args.workers) ])
+            stop_workers(oldworkers)
+        try:
+            (pid,status) = os.waitpid(-1,os.WNOHANG)
+        except ChildProcessError:
+            (pid,status) = (0,0)
+        if pid in workers and not state['stop']:
+            print('Worker ' + str(pid) + ' exited (status ' + str(status) + '); restarting')
+            workers.remove(pid)
+            workers.add(spawn(sock))
+        else:
+            time.sleep(0.5)
+
+    stop_workers(workers)
+    sock.close()
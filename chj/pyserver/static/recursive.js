@@ -63,43 +63,38 @@ var Recursive = {
             new_recursion_data.appendChild(table2);
         }
 
-        var recursive2cycles = response["recursive2cycles"];
-        if (recursive2cycles.length > 0) {
+        var recursivesccs = response["recursivesccs"];
+        for (var i = 0; i < recursivesccs.length; i++) {
+            var scc = recursivesccs[i];
             var table3 = document.createElement('table');
             table3.setAttribute('id', 'datatable');
             table3.classList.add('balanced');
             var header_row = document.createElement('tr');
-            Util.add_span_table_header("Size 2 cycles", header_row, 3);
+            Util.add_span_table_header("Recursive component " + (i + 1) + " (" + scc["size"] +
+                " methods, " + scc["entrypoints"].length + " entry points)", header_row, 2);
             table3.appendChild(header_row);
 
-            for (var i = 0; i < recursive2cycles.length; i++) {
-                var drow1 = document.createElement('tr');
-                var drow2 = document.createElement('tr');
-                var drow3 = document.createElement('tr');
-
-                var callercmsix = recursive2cycles[i][0]
-                var calleecmsix = recursive2cycles[i][2]
-                var subcalleecmsix = recursive2cycles[i][4]
-
-                var callername = Util.build_method_name(recursive2cycles[i][1], callercmsix);
-                var calleename = Util.build_method_name(recursive2cycles[i][3], calleecmsix);
-                var subcalleename = Util.build_method_name(recursive2cycles[i][5], subcalleecmsix);
-
-                var dcaller = Util.add_table_data_with_link(callername, drow1, Util.get_method_link(callercmsix));
-                var dcallee = Util.add_table_data_with_link("==> " + calleename, drow2, Util.get_method_link(calleecmsix));
-                var dsubcallee = Util.add_table_data_with_link("====> " + subcalleename, drow3, Util.get_method_link(subcalleecmsix));
+            for (var j = 0; j < scc["members"].length; j++) {
+                var member = scc["members"][j];
+                var drow = document.createElement('tr');
 
-                dcaller.style.border = '1px black';
-                dcallee.style.border = '1px black';
-                dsubcallee.style.border = '1px black';
+                var cmsix = member[0];
+                var methodname = Util.build_method_name(member[1], cmsix);
+                if (member[2]) {
+                    methodname = "(entry) " + methodname;
+                }
+                Util.add_table_data_with_link(methodname, drow, Util.get_method_link(cmsix));
 
-                dcaller.style.borderStyle = 'solid solid hidden solid';
-                dcallee.style.borderStyle = 'hidden solid hidden solid';
-                dsubcallee.style.borderStyle = 'hidden solid solid solid';
+                var witness = member[3];
+                var cycle = [];
+                for (var k = 1; k < witness.length; k++) {
+                    cycle.push(Util.build_method_name(witness[k][1], witness[k][0]));
+                }
+                var dcycle = document.createElement('td');
+                dcycle.textContent = "==> " + cycle.join(" ==> ");
+                drow.appendChild(dcycle);
 
-                table3.appendChild(drow1);
-                table3.appendChild(drow2);
-                table3.appendChild(drow3);
+                table3.appendChild(drow);
             }
             new_recursion_data.appendChild(table3);
         }
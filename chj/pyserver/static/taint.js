@@ -9,22 +9,57 @@ var navengagement = null;
 var navproject = null;
 var cmsix = null;
 
-function loadtaint() {
-    show_overlay()
-
+function get_form_data() {
     var sink = document.getElementById("tsink").value;
     var loops = document.getElementById("loopsbox").checked;
+    var condense = document.getElementById("condense").value;
     var formData = new FormData();
     if(sink !== '') {formData.append("sinkid", sink);}
     if(loops === true) {formData.append("loops", loops);}
+    if(condense !== '') {formData.append("condense", condense);}
+    var k = document.getElementById("tpathk").value;
+    var maxlength = document.getElementById("tpathmaxlength").value;
+    if(k !== '') {formData.append("k", k);}
+    if(maxlength !== '') {formData.append("maxlength", maxlength);}
+    return formData;
+}
+
+function loadtaint() {
+    post_taint("/taint/" + navengagement + "/" + navproject + "/" + cmsix);
+}
+
+function expandgroup(group) {
+    post_taint("/taint/" + navengagement + "/" + navproject + "/" + cmsix + "/expand/" + group);
+}
+
+//Condensed method (class) nodes are named m<cmsix> (c<cnix>); clicking one expands it
+function add_group_links() {
+    var nodes = document.getElementsByClassName('node');
+    for (var i = 0; i < nodes.length; i++) {
+        var title = nodes[i].getElementsByTagName('title')[0];
+        if (title && /^[mc][0-9]+$/.test(title.textContent)) {
+            var group = title.textContent;
+            nodes[i].addEventListener('click', function(g) {
+                return function() {expandgroup(g)};
+            }(group));
+            var textnode = nodes[i].getElementsByTagName('text')[0];
+            textnode.setAttribute('fill', 'blue');
+            textnode.classList.add('link');
+        }
+    }
+}
 
-    var url = "/taint/" + navengagement + "/" + navproject + "/" + cmsix;
+function post_taint(url) {
+    show_overlay()
+
+    var formData = get_form_data();
     var request = new XMLHttpRequest();
     request.onload = function() {
         if (request.status == 200) {
             var response = JSON.parse(request.responseText);
             if (response['meta']['status'] == 'ok') {
                 GraphUtil.addsvg(response['content'])
+                add_group_links();
             } else {
                 alert('Error');
             }
@@ -90,6 +125,12 @@ function initialize() {
     var loopbox = document.getElementById('loopsbox');
     loopbox.addEventListener('change', function() {loadtaint()});
 
+    var condensebox = document.getElementById('condense');
+    condensebox.addEventListener('change', function() {loadtaint()});
+
+    var pathsbox = document.getElementById('btpaths');
+    pathsbox.addEventListener('click', function() {loadtaint()});
+
     var sinkbox = document.getElementById('btsink');
     sinkbox.addEventListener('click', function() {loadtaint()});
 
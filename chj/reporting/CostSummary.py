@@ -97,11 +97,37 @@ class CostSummary(object):
             cost_dict[cmsix] = (name, str(lb), str(ub))
         return cost_dict
 
+    def get_inclusive_cost_dict(self,n=None):
+        '''ranked by inclusive upper bound'''
+        cost_dict = {}
+        rollup = self.costmodel.get_cost_rollup()
+        for (cmsix,(lb,ub)) in rollup.get_ranked_inclusive_costs(n):
+            name = str(self.get_cms(cmsix)) + ' (' + str(cmsix) + ')'
+            cost_dict[cmsix] = (name, str(lb), str(ub), rollup.is_recursive(cmsix))
+        return cost_dict
+
+    def get_inclusive_cost_string(self,n=None,bounded=False,namefilter=(lambda name:True)):
+        lines = []
+        rollup = self.costmodel.get_cost_rollup()
+        costs = [ (cmsix,bounds,str(self.get_cms(cmsix)))
+                      for (cmsix,bounds) in rollup.get_ranked_inclusive_costs(bounded=bounded) ]
+        costs = [ c for c in costs if namefilter(c[2]) ]
+        if not n is None: costs = costs[:n]
+        lines.append('\n\nInclusive Cost (including callees): ' + str(len(costs)))
+        lines.append('  (R): recursive method\n')
+        for (cmsix,(lb,ub),name) in costs:
+            prec = ' (R) ' if rollup.is_recursive(cmsix) else '     '
+            lines.append('[' + str(lb).rjust(10) + ' ; ' + str(ub).rjust(12) + ']'
+                             + prec + name + ' (' + str(cmsix) + ')')
+        return '\n'.join(lines)
+
     def has_calls(self,cmsix): return self.app.get_method(cmsix).has_calls()
 
     def get_call_targets(self,cmsix): return self.app.get_method(cmsix).get_callee_cmsixs()
 
-    def as_dictionary(self):      
+    def as_dictionary(self,inclusive=False):
+        '''inclusive: include the inclusive costs (requires a roll-up of all
+        method costs, and numpy)'''
         costs = {}
 
         topmethodcosts = self.costmodel.get_top_method_costs()
@@ -127,6 +153,7 @@ class CostSummary(object):
             constantcosts[cmsix] = (name, str(cost).rjust(10) + pcalls)
 
         costs['rangecosts'] = self.get_ranked_range_cost_dict()
+        if inclusive: costs['inclusivecosts'] = self.get_inclusive_cost_dict()
 
         return costs
 
@@ -0,0 +1,141 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Henny Sipma
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Instruction visitors for the reports on loaded strings, field accesses,
+objects created, and named method calls."""
+
+import chj.app.InstructionVisitor as IV
+
+reflective_names = [
+    "forName",
+    "getDeclaredClassed",
+    "getDeclaredConstructors",
+    "getDeclaredField",
+    "getDeclaredFields",
+    "getDeclaredMethod",
+    "getDeclaredMethods",
+    "getField",
+    "getFields",
+    "getMethod",
+    "getMethods"
+    ]
+
+def group_by_method(results):
+    """Return [ (cmsix, [ rest of result ]) ] from [ (cmsix, ...) ], sorted."""
+    grouped = {}
+    for r in results: grouped.setdefault(r[0],[]).append(r[1:])
+    return [ (cmsix,sorted(grouped[cmsix])) for cmsix in sorted(grouped) ]
+
+
+class LoadedStringsVisitor(IV.InstructionVisitor):
+
+    categories = [ IV.LOAD_STRING ]
+
+    def __init__(self,substring=None):
+        IV.InstructionVisitor.__init__(self)
+        self.substring = substring
+
+    def visit(self,cmsix,pc,instr):
+        s = instr.get_string_constant().get_string()
+        if self.substring is None or self.substring in s:
+            self.results.append((cmsix,pc,s))
+
+    def get_loaded_strings(self):
+        """Return [ (cmsix, [ (pc,string) ]) ]."""
+        return group_by_method(self.results)
+
+    def to_string(self,app):
+        lines = []
+        for (cmsix,methodresults) in self.get_loaded_strings():
+            lines.append('\n' + str(app.jd.get_cms(cmsix).get_aqname()))
+            for (pc,s) in methodresults:
+                lines.append((str(pc).rjust(4) + '  ' + str(s)))
+        return '\n'.join(lines)
+
+
+class FieldAccessVisitor(IV.InstructionVisitor):
+    """Records field accesses of the given categories (PUT_FIELD, GET_FIELD,
+    PUT_STATIC, GET_STATIC)."""
+
+    def __init__(self,categories):
+        IV.InstructionVisitor.__init__(self)
+        self.categories = categories
+
+    def visit(self,cmsix,pc,instr):
+        self.results.append((IV.get_category(instr),cmsix,pc,
+                                 instr.get_cn().index,instr.get_field().index))
+
+    def get_accesses(self,app,category):
+        """Return [ (cmsix, [ (pc,cn,field) ]) ] for the accesses of category."""
+        jd = app.jd
+        results = [ (cmsix,pc,cnix,fsix) for (c,cmsix,pc,cnix,fsix) in self.results
+                        if c == category ]
+        return [ (cmsix,[ (pc,jd.get_cn(cnix),jd.get_fs(fsix)) for (pc,cnix,fsix) in accesses ])
+                     for (cmsix,accesses) in group_by_method(results) ]
+
+
+class ObjectsCreatedVisitor(IV.InstructionVisitor):
+
+    categories = [ IV.OBJECT_CREATED ]
+
+    def visit(self,cmsix,pc,instr):
+        self.results.append((cmsix,pc,str(instr)))
+
+    def get_objects_created(self):
+        """Return [ (cmsix, [ (pc,instruction string) ]) ]."""
+        return group_by_method(self.results)
+
+
+class NamedCallsVisitor(IV.InstructionVisitor):
+    """Records the calls to methods with any of the given names."""
+
+    categories = [ IV.CALL ]
+
+    def __init__(self,names):
+        IV.InstructionVisitor.__init__(self)
+        self.names = set(names)
+
+    def visit(self,cmsix,pc,instr):
+        name = instr.get_signature().name
+        if name in self.names:
+            self.results.append((cmsix,name,pc,instr.get_loop_depth(),str(instr)))
+
+    def get_named_calls(self,name):
+        """Return [ (cmsix, [ (pc,loopdepth,instruction string) ]) ]."""
+        return group_by_method([ (r[0],) + r[2:] for r in self.results if r[1] == name ])
+
+    def to_string(self,app,names,loopdepth=True):
+        lines = []
+        for name in names:
+            for (cmsix,calls) in self.get_named_calls(name):
+                lines.append('\n'+ app.jd.get_cms(cmsix).get_aqname())
+                for (pc,depth,i) in calls:
+                    if loopdepth:
+                        depthstr = 'L' + str(depth) if depth > 0 else '  '
+                        lines.append(str(pc).rjust(6) + '  ' + depthstr + '  ' + i)
+                    else:
+                        lines.append(str(pc).rjust(6) + '  ' + i)
+        return '\n'.join(lines)
@@ -25,12 +25,25 @@
 # SOFTWARE.
 # ------------------------------------------------------------------------------
 
+import chj.app.InstructionVisitor as IV
+
+from chj.app.InstructionVisitor import InstructionVisitorEngine
+from chj.reporting.InstructionReports import FieldAccessVisitor
+
+def get_object_field_visitor(): return FieldAccessVisitor([ IV.PUT_FIELD, IV.GET_FIELD ])
+
 class ObjectFields():
 
-    def __init__(self,app):
+    def __init__(self,app,visitor=None):
+        '''visitor: FieldAccessVisitor for PUT_FIELD and GET_FIELD that has
+        visited the application (if None, the application is visited here)'''
         self.app = app
-        self.fieldwriters = self.app.get_object_field_writers()
-        self.fieldreaders = self.app.get_object_field_readers()
+        if visitor is None:
+            engine = InstructionVisitorEngine(app)
+            visitor = engine.register(get_object_field_visitor())
+            engine.run()
+        self.fieldwriters = visitor.get_accesses(app,IV.PUT_FIELD)
+        self.fieldreaders = visitor.get_accesses(app,IV.GET_FIELD)
 
     def to_string(self):
         lines = []
@@ -33,13 +33,11 @@ class ObjectSizes():
         self.jd = app.jd
 
     def to_string(self):
-        result = []
-        def f(c): result.append((c,c.get_object_size()))
-        self.app.iter_classes(f)
+        result = self.app.get_object_size_table().get_object_sizes()
 
         lines = []
-        for (c,objsize) in sorted(result,key=lambda x:x[1].scalar,reverse=True):
-            lines.append(c.get_qname())
+        for (cnix,objsize) in sorted(result,key=lambda x:x[1].scalar,reverse=True):
+            lines.append(self.jd.get_cn(cnix).get_qname())
             lines.append(('  scalar size: ' + str(objsize.scalar)))
             objects = objsize.objects
             nArrays = len(objsize.arrays)
@@ -25,11 +25,20 @@
 # SOFTWARE.
 # ------------------------------------------------------------------------------
 
+from chj.app.InstructionVisitor import InstructionVisitorEngine
+from chj.reporting.InstructionReports import ObjectsCreatedVisitor
+
 class ObjectsCreated(object):
 
-    def __init__(self,app):
+    def __init__(self,app,visitor=None):
+        '''visitor: ObjectsCreatedVisitor that has visited the application
+        (if None, the application is visited here)'''
         self.app = app
-        self.objects_created = self.app.get_objects_created()
+        if visitor is None:
+            engine = InstructionVisitorEngine(app)
+            visitor = engine.register(ObjectsCreatedVisitor())
+            engine.run()
+        self.objects_created = visitor.get_objects_created()
 
     def to_string(self):
         lines = []
@@ -24,7 +24,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 # ------------------------------------------------------------------------------
+"""Recursion in the application call graph, based on its strongly connected
+components (linear in the number of call graph edges)."""
 
+import chj.util.graphutil as UG
 import chj.util.printutil as UP
 
 class Recursion():
@@ -32,6 +35,11 @@ class Recursion():
     def __init__(self,app):
         self.app = app
         self.appedges = self.get_appedges()    # cmsix -> targets
+        self.graph = UG.DirectedGraph(list(self.appedges.keys()),self.appedges)
+        self.sccs = None          # recursive components, largest first
+        self.sccmap = None        # cmsix -> index in self.sccs
+        self.entrypoints = None   # index in self.sccs -> cmsixs called from outside
+        self.witnesses = {}       # cmsix -> shortest cycle through cmsix
 
     def get_appedges(self):
         jd = self.app.jd
@@ -47,53 +55,117 @@ class Recursion():
         jd.iter_callgraph_edges(f)
         return appedges
 
-    def get_self_recursive_calls(self):
-        recursivecalls = []
-
-        for caller in self.appedges:
-            if caller in self.appedges[caller]:
-                recursivecalls.append(caller)
+    def _is_recursive(self,scc):
+        return len(scc) > 1 or scc[0] in self.appedges.get(scc[0],[])
+
+    def get_recursive_sccs(self):
+        """Return the components with a cycle (sorted lists of cmsixs), largest first."""
+        if self.sccs is None:
+            sccs = [ sorted(scc) for scc in self.graph.get_sccs() if self._is_recursive(scc) ]
+            self.sccs = sorted(sccs,key=lambda scc:(-len(scc),scc[0]))
+            self.sccmap = self.graph.get_scc_map(self.sccs)
+        return self.sccs
+
+    def get_scc_index(self,cmsix):
+        """Return the index of the recursive component of cmsix, or None."""
+        self.get_recursive_sccs()
+        return self.sccmap.get(cmsix)
+
+    def get_entry_points(self,sccindex):
+        """Return the methods of the component that are called from outside it."""
+        if self.entrypoints is None:
+            self.get_recursive_sccs()
+            self.entrypoints = {}
+            for (caller,callees) in self.appedges.items():
+                callerscc = self.sccmap.get(caller)
+                for callee in callees:
+                    calleescc = self.sccmap.get(callee)
+                    if calleescc is None or calleescc == callerscc: continue
+                    self.entrypoints.setdefault(calleescc,set([])).add(callee)
+        return sorted(self.entrypoints.get(sccindex,[]))
+
+    def get_cycle_witness(self,cmsix):
+        """Return a shortest cycle [ cmsix, ..., cmsix ] through cmsix, or None if
+        cmsix is not recursive (bidirectional breadth-first search within its
+        component, expanding the smaller frontier)."""
+        if cmsix in self.witnesses: return self.witnesses[cmsix]
+        sccindex = self.get_scc_index(cmsix)
+        if sccindex is None: return None
+        if cmsix in self.appedges[cmsix]:
+            self.witnesses[cmsix] = [ cmsix, cmsix ]
+            return self.witnesses[cmsix]
+        revedges = self.graph.get_reverse_edges()
+        # node -> (parent on the path from/to cmsix, distance)
+        forward = { cmsix: (None,0) }
+        backward = { cmsix: (None,0) }
+        ffrontier = [ cmsix ]
+        bfrontier = [ cmsix ]
+        best = None
+        while best is None:
+            if len(ffrontier) <= len(bfrontier):
+                (frontier,visited,other,edges) = (ffrontier,forward,backward,self.appedges)
+            else:
+                (frontier,visited,other,edges) = (bfrontier,backward,forward,revedges)
+            nextfrontier = []
+            for n in frontier:
+                dist = visited[n][1] + 1
+                for d in edges.get(n,[]):
+                    if self.sccmap.get(d) != sccindex: continue
+                    if d in other and (best is None or dist + other[d][1] < best[0]):
+                        best = (dist + other[d][1],n,d)
+                    if d in visited: continue
+                    visited[d] = (n,dist)
+                    nextfrontier.append(d)
+            if frontier is ffrontier:
+                ffrontier = nextfrontier
+            else:
+                bfrontier = nextfrontier
+        (_,n,d) = best
+        if visited is backward: (n,d) = (d,n)
+        result = []
+        while not n is None:
+            result.append(n)
+            n = forward[n][0]
+        result.reverse()
+        while not d is None:
+            result.append(d)
+            d = backward[d][0]
+        self.witnesses[cmsix] = result
+        return result
 
-        return recursivecalls
+    def get_self_recursive_calls(self):
+        """Return the methods that call themselves directly."""
+        return [ m for scc in self.get_recursive_sccs() for m in scc
+                     if m in self.appedges.get(m,[]) ]
 
     def get_mutual_recursive_calls(self):
+        """Return the pairs of methods that call each other."""
         mutualrecursivecalls = set([])
-
-        for caller in self.appedges:
-            callees = self.appedges[caller]
-            for callee in callees:
-                if callee in self.appedges and caller in self.appedges[callee]:
-                    if callee == caller: continue
-                    tuple = (caller,callee) if caller <= callee else (callee,caller)
-                    mutualrecursivecalls.add(tuple)
-
+        for scc in self.get_recursive_sccs():
+            if len(scc) == 1: continue
+            for caller in scc:
+                for callee in self.appedges[caller]:
+                    if callee <= caller: continue
+                    if caller in self.appedges.get(callee,[]):
+                        mutualrecursivecalls.add((caller,callee))
         return mutualrecursivecalls
 
-    def get_recursive_2_cycles(self):
-        recursive2cycles = []
-
-        for caller in self.appedges:
-            callees = self.appedges[caller]
-            for callee in callees:
-                if callee == caller: continue
-                if callee in self.appedges:
-                    subcallees = self.appedges[callee]
-                    for subcallee in subcallees:
-                        if subcallee in self.appedges and caller in self.appedges[subcallee]:
-                            recursive2cycles.append((caller,callee,subcallee))
-    
-        return recursive2cycles
-
     def as_dictionary(self):
         result = {}
         jd = self.app.jd
 
         result["recursivecalls"] = [ (call, str(jd.get_cms(call))) for call in self.get_self_recursive_calls() ]
         result["mutualrecursivecalls"] = [ (caller, str(jd.get_cms(caller)), callee, str(jd.get_cms(callee))) 
-                                            for (caller, callee) in self.get_mutual_recursive_calls() ]
-        result["recursive2cycles"] = [ (caller, str(jd.get_cms(caller)), callee, 
-                                            str(jd.get_cms(callee)), subcallee, str(jd.get_cms(subcallee))) 
-                                            for (caller, callee, subcallee) in self.get_recursive_2_cycles() ]
+                                            for (caller, callee) in sorted(self.get_mutual_recursive_calls()) ]
+        sccs = []
+        for (i,scc) in enumerate(self.get_recursive_sccs()):
+            entrypoints = set(self.get_entry_points(i))
+            members = []
+            for m in scc:
+                witness = [ (c, str(jd.get_cms(c))) for c in self.get_cycle_witness(m) ]
+                members.append((m, str(jd.get_cms(m)), m in entrypoints, witness))
+            sccs.append({ "size": len(scc), "entrypoints": sorted(entrypoints), "members": members })
+        result["recursivesccs"] = sccs
 
         return result
 
@@ -101,23 +173,34 @@ class Recursion():
         jd = self.app.jd
 
         lines = []
+        sccs = self.get_recursive_sccs()
+
+        lines.append('Recursive components: ' + str(len(sccs)) + ' (' +
+                         str(sum([ len(scc) for scc in sccs ])) + ' methods)')
+        for (i,scc) in enumerate(sccs):
+            entrypoints = self.get_entry_points(i)
+            lines.append('\n' + ('-' * 80))
+            lines.append('Component ' + str(i+1) + ': ' + str(len(scc)) + ' method(s), ' +
+                             str(len(entrypoints)) + ' entry point(s)')
+            lines.append('-' * 80)
+            for m in scc:
+                marker = 'E ' if m in entrypoints else '  '
+                lines.append(marker + str(m).rjust(6) + '  ' + str(jd.get_cms(m)))
+                witness = self.get_cycle_witness(m)
+                if len(witness) == 2:
+                    lines.append((' ' * 10) + '(calls itself)')
+                else:
+                    for c in witness[1:]:
+                        lines.append((' ' * 10) + '==> ' + str(jd.get_cms(c)))
 
         lines.append('\nDirect recursion: ')
         for c in self.get_self_recursive_calls():
             lines.append(str(jd.get_cms(c)))
-            
 
         lines.append('\nMutual recursion: ')
-        for (caller,callee) in self.get_mutual_recursive_calls():
+        for (caller,callee) in sorted(self.get_mutual_recursive_calls()):
             caller = jd.get_cms(caller)
             callee = jd.get_cms(callee)
             lines.append('\n' + str(caller) + '\n ==> ' + str(callee))
 
-        lines.append('\nCycle of 2: ')
-        for (caller,callee,subcallee) in self.get_recursive_2_cycles():
-            caller = jd.get_cms(caller)
-            callee = jd.get_cms(callee)
-            subcallee = jd.get_cms(subcallee)
-            lines.append('\n' + str(caller) + '\n ==> ' + str(callee) + '\n ====> ' + str(subcallee))
-            
         return '\n'.join(lines)
@@ -25,12 +25,25 @@
 # SOFTWARE.
 # ------------------------------------------------------------------------------
 
+import chj.app.InstructionVisitor as IV
+
+from chj.app.InstructionVisitor import InstructionVisitorEngine
+from chj.reporting.InstructionReports import FieldAccessVisitor
+
+def get_static_field_visitor(): return FieldAccessVisitor([ IV.PUT_STATIC, IV.GET_STATIC ])
+
 class StaticFields():
 
-    def __init__(self,app):
+    def __init__(self,app,visitor=None):
+        '''visitor: FieldAccessVisitor for PUT_STATIC and GET_STATIC that has
+        visited the application (if None, the application is visited here)'''
         self.app = app
-        self.initializers = self.app.get_static_initializers()
-        self.readers = self.app.get_static_field_readers()
+        if visitor is None:
+            engine = InstructionVisitorEngine(app)
+            visitor = engine.register(get_static_field_visitor())
+            engine.run()
+        self.initializers = visitor.get_accesses(app,IV.PUT_STATIC)
+        self.readers = visitor.get_accesses(app,IV.GET_STATIC)
 
     def as_dictionary(self):
         results = {}
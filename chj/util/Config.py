@@ -63,6 +63,15 @@ class Config():
         self.libsumindex = None
         self.platforms = {}
 
+        # layout of method control flow graphs in the gui: 'native' (in process)
+        # or 'graphviz' (dot subprocess)
+        self.cfglayout = 'native'
+
+        # applications preloaded by the pre-fork server (prefork_server.py),
+        # as (engagement,project) pairs, and the number of worker processes
+        self.preforkapps = []
+        self.preforkworkers = 4
+
         # analyzer and gui executables
         if self.platform == 'linux':
             self.linuxdir = os.path.join(self.bindir,'linux')
@@ -78,6 +87,10 @@ class Config():
             self.analyzer = None
             self.gui = None
 
+        # content-addressed store of analyzer results, shared by all checkouts
+        # of an application (see resultstore.py)
+        self.resultstore = os.path.join(os.path.expanduser('~'),'.chj','resultstore')
+
         # STAC Engagements
         self.stacrepodir = None
 
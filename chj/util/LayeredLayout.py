@@ -0,0 +1,398 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""In-process layered (Sugiyama-style) layout and svg emitter for DotGraphs.
+
+Intended for method control flow graphs, which are small to medium sized
+DAGs with back edges, where spawning graphviz costs more than the layout
+itself. The svg produced follows the structure of the svg generated by
+dot (graph, node and edge groups with title elements), so that it can be
+handled by the same client code and by the functions in svgutil.
+"""
+
+import xml.etree.ElementTree as ET
+
+svgns = 'http://www.w3.org/2000/svg'
+
+# undo the escapes applied by DotGraph.sanitize
+unescapes = [ ('\\<init\\>', '<init>'), ('\\"', '"') ]
+
+def unescape(s):
+    for (a,b) in unescapes:
+        s = s.replace(a,b)
+    return s
+
+def svgtag(tag): return '{' + svgns + '}' + tag
+
+def fmt(v): return '{:.2f}'.format(v)
+
+
+class LayeredLayout(object):
+
+    def __init__(self,dotgraph,charwidth=8.0,nodeheight=36.0,nodesep=18.0,ranksep=54.0,
+                 iterations=4):
+        self.dotgraph = dotgraph
+        self.charwidth = charwidth
+        self.nodeheight = nodeheight
+        self.nodesep = nodesep
+        self.ranksep = ranksep
+        self.iterations = iterations
+        self.nodes = list(dotgraph.nodes.keys())   # node names, in insertion order
+        self.edges = list(dotgraph.edges.keys())   # (src,tgt) names
+        self.widths = {}           # name -> width
+        self.layers = {}           # name (or dummy) -> layer number
+        self.order = []            # layer -> list of names (including dummies)
+        self.xpos = {}             # name (or dummy) -> center x
+        self.chains = {}           # (src,tgt) -> list of names from src to tgt
+        self.reversed = set([])    # (src,tgt) edges reversed to break cycles
+        self._layout()
+
+    def get_label(self,name):
+        node = self.dotgraph.nodes[name]
+        return unescape(name if node.labeltxt is None else node.labeltxt)
+
+    def get_width(self):
+        if len(self.xpos) == 0: return 0.0
+        return max(self.xpos[n] + self._get_node_width(n) / 2.0 for n in self.xpos)
+
+    def get_height(self):
+        return len(self.order) * (self.nodeheight + self.ranksep) - self.ranksep
+
+    def get_y(self,name):
+        return self.layers[name] * (self.nodeheight + self.ranksep) + self.nodeheight / 2.0
+
+    # ------------------------------------------------------------ layout --
+
+    def _layout(self):
+        for n in self.nodes:
+            self.widths[n] = max(54.0,len(self.get_label(n)) * self.charwidth + 16.0)
+        self._break_cycles()
+        self._assign_layers()
+        self._add_dummies()
+        self._order_layers()
+        self._assign_coordinates()
+
+    def _get_successors(self):
+        succs = {}
+        for n in self.nodes: succs[n] = []
+        for (src,tgt) in self.edges:
+            if src == tgt: continue
+            succs[src].append(tgt)
+        return succs
+
+    def _break_cycles(self):
+        """Reverse the back edges found by an iterative depth-first search."""
+        succs = self._get_successors()
+        state = {}        # name -> 1 (on stack), 2 (done)
+        for root in self.nodes:
+            if root in state: continue
+            state[root] = 1
+            stack = [ (root,iter(succs[root])) ]
+            while len(stack) > 0:
+                (n,it) = stack[-1]
+                advanced = False
+                for s in it:
+                    if not s in state:
+                        state[s] = 1
+                        stack.append((s,iter(succs[s])))
+                        advanced = True
+                        break
+                    elif state[s] == 1:
+                        self.reversed.add((n,s))
+                if not advanced:
+                    state[n] = 2
+                    stack.pop()
+
+    def _get_dag_edges(self):
+        result = []
+        for (src,tgt) in self.edges:
+            if src == tgt: continue
+            if (src,tgt) in self.reversed:
+                result.append((tgt,src))
+            else:
+                result.append((src,tgt))
+        return result
+
+    def _assign_layers(self):
+        """Longest-path layering in topological order."""
+        succs = {}
+        indegree = {}
+        for n in self.nodes:
+            succs[n] = []
+            indegree[n] = 0
+        for (src,tgt) in self._get_dag_edges():
+            succs[src].append(tgt)
+            indegree[tgt] += 1
+        queue = [ n for n in self.nodes if indegree[n] == 0 ]
+        for n in self.nodes: self.layers[n] = 0
+        i = 0
+        while i < len(queue):
+            n = queue[i]
+            i += 1
+            for s in succs[n]:
+                self.layers[s] = max(self.layers[s],self.layers[n] + 1)
+                indegree[s] -= 1
+                if indegree[s] == 0: queue.append(s)
+
+    def _add_dummies(self):
+        """Split edges that span multiple layers into chains of dummy nodes."""
+        count = 0
+        for (src,tgt) in self.edges:
+            if src == tgt:
+                self.chains[(src,tgt)] = [ src ]
+                continue
+            (upper,lower) = (tgt,src) if (src,tgt) in self.reversed else (src,tgt)
+            chain = [ upper ]
+            for layer in range(self.layers[upper] + 1,self.layers[lower]):
+                dummy = ('dummy',count)
+                count += 1
+                self.layers[dummy] = layer
+                chain.append(dummy)
+            chain.append(lower)
+            if (src,tgt) in self.reversed: chain.reverse()
+            self.chains[(src,tgt)] = chain
+        layercount = max(self.layers.values()) + 1 if len(self.layers) > 0 else 0
+        self.order = [ [] for _ in range(layercount) ]
+        for n in self.nodes: self.order[self.layers[n]].append(n)
+        for n in self.layers:
+            if isinstance(n,tuple): self.order[self.layers[n]].append(n)
+
+    def _get_layer_neighbors(self):
+        """Return adjacency between nodes in consecutive layers (up and down)."""
+        up = {}
+        down = {}
+        for n in self.layers:
+            up[n] = []
+            down[n] = []
+        for chain in self.chains.values():
+            for (a,b) in zip(chain,chain[1:]):
+                if self.layers[a] < self.layers[b]:
+                    down[a].append(b)
+                    up[b].append(a)
+                else:
+                    down[b].append(a)
+                    up[a].append(b)
+        return (up,down)
+
+    def _order_layers(self):
+        """Reduce crossings with alternating barycenter sweeps."""
+        (up,down) = self._get_layer_neighbors()
+        def sweep(layers,neighbors):
+            for l in layers:
+                position = {}
+                for (i,n) in enumerate(self.order[l - 1 if neighbors is up else l + 1]):
+                    position[n] = i
+                def barycenter(ix):
+                    (i,n) = ix
+                    nbs = [ position[m] for m in neighbors[n] if m in position ]
+                    if len(nbs) == 0: return float(i)
+                    return float(sum(nbs)) / len(nbs)
+                ranked = sorted(enumerate(self.order[l]),key=barycenter)
+                self.order[l] = [ n for (_,n) in ranked ]
+        layercount = len(self.order)
+        for _ in range(self.iterations):
+            sweep(range(1,layercount),up)
+            sweep(range(layercount - 2,-1,-1),down)
+
+    def _get_node_width(self,n):
+        if isinstance(n,tuple): return 0.0
+        return self.widths[n]
+
+    def _pack(self,layer,desired):
+        """Place the nodes of a layer as close as possible to their desired
+        positions, preserving their order and the minimum separation.
+
+        Averages a left-to-right and a right-to-left placement; both satisfy
+        the separation constraints, and hence so does their average.
+        """
+        nodes = self.order[layer]
+        if len(nodes) == 0: return
+        seps = [ (self._get_node_width(a) + self._get_node_width(b)) / 2.0 + self.nodesep
+                 for (a,b) in zip(nodes,nodes[1:]) ]
+        leftxs = [ desired[n] for n in nodes ]
+        for i in range(1,len(nodes)):
+            leftxs[i] = max(leftxs[i],leftxs[i - 1] + seps[i - 1])
+        rightxs = [ desired[n] for n in nodes ]
+        for i in range(len(nodes) - 2,-1,-1):
+            rightxs[i] = min(rightxs[i],rightxs[i + 1] - seps[i])
+        for (n,a,b) in zip(nodes,leftxs,rightxs): self.xpos[n] = (a + b) / 2.0
+
+    def _assign_coordinates(self):
+        (up,down) = self._get_layer_neighbors()
+        for layer in range(len(self.order)):
+            desired = {}
+            left = 0.0
+            for n in self.order[layer]:
+                halfwidth = self._get_node_width(n) / 2.0
+                desired[n] = left + halfwidth
+                left += 2 * halfwidth + self.nodesep
+            self._pack(layer,desired)
+        def align(layers,neighbors):
+            for layer in layers:
+                desired = {}
+                for n in self.order[layer]:
+                    nbs = [ self.xpos[m] for m in neighbors[n] ]
+                    desired[n] = sum(nbs) / len(nbs) if len(nbs) > 0 else self.xpos[n]
+                self._pack(layer,desired)
+        layercount = len(self.order)
+        for _ in range(self.iterations):
+            align(range(1,layercount),up)
+            align(range(layercount - 2,-1,-1),down)
+        minx = min([ self.xpos[n] - self._get_node_width(n) / 2.0 for n in self.xpos ] + [ 0.0 ])
+        for n in self.xpos: self.xpos[n] -= minx
+
+    # --------------------------------------------------------------- svg --
+
+    def _get_point(self,n):
+        return (self.xpos[n],self.get_y(n))
+
+    def _mk_text(self,x,y,txt,size):
+        text = ET.Element(svgtag('text'))
+        text.set('text-anchor','middle')
+        text.set('x',fmt(x))
+        text.set('y',fmt(y))
+        text.set('font-family','FreeSans')
+        text.set('font-size',fmt(size))
+        text.text = txt
+        return text
+
+    def _mk_node(self,i,n,attrs):
+        (x,y) = self._get_point(n)
+        halfwidth = self.widths[n] / 2.0
+        halfheight = self.nodeheight / 2.0
+        g = ET.Element(svgtag('g'))
+        g.set('id','node' + str(i + 1))
+        g.set('class','node')
+        for (k,v) in attrs.items(): g.set(k,str(v))
+        title = ET.SubElement(g,svgtag('title'))
+        title.text = n
+        polygon = ET.SubElement(g,svgtag('polygon'))
+        polygon.set('fill','none')
+        polygon.set('stroke','black')
+        corners = [ (x - halfwidth,y - halfheight), (x + halfwidth,y - halfheight),
+                    (x + halfwidth,y + halfheight), (x - halfwidth,y + halfheight),
+                    (x - halfwidth,y - halfheight) ]
+        polygon.set('points',' '.join(fmt(a) + ',' + fmt(b) for (a,b) in corners))
+        g.append(self._mk_text(x,y + 5.0,self.get_label(n),14.0))
+        return g
+
+    def _get_boundary_point(self,n,towards):
+        """Return the point where the segment from n to towards leaves the box of n."""
+        (x,y) = self._get_point(n)
+        if isinstance(n,tuple): return (x,y)
+        (tx,ty) = towards
+        halfheight = self.nodeheight / 2.0
+        dy = ty - y
+        if dy == 0: return (x,y)
+        return (x + (tx - x) * halfheight / abs(dy),y + halfheight * (1 if dy > 0 else -1))
+
+    def _mk_self_loop(self,n):
+        (x,y) = self._get_point(n)
+        right = x + self.widths[n] / 2.0
+        halfheight = self.nodeheight / 2.0
+        points = [ (right,y - halfheight / 2.0), (right + 24.0,y - halfheight),
+                   (right + 24.0,y + halfheight), (right,y + halfheight / 2.0) ]
+        d = ('M' + fmt(points[0][0]) + ',' + fmt(points[0][1]) + ' C'
+             + ' '.join(fmt(a) + ',' + fmt(b) for (a,b) in points[1:]))
+        return (d,points[-2],points[-1])
+
+    def _mk_edge(self,i,src,tgt):
+        edge = self.dotgraph.edges[(src,tgt)]
+        g = ET.Element(svgtag('g'))
+        g.set('id','edge' + str(i + 1))
+        g.set('class','edge')
+        title = ET.SubElement(g,svgtag('title'))
+        title.text = src + '->' + tgt
+        chain = self.chains[(src,tgt)]
+        if src == tgt:
+            (d,beforelast,last) = self._mk_self_loop(src)
+        else:
+            points = [ self._get_point(n) for n in chain ]
+            points[0] = self._get_boundary_point(chain[0],points[1])
+            points[-1] = self._get_boundary_point(chain[-1],points[-2])
+            d = 'M' + ' L'.join(fmt(a) + ',' + fmt(b) for (a,b) in points)
+            (beforelast,last) = (points[-2],points[-1])
+        path = ET.SubElement(g,svgtag('path'))
+        path.set('fill','none')
+        path.set('stroke','black')
+        path.set('d',d)
+        g.append(self._mk_arrowhead(beforelast,last))
+        if not edge.labeltxt is None:
+            if src == tgt:
+                (lx,ly) = (last[0] + 30.0,last[1])
+            else:
+                (p,q) = (self._get_point(chain[0]),self._get_point(chain[1]))
+                (lx,ly) = ((p[0] + q[0]) / 2.0 + 6.0,(p[1] + q[1]) / 2.0)
+            label = self._mk_text(lx,ly,unescape(edge.labeltxt),12.0)
+            label.set('text-anchor','start')
+            g.append(label)
+        return g
+
+    def _mk_arrowhead(self,frompoint,topoint):
+        (fx,fy) = frompoint
+        (tx,ty) = topoint
+        length = ((tx - fx) ** 2 + (ty - fy) ** 2) ** 0.5
+        if length == 0: length = 1.0
+        (ux,uy) = ((tx - fx) / length,(ty - fy) / length)
+        (bx,by) = (tx - 10.0 * ux,ty - 10.0 * uy)
+        corners = [ (bx - 3.5 * uy,by + 3.5 * ux), (tx,ty), (bx + 3.5 * uy,by - 3.5 * ux),
+                    (bx - 3.5 * uy,by + 3.5 * ux) ]
+        polygon = ET.Element(svgtag('polygon'))
+        polygon.set('fill','black')
+        polygon.set('stroke','black')
+        polygon.set('points',' '.join(fmt(a) + ',' + fmt(b) for (a,b) in corners))
+        return polygon
+
+    def to_svg(self,nodeattrs={}):
+        """Return an ElementTree with the svg representation of the graph.
+
+        nodeattrs: name -> dictionary of attributes to be set on the node element
+        """
+        ET.register_namespace('',svgns)
+        margin = 4.0
+        # leave room on the right for self loops and edge labels
+        width = self.get_width() + 2 * margin + 120.0
+        height = max(self.get_height(),0.0) + 2 * margin
+        svg = ET.Element(svgtag('svg'))
+        svg.set('width',fmt(width) + 'pt')
+        svg.set('height',fmt(height) + 'pt')
+        svg.set('viewBox','0.00 0.00 ' + fmt(width) + ' ' + fmt(height))
+        graph = ET.SubElement(svg,svgtag('g'))
+        graph.set('id','graph0')
+        graph.set('class','graph')
+        graph.set('transform','translate(' + fmt(margin) + ' ' + fmt(margin) + ')')
+        title = ET.SubElement(graph,svgtag('title'))
+        title.text = self.dotgraph.name
+        background = ET.SubElement(graph,svgtag('polygon'))
+        background.set('fill','#f4f4f4')
+        background.set('stroke','transparent')
+        background.set('points','-4,-4 ' + fmt(width - margin) + ',-4 ' + fmt(width - margin)
+                       + ',' + fmt(height - margin) + ' -4,' + fmt(height - margin) + ' -4,-4')
+        for (i,n) in enumerate(self.nodes):
+            graph.append(self._mk_node(i,n,nodeattrs.get(n,{})))
+        for (i,(src,tgt)) in enumerate(self.edges):
+            graph.append(self._mk_edge(i,src,tgt))
+        return ET.ElementTree(svg)
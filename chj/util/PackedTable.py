@@ -0,0 +1,234 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Henny Sipma
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Read-only tables and maps packed into a few flat buffers.
+
+The dictionaries preloaded by the pre-fork server are shared with its workers
+copy-on-write, but every access to a Python object updates its reference
+count, which unshares the page the object lives on. The packed versions below
+keep their contents as marshalled bytes in a single buffer (with array offsets
+and an open-addressing hash index) and construct the values on demand, so
+that a request only writes to the headers of these buffers and to the objects
+it constructs itself.
+"""
+
+import bisect
+import marshal
+import zlib
+
+import xml.etree.ElementTree as ET
+
+from array import array
+from collections.abc import Mapping
+
+import chj.util.IndexedTable as IT
+
+def get_hash(key):
+    """Return a hash of key that does not depend on the process (hash() of a
+    string is randomized per interpreter)."""
+    return zlib.crc32(repr(key).encode('utf-8','surrogatepass'))
+
+def mk_slots(hashes):
+    """Return an open-addressing hash index: position + 1 of the entry in its slot."""
+    size = 8
+    while size < 2 * len(hashes): size *= 2
+    slots = array('l',[0]) * size
+    for (pos,h) in enumerate(hashes):
+        i = h & (size - 1)
+        while slots[i] > 0: i = (i + 1) & (size - 1)
+        slots[i] = pos + 1
+    return slots
+
+def find_slot(slots,h,match):
+    """Return the position of the entry with hash h for which match is true."""
+    size = len(slots)
+    i = h & (size - 1)
+    while True:
+        pos = slots[i] - 1
+        if pos < 0: return None
+        if match(pos): return pos
+        i = (i + 1) & (size - 1)
+
+
+class PackedValues(object):
+    """Sequence of values (ints, strings, and tuples and lists of these)."""
+
+    def __init__(self,values):
+        self.offsets = array('q',[0])
+        chunks = []
+        n = 0
+        for v in values:
+            b = marshal.dumps(v,2)
+            chunks.append(b)
+            n += len(b)
+            self.offsets.append(n)
+        self.data = b''.join(chunks)
+
+    def __len__(self): return len(self.offsets) - 1
+
+    def __getitem__(self,i):
+        return marshal.loads(self.data[self.offsets[i]:self.offsets[i+1]])
+
+
+class PackedDict(Mapping):
+    """Read-only dictionary; values that cannot be marshalled can be stored in
+    a different form with encode, and are restored with decode."""
+
+    def __init__(self,d,encode=None,decode=None):
+        items = list(d.items())
+        self.decode = decode
+        self.packedkeys = PackedValues([ k for (k,_) in items ])
+        self.packedvalues = PackedValues([ v if encode is None else encode(v)
+                                               for (_,v) in items ])
+        self.slots = mk_slots([ get_hash(k) for (k,_) in items ])
+
+    def _find(self,key):
+        return find_slot(self.slots,get_hash(key),lambda pos:self.packedkeys[pos] == key)
+
+    def __getitem__(self,key):
+        pos = self._find(key)
+        if pos is None: raise KeyError(key)
+        v = self.packedvalues[pos]
+        return v if self.decode is None else self.decode(v)
+
+    def __contains__(self,key): return not self._find(key) is None
+
+    def __iter__(self):
+        for pos in range(len(self.packedkeys)): yield self.packedkeys[pos]
+
+    def __len__(self): return len(self.packedkeys)
+
+
+class PackedIntSet(object):
+    """Read-only set of integers."""
+
+    def __init__(self,s): self.values = array('q',sorted(s))
+
+    def __contains__(self,v):
+        i = bisect.bisect_left(self.values,v)
+        return i < len(self.values) and self.values[i] == v
+
+    def __iter__(self): return iter(self.values)
+
+    def __len__(self): return len(self.values)
+
+
+class PackedTable(object):
+    """Read-only version of an IndexedTable of dictionary records.
+
+    Records are stored as (class, index, tags, args) and constructed (as
+    cls(d,index,tags,args), as when read from xml) when first retrieved; the
+    constructed records are kept per process.
+    """
+
+    def __init__(self,table,d):
+        self.name = table.name
+        self.d = d
+        self.next = table.next
+        self.classes = []
+        classids = {}
+        records = []
+        hashes = []
+        self.positions = array('l',[-1]) * table.next
+        for (ix,r) in table.items():
+            cls = type(r)
+            if not cls in classids:
+                classids[cls] = len(self.classes)
+                self.classes.append(cls)
+            self.positions[ix] = len(records)
+            records.append((classids[cls],ix,list(r.tags),list(r.args)))
+            hashes.append(get_hash(IT.get_key(r.tags,r.args)))
+        self.records = PackedValues(records)
+        self.slots = mk_slots(hashes)
+        self.cache = {}                # index -> record
+
+    def _get_position(self,index):
+        if 0 <= index < len(self.positions): return self.positions[index]
+        return -1
+
+    def _get_record_key(self,pos):
+        (_,_,tags,args) = self.records[pos]
+        return IT.get_key(tags,args)
+
+    def size(self): return (self.next - 1)
+
+    def has_key(self,key): return not self.get_index(key) is None
+
+    def get_index(self,key):
+        pos = find_slot(self.slots,get_hash(key),lambda pos:self._get_record_key(pos) == key)
+        if not pos is None: return self.records[pos][1]
+
+    def retrieve(self,index):
+        if index in self.cache: return self.cache[index]
+        pos = self._get_position(index)
+        if pos < 0:
+            msg = ('Unable to retrieve item ' + str(index) + ' from table ' + self.name
+                      + ' (size: ' + str(self.size()) + ')')
+            raise IT.IndexedTableError(msg)
+        (clsid,index,tags,args) = self.records[pos]
+        r = self.classes[clsid](self.d,index,tags,args)
+        self.cache[index] = r
+        return r
+
+    def indices(self):
+        return [ ix for ix in range(len(self.positions)) if self.positions[ix] >= 0 ]
+
+    def iter(self,f):
+        for ix in self.indices(): f(ix,self.retrieve(ix))
+
+    def values(self): return [ self.retrieve(ix) for ix in self.indices() ]
+
+    def items(self): return [ (ix,self.retrieve(ix)) for ix in self.indices() ]
+
+    def retrieve_by_key(self,f):
+        result = []
+        for pos in range(len(self.records)):
+            key = self._get_record_key(pos)
+            if f(key): result.append((key,self.retrieve(self.records[pos][1])))
+        return result
+
+    def write_xml(self,node,f,tag='n'):
+        for (ix,r) in self.items():
+            snode = ET.Element(tag)
+            f(snode,r)
+            node.append(snode)
+
+    def __str__(self):
+        lines = [ '\n' + self.name ]
+        for (ix,r) in self.items():
+            lines.append(str(ix).rjust(4) + '  ' + str(r))
+        return '\n'.join(lines)
+
+
+def pack_tables(d):
+    """Replace the IndexedTables of dictionary d (listed in d.tables, with
+    their read functions) by PackedTables."""
+    packed = {}
+    for (name,t) in list(vars(d).items()):
+        if isinstance(t,IT.IndexedTable):
+            packed[id(t)] = PackedTable(t,d)
+            setattr(d,name,packed[id(t)])
+    d.tables = [ (packed.get(id(t),t),f) for (t,f) in d.tables ]
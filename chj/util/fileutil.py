@@ -388,28 +388,52 @@ def get_analysisdatadir(path):
 def get_analysis_app_dir(path):
     return os.path.join(get_analysisdir(path),'chapp')
 
+def get_cachedir(path):
+    cachedir = os.path.join(get_analysisdir(path),'chcache')
+    if not os.path.isdir(cachedir):
+        os.makedirs(cachedir)
+    return cachedir
+
+def get_indexdir(path):
+    indexdir = os.path.join(get_analysisdir(path),'chindex')
+    if not os.path.isdir(indexdir):
+        os.makedirs(indexdir)
+    return indexdir
+
+def get_analyzer_metrics_filename(path):
+    return os.path.join(path,'chmetrics','analyzerruns.json')
+
+def get_analysis_inputs_filename(path,mode):
+    inputsdir = os.path.join(get_analysisdir(path),'chinputs')
+    if not os.path.isdir(inputsdir):
+        os.makedirs(inputsdir)
+    return os.path.join(inputsdir,mode + '.json')
+
+def get_logsdir(path):
+    logsdir = os.path.join(get_analysisdir(path),'chlogs')
+    if not os.path.isdir(logsdir):
+        os.makedirs(logsdir)
+    return logsdir
+
 def get_costdir(path):
     analysisdir = get_analysisdir(path)
     costdir = os.path.join(analysisdir,'chcost')
     if not os.path.isdir(costdir):
-        os.chdir(analysisdir)
-        os.mkdir('chcost')
-    return os.path.join(analysisdir,'chcost')
+        os.makedirs(costdir)
+    return costdir
 
 def get_costsupportdir(path):
-    costdir = getcost_dir(path)
+    costdir = get_costdir(path)
     costsupportdir = os.path.join(costdir,'support')
     if not os.path.isdir(costsupportdir):
-        os.chdir(costdir)
-        os.mkdir('support')
-    return os.path.join(costdir,'support')
+        os.makedirs(costsupportdir)
+    return costsupportdir
 
 def get_userdatadir(path):
     userdatadir = os.path.join(path,'chuserdata')
     if not os.path.isdir(userdatadir):
-        os.chdir(path)
-        os.mkdir('chuserdata')
-    return os.path.join(path,'chuserdata')
+        os.mkdir(userdatadir)
+    return userdatadir
 
 # --------------------------------------------------------------- chdata ---
 def get_datadictionary_filename(path):
@@ -469,6 +493,13 @@ def list_data_taint_trail_filenames(path):
     filenames = os.listdir(datapath)
     return [ f for f in filenames if f.startswith('tainttrails_') ]
 
+def get_taint_trail_cache_filename(path,id):
+    # the cache directory is created by the writer
+    return os.path.join(get_analysisdir(path),'chcache','tainttrail_' + str(id) + '.npz')
+
+def get_taint_trails_manifest_filename(path):
+    return os.path.join(get_analysisdir(path),'tainttrails_manifest.json')
+
 def get_data_taint_trail_xnode(path,id):
     filename = get_data_taint_trail_filename(path,id)
     if os.path.isfile(filename):
@@ -538,6 +569,26 @@ def get_app_methodstaint_xnode(path,package,cname,mname,id):
     filename = get_app_methodstaint_filename(path,package,cname,mname,id)
     return get_xnode(filename,'method','Method file',show=False)
 
+# ---------------------------------------------------------- fingerprints ---
+
+def get_file_fingerprint(filename):
+    """Return (size,mtime) of the file, or None if it does not exist."""
+    if not os.path.isfile(filename): return None
+    st = os.stat(filename)
+    return (st.st_size,st.st_mtime_ns)
+
+def get_analysis_fingerprint(path):
+    """Return a fingerprint of the analysis results that are loaded by AppAccess;
+    it changes when the application is reanalyzed."""
+    costdir = os.path.join(get_analysisdir(path),'chcost')
+    filenames = [ get_datadictionary_filename(path),
+                  get_datacallgraph_filename(path),
+                  get_jterm_dictionary_filename(path),
+                  get_dataclassnames_filename(path),
+                  get_data_taint_origins_filename(path),
+                  os.path.join(costdir,'defaultcostmodel.xml') ]
+    return tuple(get_file_fingerprint(f) for f in filenames)
+
 # ----------------------------------------------------------------- chcost ---
 
 def get_costdefaultmodel_filename(path):
@@ -556,16 +607,34 @@ def get_costclass_xnode(path,package,cname):
     filename = get_costclass_filename(path,package,cname)
     return get_xnode(filename,'class','Class cost file')
 
+def get_cost_index_filename(path):
+    return os.path.join(get_indexdir(path),'costindex.json')
+
+def get_object_size_index_filename(path):
+    return os.path.join(get_indexdir(path),'objectsizes.json')
+
+def get_class_hierarchy_index_filename(path):
+    return os.path.join(get_indexdir(path),'classhierarchy.json')
+
+def get_cost_fingerprints_dir(path):
+    fpdir = os.path.join(get_indexdir(path),'costruns')
+    if not os.path.isdir(fpdir):
+        os.makedirs(fpdir)
+    return fpdir
+
+def get_cost_fingerprints_filename(path,name):
+    return os.path.join(get_cost_fingerprints_dir(path),name + '.json')
+
 def get_costsupportpackagedir(path,package):
     costsupdir = get_costsupportdir(path)
-    return os.path.join(costsupdir,package,replace('.','/'))
+    return os.path.join(costsupdir,package.replace('.','/'))
 
 def get_costsupportclass_filename(path,package,cname):
     costsupdir = get_costsupportpackagedir(path,package)
     return os.path.join(costsupdir, cname + '.xml')
 
 def get_costsupportclass_xnode(path,package,cname):
-    filename = get_costsupport_filename(path,package,cname)
+    filename = get_costsupportclass_filename(path,package,cname)
     return get_xnode(filename,'class','Class cost support file')
 
 # -------------------------------------------------------------- chuserdata ---
@@ -625,6 +694,9 @@ def get_engagements_directory():
         return path
     raise CHJDirectoryNotFoundError(path)
 
+def get_analyze_all_manifest_filename():
+    return os.path.join(get_engagements_repo_path(),'chj_analyze_all_manifest.json')
+
 def get_engagements_data_filename():
     path = get_engagements_repo_path()
     filename = os.path.join(path,'engagements.json')
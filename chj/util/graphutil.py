@@ -26,27 +26,193 @@
 # ------------------------------------------------------------------------------
 
 
+import heapq
+
 class DirectedGraph(object):
 
     def __init__(self,nodes,edges):
         self.nodes = nodes
         self.edges = edges    # adjacency list: n -> [ n ]
+        self.revedges = None  # reverse adjacency list, computed on demand
         self.paths = []
 
-    def find_paths_aux(self,src,dst,visited,path):
-        visited[src] = True
-        path.append(src)
+    def get_reverse_edges(self):
+        if self.revedges is None:
+            self.revedges = {}
+            for (src,dsts) in self.edges.items():
+                for d in dsts:
+                    self.revedges.setdefault(d,[]).append(src)
+        return self.revedges
+
+    def _reach(self,starts,edges):
+        visited = set(starts)
+        stack = list(visited)
+        while len(stack) > 0:
+            n = stack.pop()
+            for d in edges.get(n,[]):
+                if not d in visited:
+                    visited.add(d)
+                    stack.append(d)
+        return visited
+
+    def get_reachable(self,srcs):
+        """Return the set of nodes reachable from any of the nodes in srcs."""
+        return self._reach(srcs,self.edges)
+
+    def get_coreachable(self,dsts):
+        """Return the set of nodes from which any of the nodes in dsts is reachable."""
+        return self._reach(dsts,self.get_reverse_edges())
+
+    def get_path_nodes(self,src,dsts):
+        """Return the nodes that lie on a path from src to any of the nodes in dsts.
+
+        Computed in linear time as the intersection of the nodes reachable from
+        src and the nodes that reach a destination (in the presence of cycles a
+        node may be included that lies only on a non-simple path).
+        """
+        forward = self.get_reachable([ src ])
+        if not any(d in forward for d in dsts): return set([])
+        return forward & self.get_coreachable(dsts)
+
+    def iter_paths(self,src,dst,maxpaths=None,maxlength=None):
+        """Generate simple paths from src to dst, at most maxpaths paths of at most
+        maxlength nodes each (no bound if None)."""
+        relevant = self.get_path_nodes(src,[ dst ])
+        if len(relevant) == 0: return
+        count = 0
+        path = [ src ]
+        onpath = set(path)
+        stack = [ iter(self.edges.get(src,[])) ]
         if src == dst:
-            self.paths.append(path[:])
-        elif src in self.edges:
-            for d in self.edges[src]:
-                if not visited[d]:
-                    self.find_paths_aux(d,dst,visited,path)
-        path.pop()
-        visited[src] = False
-
-    def find_paths(self,src,dst):
-        visited = {}
-        for n in self.nodes:
-            visited[n] = False
-        self.find_paths_aux(src,dst,visited,[])
+            yield path[:]
+            return
+        while len(stack) > 0:
+            d = next(stack[-1],None)
+            if d is None:
+                stack.pop()
+                onpath.discard(path.pop())
+                continue
+            if d in onpath or not d in relevant: continue
+            if d == dst:
+                yield path + [ d ]
+                count += 1
+                if (not maxpaths is None) and count >= maxpaths: return
+                continue
+            if (not maxlength is None) and len(path) + 1 >= maxlength: continue
+            path.append(d)
+            onpath.add(d)
+            stack.append(iter(self.edges.get(d,[])))
+
+    def find_paths(self,src,dst,maxpaths=None,maxlength=None):
+        self.paths.extend(self.iter_paths(src,dst,maxpaths=maxpaths,maxlength=maxlength))
+
+    def _shortest_path(self,src,dsts,removednodes,removededges,maxlength):
+        """Return a shortest path (BFS) from src to a node in dsts that avoids
+        removednodes and removededges; the path ends with the virtual sink None."""
+        parents = { src: None }
+        frontier = [ src ]
+        length = 1
+        while len(frontier) > 0:
+            for n in frontier:
+                if n in dsts and not (n,None) in removededges:
+                    path = [ None ]
+                    while not n is None:
+                        path.append(n)
+                        n = parents[n]
+                    path.reverse()
+                    return path
+            if (not maxlength is None) and length >= maxlength: return None
+            nextfrontier = []
+            for n in frontier:
+                for d in self.edges.get(n,[]):
+                    if d in parents or d in removednodes or (n,d) in removededges: continue
+                    parents[d] = n
+                    nextfrontier.append(d)
+            frontier = nextfrontier
+            length += 1
+        return None
+
+    def iter_shortest_paths(self,src,dsts,maxlength=None):
+        """Generate the simple paths from src to any of the nodes in dsts in order
+        of increasing length (Yen's algorithm, with the destinations connected to
+        a virtual sink); paths have at most maxlength nodes (no bound if None)."""
+        dsts = set(dsts)
+        path = self._shortest_path(src,dsts,set([]),set([]),maxlength)
+        if path is None: return
+        found = [ path ]
+        seen = set([ tuple(path) ])
+        candidates = []
+        counter = 0
+        while True:
+            yield path[:-1]
+            for i in range(len(path) - 1):
+                spurnode = path[i]
+                rootpath = path[:i+1]
+                removededges = set([])
+                for p in found:
+                    if p[:i+1] == rootpath: removededges.add((p[i],p[i+1]))
+                removednodes = set(rootpath[:-1])
+                budget = None if maxlength is None else maxlength - i
+                if (not budget is None) and budget < 1: continue
+                spurpath = self._shortest_path(spurnode,dsts,removednodes,removededges,budget)
+                if spurpath is None: continue
+                newpath = rootpath[:-1] + spurpath
+                if tuple(newpath) in seen: continue
+                seen.add(tuple(newpath))
+                counter += 1
+                heapq.heappush(candidates,(len(newpath),counter,newpath))
+            if len(candidates) == 0: return
+            (_,_,path) = heapq.heappop(candidates)
+            found.append(path)
+
+    def get_sccs(self):
+        """Return the strongly connected components (lists of nodes) in reverse
+        topological order: every edge between components goes from a component
+        to one listed earlier (iterative version of Tarjan's algorithm)."""
+        index = {}
+        lowlink = {}
+        onstack = set([])
+        stack = []
+        sccs = []
+        counter = 0
+        for root in self.nodes:
+            if root in index: continue
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            onstack.add(root)
+            work = [ (root,iter(self.edges.get(root,[]))) ]
+            while len(work) > 0:
+                (n,succs) = work[-1]
+                for d in succs:
+                    if not d in index:
+                        index[d] = lowlink[d] = counter
+                        counter += 1
+                        stack.append(d)
+                        onstack.add(d)
+                        work.append((d,iter(self.edges.get(d,[]))))
+                        break
+                    elif d in onstack:
+                        lowlink[n] = min(lowlink[n],index[d])
+                else:
+                    work.pop()
+                    if len(work) > 0:
+                        p = work[-1][0]
+                        lowlink[p] = min(lowlink[p],lowlink[n])
+                    if lowlink[n] == index[n]:
+                        scc = []
+                        while True:
+                            d = stack.pop()
+                            onstack.discard(d)
+                            scc.append(d)
+                            if d == n: break
+                        sccs.append(scc)
+        return sccs
+
+    def get_scc_map(self,sccs=None):
+        """Return a map from node to the index of its component in sccs."""
+        if sccs is None: sccs = self.get_sccs()
+        result = {}
+        for (i,scc) in enumerate(sccs):
+            for n in scc: result[n] = i
+        return result
@@ -0,0 +1,189 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Running analyzer jobs in a bounded pool of subprocesses.
+
+Every job is a separate process, started in its own session so that it can be
+killed (with its children) on timeout, with an optional limit on its address
+space and cpu time. Results are recorded in a json manifest, so that an interrupted batch
+can be resumed.
+"""
+
+import datetime
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import chj.util.runmetrics as UT
+
+# sets the limits given as arguments (- for none) and executes the command that follows
+limitscript = """import os, resource, sys
+(maxmemory,maxcpu,cmd) = (sys.argv[1],sys.argv[2],sys.argv[3:])
+if maxmemory != '-':
+    limit = int(maxmemory) * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS,(limit,limit))
+if maxcpu != '-':
+    resource.setrlimit(resource.RLIMIT_CPU,(int(maxcpu),int(maxcpu) + 5))
+try:
+    os.execvp(cmd[0],cmd)
+except OSError as e:
+    sys.stderr.write('Unable to execute ' + cmd[0] + ': ' + str(e) + chr(10))
+    os._exit(127)
+"""
+
+def mk_limited_cmd(cmd,maxmemory,maxcpu=None):
+    """Return a command that runs cmd with its address space limited to maxmemory
+    MB and its cpu time to maxcpu seconds.
+
+    The limits are set in the child by a small python wrapper that then execs
+    cmd (so that they also hold for processes forked by cmd): jobs are started
+    from threads, in which a preexec_fn is not safe (the forked child can
+    deadlock before it reaches exec).
+    """
+    if maxmemory is None and maxcpu is None: return cmd
+    return ([ sys.executable, '-c', limitscript,
+                  '-' if maxmemory is None else str(maxmemory),
+                  '-' if maxcpu is None else str(maxcpu) ] + list(cmd))
+
+def kill_job(proc):
+    """Kill proc and its process group, and wait for it."""
+    try:
+        os.killpg(proc.pid,signal.SIGKILL)
+    except (ProcessLookupError,PermissionError):
+        pass
+    try:
+        return wait_job(proc)
+    except ChildProcessError:
+        return None
+
+def wait_job(proc,timeout=None):
+    """Wait for proc to terminate, at most timeout seconds; return its rusage,
+    or None if it is still running (the return code is set in proc)."""
+    deadline = None if timeout is None else time.time() + timeout
+    while True:
+        (pid,status,ru) = os.wait4(proc.pid,0 if deadline is None else os.WNOHANG)
+        if pid != 0:
+            proc.returncode = UT.get_exit_code(status)
+            return ru
+        if time.time() >= deadline: return None
+        time.sleep(0.05)
+
+def run_job(cmd,cwd,timeout=None,maxmemory=None,logfilename=None,maxcpu=None):
+    """Run cmd in cwd and return a dictionary with the status ('ok', 'failed',
+    'timeout', 'cpulimit', or 'error'), the return code, the elapsed time, and
+    the cpu time and peak rss of the process."""
+    result = {}
+    result['cmd'] = ' '.join(cmd)
+    result['start'] = datetime.datetime.now().isoformat(timespec='seconds')
+    t0 = time.time()
+    logfile = open(logfilename,'w') if not logfilename is None else subprocess.DEVNULL
+    try:
+        proc = subprocess.Popen(mk_limited_cmd(cmd,maxmemory,maxcpu),cwd=cwd,stdout=logfile,
+                                    stderr=subprocess.STDOUT,start_new_session=True)
+        try:
+            ru = wait_job(proc,timeout=timeout)
+        except BaseException:
+            # do not leave the process running outside the bound of the pool
+            kill_job(proc)
+            raise
+        if not ru is None:
+            result['returncode'] = proc.returncode
+            if result['returncode'] == 0:
+                result['status'] = 'ok'
+            elif (result['returncode'] in [ -signal.SIGXCPU, -signal.SIGKILL ]
+                      and not maxcpu is None and ru.ru_utime + ru.ru_stime >= maxcpu - 0.05):
+                # other kills (e.g., by the oom killer) are failures; the cpu time
+                # is accounted at clock tick granularity
+                result['status'] = 'cpulimit'
+            else:
+                result['status'] = 'failed'
+        else:
+            ru = kill_job(proc)
+            result['returncode'] = proc.returncode
+            result['status'] = 'timeout'
+        result.update(UT.get_rusage_record(ru))
+    except OSError as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    finally:
+        if not logfilename is None: logfile.close()
+    result['time'] = round(time.time() - t0,2)
+    if not logfilename is None: result['log'] = logfilename
+    return result
+
+class JobManifest(object):
+    """Json record of the results of the jobs in a batch: jobid -> result."""
+
+    def __init__(self,filename):
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.jobs = {}
+        if os.path.isfile(filename):
+            with open(filename) as fp:
+                self.jobs = json.load(fp).get('jobs',{})
+
+    def get_status(self,jobid):
+        jobid = str(jobid)
+        return self.jobs[jobid]['status'] if jobid in self.jobs else None
+
+    def record(self,jobid,result):
+        with self.lock:
+            result['completed'] = datetime.datetime.now().isoformat(timespec='seconds')
+            self.jobs[str(jobid)] = result
+            self.save()
+
+    def save(self):
+        tmpfilename = self.filename + '.tmp'
+        with open(tmpfilename,'w') as fp:
+            json.dump({ 'jobs': self.jobs },fp,indent=2,sort_keys=True)
+        os.replace(tmpfilename,self.filename)
+
+    def get_summary(self):
+        result = {}
+        for r in self.jobs.values():
+            result[r['status']] = result.get(r['status'],0) + 1
+        return result
+
+def run_jobs(jobs,maxjobs,f):
+    """Run jobs, a list of (jobid,thunk), with at most maxjobs at the same time;
+    f(jobid,result) is called when a job completes (result is the value of the
+    thunk, or a dictionary with status 'error' if it raised an exception)."""
+    def run(jobid,thunk):
+        try:
+            result = thunk()
+        except Exception as e:
+            result = { 'status': 'error', 'error': str(e) }
+        f(jobid,result)
+        return result
+    with ThreadPoolExecutor(max_workers=max(1,maxjobs)) as pool:
+        futures = [ pool.submit(run,jobid,thunk) for (jobid,thunk) in jobs ]
+        return [ future.result() for future in futures ]
@@ -0,0 +1,211 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Process-wide performance metrics: latency histograms, cache counters, memory.
+
+Metrics are kept in module-level tables, so that all modules in the process
+(the flask app, svgutil, ...) record into the same registry. They can be
+exported in the Prometheus text exposition format or as a dictionary.
+"""
+
+import os
+import resource
+import sys
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# upper bounds of the histogram buckets (seconds)
+buckets = [ 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0 ]
+
+lock = threading.Lock()
+# (name,labels) -> Histogram; labels is a sorted tuple of pairs
+histograms: Dict[Tuple[str,Tuple[Tuple[str,str],...]],'Histogram'] = {}
+cachecounters: Dict[str,List[int]] = {}     # cache name -> [ hits, misses ]
+current = threading.local()
+starttime = time.time()
+
+class Histogram(object):
+
+    def __init__(self):
+        self.counts = [ 0 ] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self,v):
+        self.count += 1
+        self.sum += v
+        for (i,b) in enumerate(buckets):
+            if v <= b: self.counts[i] += 1
+
+    def as_dictionary(self):
+        result = {}
+        result['count'] = self.count
+        result['sum'] = self.sum
+        result['buckets'] = dict(zip([ str(b) for b in buckets ],self.counts))
+        return result
+
+def mk_labels(**labels): return tuple(sorted(labels.items()))
+
+def observe(name,seconds,**labels):
+    key = (name,mk_labels(**labels))
+    with lock:
+        if not key in histograms: histograms[key] = Histogram()
+        histograms[key].observe(seconds)
+
+def get_route(): return getattr(current,'route',None) or 'none'
+
+def start_request(route):
+    current.route = route
+    current.start = time.time()
+    current.phasetime = 0.0
+
+def end_request(method,status):
+    """Record the latency of the request; the time not accounted for by any
+    of the explicit phases is attributed to report-compute."""
+    start = getattr(current,'start',None)
+    if start is None: return
+    elapsed = time.time() - start
+    route = get_route()
+    observe('chj_request_seconds',elapsed,route=route,method=method,status=str(status))
+    observe('chj_phase_seconds',max(0.0,elapsed - current.phasetime),
+            route=route,phase='report-compute')
+    current.start = None
+    current.route = None
+
+@contextmanager
+def phase(name):
+    """Record the time spent in a phase (app-load, report-compute, graphviz,
+    serialization, ...) of the request currently being handled."""
+    t0 = time.time()
+    try:
+        yield
+    finally:
+        elapsed = time.time() - t0
+        if getattr(current,'start',None) is not None:
+            current.phasetime += elapsed
+        observe('chj_phase_seconds',elapsed,route=get_route(),phase=name)
+
+def record_cache_access(cache,hit):
+    with lock:
+        counters = cachecounters.setdefault(cache,[ 0, 0 ])
+        counters[0 if hit else 1] += 1
+
+def get_rss():
+    """Return the current resident set size in bytes (None if not available)."""
+    try:
+        with open('/proc/self/statm') as fp:
+            pages = int(fp.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (IOError,OSError,ValueError,IndexError):
+        return None
+
+def get_private_memory():
+    """Return the size in bytes of the pages not shared with other processes
+    (for a forked worker: the pages copied from the master), None if not available."""
+    try:
+        result = 0
+        with open('/proc/self/smaps_rollup') as fp:
+            for line in fp:
+                if line.startswith('Private_'):
+                    result += int(line.split()[1]) * 1024
+        return result
+    except (IOError,OSError,ValueError,IndexError):
+        return None
+
+def get_max_rss():
+    """Return the peak resident set size in bytes."""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+def reset():
+    with lock:
+        histograms.clear()
+        cachecounters.clear()
+
+def as_dictionary():
+    result = {}
+    with lock:
+        result['histograms'] = histos = {}
+        for ((name,labels),h) in sorted(histograms.items()):
+            entry = h.as_dictionary()
+            entry['labels'] = dict(labels)
+            histos.setdefault(name,[]).append(entry)
+        result['caches'] = caches = {}
+        for (cache,(hits,misses)) in sorted(cachecounters.items()):
+            total = hits + misses
+            caches[cache] = { 'hits': hits, 'misses': misses,
+                              'hitrate': (float(hits) / total) if total > 0 else None }
+    result['process'] = { 'pid': os.getpid(),
+                          'rss': get_rss(),
+                          'maxrss': get_max_rss(),
+                          'private': get_private_memory(),
+                          'uptime': time.time() - starttime }
+    return result
+
+def prom_labels(labels,extra=[]):
+    pairs = list(labels) + extra
+    if len(pairs) == 0: return ''
+    return '{' + ','.join(k + '="' + str(v).replace('\\','\\\\').replace('"','\\"') + '"'
+                              for (k,v) in pairs) + '}'
+
+def to_prometheus():
+    lines = []
+    with lock:
+        names = sorted(set(name for (name,_) in histograms))
+        for name in names:
+            lines.append('# TYPE ' + name + ' histogram')
+            for ((hname,labels),h) in sorted(histograms.items()):
+                if hname != name: continue
+                for (b,c) in zip(buckets,h.counts):
+                    lines.append(name + '_bucket' + prom_labels(labels,[ ('le',str(b)) ])
+                                     + ' ' + str(c))
+                lines.append(name + '_bucket' + prom_labels(labels,[ ('le','+Inf') ])
+                                 + ' ' + str(h.count))
+                lines.append(name + '_sum' + prom_labels(labels) + ' ' + repr(h.sum))
+                lines.append(name + '_count' + prom_labels(labels) + ' ' + str(h.count))
+        lines.append('# TYPE chj_cache_hits_total counter')
+        for (cache,(hits,_)) in sorted(cachecounters.items()):
+            lines.append('chj_cache_hits_total' + prom_labels([ ('cache',cache) ]) + ' ' + str(hits))
+        lines.append('# TYPE chj_cache_misses_total counter')
+        for (cache,(_,misses)) in sorted(cachecounters.items()):
+            lines.append('chj_cache_misses_total' + prom_labels([ ('cache',cache) ])
+                             + ' ' + str(misses))
+    rss = get_rss()
+    if not rss is None:
+        lines.append('# TYPE process_resident_memory_bytes gauge')
+        lines.append('process_resident_memory_bytes ' + str(rss))
+    private = get_private_memory()
+    if not private is None:
+        lines.append('# TYPE process_private_memory_bytes gauge')
+        lines.append('process_private_memory_bytes ' + str(private))
+    lines.append('# TYPE process_max_resident_memory_bytes gauge')
+    lines.append('process_max_resident_memory_bytes ' + str(get_max_rss()))
+    lines.append('# TYPE process_uptime_seconds gauge')
+    lines.append('process_uptime_seconds ' + repr(time.time() - starttime))
+    return '\n'.join(lines) + '\n'
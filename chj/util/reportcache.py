@@ -0,0 +1,165 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Disk cache of report results, shared by the report scripts and the server.
+
+A report result is stored in chanalysis/chcache/reports, keyed by the name of
+the report and its arguments, together with a fingerprint of the inputs it
+depends on. The inputs are
+- analysis: the files written by chj_analyze (data dictionary, call graph, ...)
+- cost: the cost files written by chj_analyze_cost (chanalysis/chcost)
+- userdata: the user-provided data (chuserdata)
+A cached result is used only if the fingerprint of its inputs is unchanged.
+
+The format version of a report (reportversions) is part of its key: it must
+be incremented whenever the structure of the cached result of the report
+changes (e.g., the dictionary served to the web pages), so that results
+cached in the old format are not served.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import chj.util.fileutil as UF
+import chj.util.perfmetrics as UM
+
+cacheversion = 2
+
+# report -> version of the format of its result (1 if not listed)
+reportversions = {
+    'recursion': 2              # recursive strongly connected components
+    }
+
+def get_report_version(report): return reportversions.get(report,1)
+
+def get_tree_fingerprint(dirname):
+    """Return a list of (relative filename,size,mtime) of all files in dirname."""
+    result = []
+    for (root,dirs,files) in os.walk(dirname):
+        dirs.sort()
+        for f in sorted(files):
+            filename = os.path.join(root,f)
+            try:
+                st = os.stat(filename)
+            except OSError:
+                continue
+            result.append((os.path.relpath(filename,dirname),st.st_size,st.st_mtime_ns))
+    return result
+
+inputs = {
+    'analysis': lambda path:UF.get_analysis_fingerprint(path),
+    'cost': lambda path:get_tree_fingerprint(os.path.join(UF.get_analysisdir(path),'chcost')),
+    'userdata': lambda path:get_tree_fingerprint(os.path.join(path,'chuserdata'))
+    }
+
+def get_input_fingerprint(path,deps):
+    """Return a hash of the fingerprints of the inputs in deps."""
+    fingerprints = [ (d,inputs[d](path)) for d in sorted(deps) ]
+    return hashlib.md5(json.dumps(fingerprints).encode('utf-8')).hexdigest()
+
+def get_report_cache_dir(path):
+    cachedir = os.path.join(UF.get_cachedir(path),'reports')
+    if not os.path.isdir(cachedir):
+        os.makedirs(cachedir)
+    return cachedir
+
+def get_report_cache_filename(path,report,args):
+    key = hashlib.md5(json.dumps([ report, get_report_version(report), args ],
+                                     sort_keys=True).encode('utf-8')).hexdigest()
+    return os.path.join(get_report_cache_dir(path),report + '-' + key[:16] + '.json')
+
+def _load_entry(filename):
+    try:
+        with open(filename) as fp:
+            entry = json.load(fp)
+    except (OSError,ValueError):
+        return None
+    if entry.get('version') != cacheversion: return None
+    if entry.get('reportversion') != get_report_version(entry.get('report')): return None
+    return entry
+
+def get_report(path,report,args,deps,f,refresh=False):
+    """Return the result of report with args (a json-serializable dictionary),
+    from the cache if its inputs deps have not changed since it was cached,
+    or else computed by f() (a string or json-serializable value) and cached."""
+    filename = get_report_cache_filename(path,report,args)
+    fingerprint = get_input_fingerprint(path,deps)
+    if not refresh:
+        entry = _load_entry(filename)
+        if (not entry is None) and entry['fingerprint'] == fingerprint:
+            UM.record_cache_access('report',True)
+            return entry['content']
+    UM.record_cache_access('report',False)
+    content = f()
+    entry = { 'version': cacheversion, 'report': report,
+                  'reportversion': get_report_version(report), 'args': args, 'deps': sorted(deps),
+                  'fingerprint': fingerprint, 'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                  'content': content }
+    tmpfilename = filename + '.' + str(os.getpid()) + '.tmp'
+    try:
+        with open(tmpfilename,'w') as fp:
+            json.dump(entry,fp)
+        os.replace(tmpfilename,filename)
+    except (OSError,TypeError,ValueError) as e:
+        print('Unable to cache report ' + report + ': ' + str(e))
+        if os.path.isfile(tmpfilename): os.remove(tmpfilename)
+    return content
+
+def has_current_report(path,report,args,deps):
+    entry = _load_entry(get_report_cache_filename(path,report,args))
+    return (not entry is None) and entry['fingerprint'] == get_input_fingerprint(path,deps)
+
+def get_cached_reports(path):
+    """Return [ (filename,report,args,created,size,current) ] for all cached reports."""
+    result = []
+    cachedir = get_report_cache_dir(path)
+    fingerprints = {}
+    for f in sorted(os.listdir(cachedir)):
+        if not f.endswith('.json'): continue
+        filename = os.path.join(cachedir,f)
+        entry = _load_entry(filename)
+        if entry is None:
+            result.append((filename,None,None,None,os.path.getsize(filename),False))
+            continue
+        deps = tuple(entry['deps'])
+        if not deps in fingerprints:
+            fingerprints[deps] = get_input_fingerprint(path,deps)
+        result.append((filename,entry['report'],entry['args'],entry['created'],
+                           os.path.getsize(filename),entry['fingerprint'] == fingerprints[deps]))
+    return result
+
+def purge_reports(path,report=None,staleonly=False):
+    """Remove cached reports (only those of report, if given; only those whose
+    inputs have changed, if staleonly); return the number removed."""
+    count = 0
+    for (filename,name,_,_,_,current) in get_cached_reports(path):
+        if (not report is None) and name != report: continue
+        if staleonly and current: continue
+        os.remove(filename)
+        count += 1
+    return count
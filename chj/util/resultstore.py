@@ -0,0 +1,208 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Content-addressed store of analyzer results.
+
+The inputs of an analyzer run (jars, summaries, excludes, user data, and the
+analyzer itself) are hashed; the hash is recorded in chanalysis/chinputs, so
+that a run with unchanged inputs can be skipped. The files written by a run
+are saved in the store (Config().resultstore), each file under the hash of
+its content, with a list of the files of the run under its input hash; a run
+with the same inputs in another checkout of the application restores the
+files from the store instead of running the analyzer.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from typing import Dict, Tuple
+
+import chj.util.fileutil as UF
+
+from chj.util.Config import Config
+
+# directories in chanalysis that are written by the python tools, not by the analyzer
+localdirs = [ 'chcache', 'chindex', 'chinputs', 'chlogs' ]
+
+filehashes: Dict[str,Tuple[Tuple[int,int],str]] = {}   # absolute filename -> ((size,mtime),sha256), shared with the store
+lock = threading.Lock()
+
+def _get_file_hashes_filename():
+    return os.path.join(get_store_dir(),'filehashes.json')
+
+def get_store_dir():
+    storedir = Config().resultstore
+    if not os.path.isdir(storedir):
+        os.makedirs(storedir)
+    return storedir
+
+def _load_file_hashes():
+    if len(filehashes) > 0: return
+    filename = _get_file_hashes_filename()
+    if os.path.isfile(filename):
+        try:
+            with open(filename) as fp:
+                for (f,(fingerprint,h)) in json.load(fp).items():
+                    filehashes[f] = (tuple(fingerprint),h)
+        except ValueError as e:
+            print('Ignoring file hashes ' + filename + ': ' + str(e))
+
+def _save_file_hashes():
+    filename = _get_file_hashes_filename()
+    tmpfilename = filename + '.' + str(os.getpid()) + '.tmp'
+    with open(tmpfilename,'w') as fp:
+        json.dump(dict((f,[ list(fingerprint),h ]) for (f,(fingerprint,h)) in filehashes.items()),fp)
+    os.replace(tmpfilename,filename)
+
+def get_file_hashes(filenames):
+    """Return the sha256 of the contents of filenames (None for a file that does
+    not exist); hashes are remembered by size and modification time."""
+    result = []
+    with lock:
+        _load_file_hashes()
+        changed = False
+        for filename in filenames:
+            fingerprint = UF.get_file_fingerprint(filename)
+            if fingerprint is None:
+                result.append(None)
+                continue
+            filename = os.path.abspath(filename)
+            if not (filename in filehashes and filehashes[filename][0] == fingerprint):
+                h = hashlib.sha256()
+                with open(filename,'rb') as fp:
+                    for block in iter(lambda:fp.read(1 << 20),b''): h.update(block)
+                filehashes[filename] = (fingerprint,h.hexdigest())
+                changed = True
+            result.append(filehashes[filename][1])
+        if changed: _save_file_hashes()
+    return result
+
+def get_file_hash(filename): return get_file_hashes([ filename ])[0]
+
+def get_tree_hashes(dirname):
+    """Return [ (relative filename,sha256) ] for all files in dirname."""
+    filenames = []
+    for (root,dirs,files) in os.walk(dirname):
+        dirs.sort()
+        for f in sorted(files): filenames.append(os.path.join(root,f))
+    hashes = get_file_hashes(filenames)
+    return [ (os.path.relpath(f,dirname),h) for (f,h) in zip(filenames,hashes) ]
+
+def get_input_hash(inputs):
+    """Return the hash of inputs, a json-serializable description of the inputs."""
+    return hashlib.sha256(json.dumps(inputs,sort_keys=True).encode('utf-8')).hexdigest()
+
+# ---------------------------------------------------- records in chanalysis --
+
+def get_analysis_snapshot(path):
+    """Return relative filename -> (size,mtime) of the files written by the
+    analyzer in chanalysis."""
+    analysisdir = UF.get_analysisdir(path)
+    result = {}
+    for (root,dirs,files) in os.walk(analysisdir):
+        if root == analysisdir: dirs[:] = [ d for d in dirs if not d in localdirs ]
+        for f in files:
+            filename = os.path.join(root,f)
+            result[os.path.relpath(filename,analysisdir)] = UF.get_file_fingerprint(filename)
+    return result
+
+def get_record(path,mode):
+    filename = UF.get_analysis_inputs_filename(path,mode)
+    if os.path.isfile(filename):
+        try:
+            with open(filename) as fp:
+                return json.load(fp)
+        except ValueError:
+            return None
+
+def save_record(path,mode,inputhash,inputs,files,restored=False):
+    filename = UF.get_analysis_inputs_filename(path,mode)
+    record = { 'hash': inputhash, 'inputs': inputs, 'files': files, 'restored': restored,
+                   'time': time.strftime('%Y-%m-%d %H:%M:%S') }
+    with open(filename,'w') as fp:
+        json.dump(record,fp,indent=2,sort_keys=True)
+
+def has_current_results(path,mode,inputhash):
+    """Return true if the last run of mode had the same inputs and its files are
+    still present."""
+    record = get_record(path,mode)
+    if record is None or record['hash'] != inputhash: return False
+    analysisdir = UF.get_analysisdir(path)
+    return all(os.path.isfile(os.path.join(analysisdir,f)) for f in record['files'])
+
+# ----------------------------------------------------------------- store ---
+
+def _get_object_filename(h):
+    return os.path.join(get_store_dir(),'objects',h[:2],h)
+
+def _get_run_filename(inputhash):
+    return os.path.join(get_store_dir(),'runs',inputhash + '.json')
+
+def has_stored_results(inputhash):
+    return os.path.isfile(_get_run_filename(inputhash))
+
+def store_results(path,inputhash,files):
+    """Save the files (relative to chanalysis) in the store under inputhash."""
+    analysisdir = UF.get_analysisdir(path)
+    run = {}
+    hashes = get_file_hashes([ os.path.join(analysisdir,f) for f in files ])
+    for (f,h) in zip(files,hashes):
+        filename = os.path.join(analysisdir,f)
+        objfilename = _get_object_filename(h)
+        if not os.path.isfile(objfilename):
+            if not os.path.isdir(os.path.dirname(objfilename)):
+                os.makedirs(os.path.dirname(objfilename))
+            tmpfilename = objfilename + '.' + str(os.getpid()) + '.tmp'
+            shutil.copyfile(filename,tmpfilename)
+            os.replace(tmpfilename,objfilename)
+        run[f] = h
+    runfilename = _get_run_filename(inputhash)
+    if not os.path.isdir(os.path.dirname(runfilename)):
+        os.makedirs(os.path.dirname(runfilename))
+    tmpfilename = runfilename + '.' + str(os.getpid()) + '.tmp'
+    with open(tmpfilename,'w') as fp:
+        json.dump(run,fp)
+    os.replace(tmpfilename,runfilename)
+
+def restore_results(path,inputhash):
+    """Copy the files saved under inputhash into chanalysis; return the list of
+    files restored, or None if the store has no (complete) results."""
+    runfilename = _get_run_filename(inputhash)
+    if not os.path.isfile(runfilename): return None
+    with open(runfilename) as fp:
+        run = json.load(fp)
+    if not all(os.path.isfile(_get_object_filename(h)) for h in run.values()): return None
+    analysisdir = UF.get_analysisdir(path)
+    for (f,h) in run.items():
+        filename = os.path.join(analysisdir,f)
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        shutil.copyfile(_get_object_filename(h),filename)
+    return sorted(run.keys())
@@ -0,0 +1,133 @@
+# ------------------------------------------------------------------------------
+# CodeHawk Java Analyzer
+# Author: Andrew McGraw
+# ------------------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2020 Kestrel Technology LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ------------------------------------------------------------------------------
+"""Progress and resource usage of analyzer runs.
+
+The output of the analyzer is parsed line by line into progress events. When
+a run completes, its wall time, cpu time (user and system) and peak resident
+set size (from the rusage of the analyzer process) are appended, with the
+phase (translate, scan, analyze, cost, taint), to the metrics file of the
+application, chmetrics/analyzerruns.json, which is kept outside chanalysis so
+that it survives reanalysis.
+"""
+
+import datetime
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+import chj.util.fileutil as UF
+import chj.util.perfmetrics as UM
+
+# maximum number of runs kept per application
+maxruns = 1000
+
+progresspatterns = [
+    re.compile(r'(?P<done>\d+)\s*(?:/|of)\s*(?P<total>\d+)'),
+    re.compile(r'(?P<percent>\d+(?:\.\d+)?)\s*%') ]
+
+def parse_progress(line):
+    """Return a progress event for an output line of the analyzer: the line,
+    with done/total or percent if the line reports a count or a percentage."""
+    event = { 'time': time.time(), 'line': line.rstrip('\n') }
+    for p in progresspatterns:
+        m = p.search(line)
+        if m is None: continue
+        for (k,v) in m.groupdict().items():
+            event[k] = float(v) if k == 'percent' else int(v)
+        break
+    return event
+
+def get_exit_code(status):
+    if os.WIFSIGNALED(status): return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+def get_rusage_record(ru):
+    """Return cpu times (seconds) and peak resident set size (bytes) of an rusage."""
+    maxrss = ru.ru_maxrss if sys.platform == 'darwin' else ru.ru_maxrss * 1024
+    return { 'user': round(ru.ru_utime,3), 'sys': round(ru.ru_stime,3),
+                 'cpu': round(ru.ru_utime + ru.ru_stime,3), 'maxrss': maxrss }
+
+def run_analyzer(cmd,cwd,phase,progress=None,stdout=None):
+    """Run cmd in cwd, passing every output line as a progress event to progress
+    (if given) and writing it to stdout (sys.stdout if None); return the run
+    record with the return code, the number of output lines, the last progress
+    event with a count, wall time, cpu time, and peak rss."""
+    record = {}
+    record['phase'] = phase
+    record['start'] = datetime.datetime.now().isoformat(timespec='seconds')
+    if stdout is None: stdout = sys.stdout
+    t0 = time.time()
+    proc = subprocess.Popen(cmd,cwd=cwd,stdout=subprocess.PIPE,stderr=subprocess.STDOUT,
+                                universal_newlines=True,errors='replace',bufsize=1)
+    lines = 0
+    lastprogress = None
+    for line in proc.stdout:
+        lines += 1
+        stdout.write(line)
+        event = parse_progress(line)
+        if 'done' in event or 'percent' in event: lastprogress = event
+        if not progress is None: progress(event)
+    proc.stdout.close()
+    # wait4 gives the rusage of this process only (getrusage(RUSAGE_CHILDREN)
+    # reports the maximum rss over all children waited for so far)
+    (_,status,ru) = os.wait4(proc.pid,0)
+    proc.returncode = get_exit_code(status)
+    record['returncode'] = proc.returncode
+    record['status'] = 'ok' if proc.returncode == 0 else 'failed'
+    record['wall'] = round(time.time() - t0,3)
+    record['lines'] = lines
+    if not lastprogress is None:
+        record['progress'] = dict((k,v) for (k,v) in lastprogress.items() if k != 'time')
+    record.update(get_rusage_record(ru))
+    UM.observe('chj_analyzer_seconds',record['wall'],phase=phase)
+    return record
+
+def get_runs(path):
+    """Return the records of all analyzer runs of the application, oldest first."""
+    filename = UF.get_analyzer_metrics_filename(path)
+    if os.path.isfile(filename):
+        try:
+            with open(filename) as fp:
+                return json.load(fp).get('runs',[])
+        except ValueError as e:
+            print('Ignoring analyzer metrics ' + filename + ': ' + str(e))
+    return []
+
+def record_run(path,record):
+    """Append the record of a run to the metrics file of the application."""
+    filename = UF.get_analyzer_metrics_filename(path)
+    if not os.path.isdir(os.path.dirname(filename)):
+        os.makedirs(os.path.dirname(filename))
+    runs = get_runs(path)
+    runs.append(record)
+    tmpfilename = filename + '.' + str(os.getpid()) + '.tmp'
+    with open(tmpfilename,'w') as fp:
+        json.dump({ 'runs': runs[-maxruns:] },fp,indent=1)
+    os.replace(tmpfilename,filename)
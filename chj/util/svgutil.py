@@ -33,6 +33,7 @@ import difflib
 import xml.etree.ElementTree as ET
 
 import chj.util.dotutil as UD
+import chj.util.perfmetrics as UM
 
 def svg_namespace():
     return {'svg' : 'http://www.w3.org/2000/svg'}
@@ -75,7 +76,8 @@ def save_svg(path, g):
     svgfilename = os.path.join(path,g.name + '.svg')
     if os.path.isfile(dotfilename):
         cmd = [ 'dot', '-Tsvg', '-o', svgfilename, dotfilename ]
-        subprocess.call(cmd, stderr=subprocess.STDOUT)
+        with UM.phase('graphviz'):
+            subprocess.call(cmd, stderr=subprocess.STDOUT)
 
 def get_svg(path, g):
     graphsdir = os.path.join(path, 'graphs')